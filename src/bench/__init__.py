@@ -0,0 +1,14 @@
+from .bench import (
+    BenchCase,
+    BenchRegression,
+    BenchReport,
+    BenchResult,
+    BenchRunner,
+    build_cases,
+    compare,
+    image_quality,
+    percentile,
+    ratios,
+    summarize,
+)
+from .pipeline import PRECISIONS, build_tiny_pipeline
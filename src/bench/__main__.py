@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+from loguru import logger
+
+from src.bench import BenchReport, BenchRunner, build_cases, build_tiny_pipeline, compare
+from src.client.image import ImageClient
+
+DEFAULT_OUTPUT = Path("media/bench/result.json")
+DEFAULT_BASELINE = Path("src/bench/baseline.json")
+# CI regression gate and its stored baseline: accelerated cases next to their plain references, with
+# enough repeats and slack that shared-runner noise (~25% on a speedup) passes but a lost acceleration does not
+GATE_ARGS = {
+    "steps": [8],
+    "resolutions": [(64, 64)],
+    "batch_sizes": [1],
+    "precisions": ["fp32"],
+    "concurrency": [1],
+    "deepcache": [0, 2, 4],
+    "tome": [0.0, 0.5],
+    "repeats": 9,
+    "warmup": 2,
+    "tolerance": 0.35,
+}
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _str_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _float_list(value: str) -> list[float]:
+    return [float(item) for item in value.split(",") if item.strip()]
+
+
+def _resolutions(value: str) -> list[tuple[int, int]]:
+    resolutions: list[tuple[int, int]] = []
+    for item in _str_list(value):
+        width, _, height = item.lower().partition("x")
+        resolutions.append((int(width), int(height or width)))
+    return resolutions
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bench",
+        description="Benchmark ImageClient across steps/resolution/batch/precision/concurrency.",
+    )
+    parser.add_argument("--model", choices=["tiny", "pretrained"], default="tiny",
+                        help="tiny = offline random-weight pipeline, pretrained = IMAGE_PRETRAINED_MODEL")
+    parser.add_argument("--steps", type=_int_list, default=[2, 4])
+    parser.add_argument("--resolutions", type=_resolutions, default=[(64, 64), (128, 128)])
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 2])
+    parser.add_argument("--precisions", type=_str_list, default=["fp32", "bf16"])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2])
+    parser.add_argument("--deepcache", type=_int_list, default=[0],
+                        help="DeepCache refresh intervals, 0 = off (quality is reported against 0)")
+    parser.add_argument("--tome", type=_float_list, default=[0.0],
+                        help="token merging ratios, 0 = off (quality is reported against 0)")
+    parser.add_argument("--gate", action="store_true",
+                        help="run the regression gate matrix (overrides the matrix, repeats, warmup and tolerance)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--prompt", default="a photograph of an astronaut riding a horse")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative drop of a speedup or PSNR against the baseline (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit 1 if any ratio regressed, or if there is no baseline to compare with")
+    args = parser.parse_args(argv)
+    if args.gate:
+        for name, value in GATE_ARGS.items():
+            setattr(args, name, value)
+    return args
+
+
+async def _main(args: argparse.Namespace) -> int:
+    pipeline = build_tiny_pipeline() if args.model == "tiny" else None
+    image_dir = Path(tempfile.mkdtemp(prefix="bench-image-"))
+    runner = BenchRunner(
+        image_client=ImageClient(pipeline=pipeline, image_dir=image_dir),
+        image_dir=image_dir,
+        prompt=args.prompt,
+        repeats=args.repeats,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+
+    cases = build_cases(
+        steps=args.steps,
+        resolutions=args.resolutions,
+        batch_sizes=args.batch_sizes,
+        precisions=args.precisions,
+        concurrencies=args.concurrency,
+        deepcache=args.deepcache,
+        tome=args.tome,
+    )
+    logger.info(f"bench|main(): {len(cases)} cases, model={args.model}")
+
+    try:
+        report = await runner.run(cases, model=args.model)
+    finally:
+        runner.close()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(report.model_dump_json(indent=2))
+    logger.info(f"bench|main(): report written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(report.model_dump_json(indent=2))
+        logger.info(f"bench|main(): baseline updated at {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        logger.warning(f"bench|main(): no baseline at {args.baseline}, skipping comparison")
+        return 1 if args.fail_on_regression else 0
+
+    baseline = BenchReport.model_validate_json(args.baseline.read_text())
+    regressions, compared = compare(report, baseline, tolerance=args.tolerance)
+    if not compared:
+        # a gate that compares nothing always passes
+        logger.warning(f"bench|main(): no accelerated case shared with {args.baseline}, nothing compared")
+        return 1 if args.fail_on_regression else 0
+    for regression in regressions:
+        logger.warning(
+            f"bench|main(): regression {regression.key} {regression.metric} "
+            f"{regression.baseline} -> {regression.current} ({regression.change_pct:+.1f}%)"
+        )
+    if not regressions:
+        logger.success(
+            f"bench|main(): {compared} ratios within tolerance={args.tolerance} of {args.baseline}"
+        )
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(_parse_args())))
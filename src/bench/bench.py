@@ -0,0 +1,330 @@
+import asyncio
+import itertools
+import math
+import platform
+import resource
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Annotated, Any
+
+import diffusers
+import numpy as np
+import torch
+from loguru import logger
+from PIL import Image
+from pydantic import Field
+
+from src.client.image import ImageClient
+from src.core.base import BaseSchema
+from src.core.format import utc_iso_timestamp
+
+from .pipeline import PRECISIONS
+
+
+class BenchCase(BaseSchema):
+    steps: Annotated[int, Field(gt=0)]
+    width: Annotated[int, Field(gt=0)]
+    height: Annotated[int, Field(gt=0)]
+    batch_size: Annotated[int, Field(gt=0)]
+    precision: Annotated[str, Field(...)]
+    concurrency: Annotated[int, Field(gt=0)]
+    deepcache: Annotated[int, Field(default=0, ge=0)] = 0
+    tome: Annotated[float, Field(default=0.0, ge=0, lt=1)] = 0.0
+
+    @property
+    def key(self) -> str:
+        return (
+            f"steps={self.steps}|res={self.width}x{self.height}|batch={self.batch_size}"
+            f"|precision={self.precision}|concurrency={self.concurrency}|deepcache={self.deepcache}|tome={self.tome}"
+        )
+
+    @property
+    def accelerated(self) -> bool:
+        return self.deepcache > 1 or self.tome > 0
+
+
+class BenchResult(BaseSchema):
+    key: Annotated[str, Field(...)]
+    case: Annotated[BenchCase, Field(...)]
+    requests: Annotated[int, Field(...)]
+    images: Annotated[int, Field(...)]
+    per_step_ms: Annotated[dict[str, float], Field(default_factory=dict)]
+    latency_ms: Annotated[dict[str, float], Field(default_factory=dict)]
+    images_per_sec: Annotated[float, Field(...)]
+    peak_rss_mb: Annotated[float, Field(...)]
+    # accelerated cases only: same seed, accelerated vs. plain output
+    quality: Annotated[dict[str, float] | None, Field(default=None)] = None
+
+
+class BenchReport(BaseSchema):
+    meta: Annotated[dict[str, Any], Field(default_factory=dict)]
+    results: Annotated[list[BenchResult], Field(default_factory=list)]
+
+
+class BenchRegression(BaseSchema):
+    key: Annotated[str, Field(...)]
+    metric: Annotated[str, Field(...)]
+    baseline: Annotated[float, Field(...)]
+    current: Annotated[float, Field(...)]
+    change_pct: Annotated[float, Field(...)]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    return {
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "min": round(min(values), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on linux
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(rss / divisor, 2)
+
+
+def image_quality(reference: Path, candidate: Path) -> dict[str, float]:
+    """
+    PSNR (dB) and mean absolute error (0-255) of candidate against reference.
+    """
+    expected = np.asarray(Image.open(reference).convert("RGB"), dtype=np.float64)
+    actual = np.asarray(Image.open(candidate).convert("RGB"), dtype=np.float64)
+    mse = float(np.mean((expected - actual) ** 2))
+    psnr = 100.0 if mse == 0 else 10 * math.log10(255.0**2 / mse)
+    return {
+        "psnr_db": round(psnr, 3),
+        "mae": round(float(np.mean(np.abs(expected - actual))), 3),
+    }
+
+
+def build_cases(
+    steps: list[int],
+    resolutions: list[tuple[int, int]],
+    batch_sizes: list[int],
+    precisions: list[str],
+    concurrencies: list[int],
+    deepcache: list[int] | None = None,
+    tome: list[float] | None = None,
+) -> list[BenchCase]:
+    # precision is the outermost axis so the pipeline is cast once per precision
+    return [
+        BenchCase(
+            steps=step,
+            width=width,
+            height=height,
+            batch_size=batch_size,
+            precision=precision,
+            concurrency=concurrency,
+            deepcache=interval,
+            tome=ratio,
+        )
+        for precision, step, (width, height), batch_size, concurrency, interval, ratio in itertools.product(
+            precisions, steps, resolutions, batch_sizes, concurrencies, deepcache or [0], tome or [0.0]
+        )
+    ]
+
+
+class BenchRunner:
+    def __init__(
+        self,
+        image_client: ImageClient,
+        image_dir: Path,
+        prompt: str = "a photograph of an astronaut riding a horse",
+        repeats: int = 3,
+        warmup: int = 1,
+        seed: int = 0,
+    ) -> None:
+        self._image_client = image_client
+        self._image_dir = image_dir
+        self._prompt = prompt
+        self._repeats = repeats
+        self._warmup = warmup
+        self._seed = seed
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    async def _timed_request(self, case: BenchCase) -> tuple[float, list[float]]:
+        start_at = time.perf_counter()
+        result = await self._image_client.run_batch(
+            prompt=self._prompt,
+            steps=case.steps,
+            width=case.width,
+            height=case.height,
+            num_images=case.batch_size,
+            deepcache_interval=case.deepcache,
+            tome_ratio=case.tome,
+            seed=self._seed,
+        )
+        elapsed_ms = (time.perf_counter() - start_at) * 1000
+        return elapsed_ms, result.timing.unet_steps_ms if result.timing else []
+
+    async def _burst(self, case: BenchCase) -> list[tuple[float, list[float]]]:
+        return list(await asyncio.gather(*(self._timed_request(case) for _ in range(case.concurrency))))
+
+    def _clean_images(self) -> None:
+        for file in self._image_dir.glob("*.png"):
+            file.unlink(missing_ok=True)
+
+    async def _quality(self, case: BenchCase) -> dict[str, float]:
+        options = {
+            "prompt": self._prompt,
+            "steps": case.steps,
+            "width": case.width,
+            "height": case.height,
+            "num_images": 1,
+            "seed": self._seed,
+        }
+        reference = await self._image_client.run_batch(**options)
+        candidate = await self._image_client.run_batch(
+            **options, deepcache_interval=case.deepcache, tome_ratio=case.tome
+        )
+        return image_quality(Path(reference.outputs[0]), Path(candidate.outputs[0]))
+
+    async def run_case(self, case: BenchCase) -> BenchResult:
+        logger.info(f"{self._tag}|run_case(): {case.key}")
+        self._image_client.pipeline.to(dtype=PRECISIONS[case.precision])
+
+        for _ in range(self._warmup):
+            await self._burst(case)
+        self._clean_images()
+
+        latencies: list[float] = []
+        step_durations: list[float] = []
+        try:
+            start_at = time.perf_counter()
+            for _ in range(self._repeats):
+                for latency, steps_ms in await self._burst(case):
+                    latencies.append(latency)
+                    step_durations.extend(steps_ms)
+            wall = time.perf_counter() - start_at
+            quality = await self._quality(case) if case.accelerated else None
+        finally:
+            self._clean_images()
+
+        images = len(latencies) * case.batch_size
+        result = BenchResult(
+            key=case.key,
+            case=case,
+            requests=len(latencies),
+            images=images,
+            per_step_ms=summarize(step_durations),
+            latency_ms=summarize(latencies),
+            images_per_sec=round(images / wall, 4) if wall > 0 else 0.0,
+            peak_rss_mb=peak_rss_mb(),
+            quality=quality,
+        )
+        logger.info(
+            f"{self._tag}|run_case(): {case.key} p50={result.latency_ms.get('p50')}ms "
+            f"step_p50={result.per_step_ms.get('p50')}ms images/sec={result.images_per_sec} quality={quality}"
+        )
+        return result
+
+    async def run(self, cases: list[BenchCase], model: str) -> BenchReport:
+        results = [await self.run_case(case) for case in cases]
+        return BenchReport(
+            meta={
+                "model": model,
+                "timestamp": utc_iso_timestamp(),
+                "python": platform.python_version(),
+                "torch": torch.__version__,
+                "diffusers": diffusers.__version__,
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "torch_threads": torch.get_num_threads(),
+                "repeats": self._repeats,
+                "warmup": self._warmup,
+            },
+            results=results,
+        )
+
+    def close(self) -> None:
+        shutil.rmtree(self._image_dir, ignore_errors=True)
+
+
+def _reference_key(case: BenchCase) -> str:
+    return case.model_copy(update={"deepcache": 0, "tome": 0.0}).key
+
+
+def ratios(report: BenchReport) -> dict[tuple[str, str], float]:
+    """
+    Machine-independent figures of a run, {(case key, metric): value}, for the
+    accelerated cases whose plain reference (same case, DeepCache and ToMe off)
+    ran too:
+        speedup: reference p50 latency / case p50 latency, same run
+        quality.psnr_db: PSNR of the output against the reference output
+    """
+    results = {result.key: result for result in report.results}
+    figures: dict[tuple[str, str], float] = {}
+    for result in report.results:
+        reference = results.get(_reference_key(result.case))
+        if not result.case.accelerated or reference is None:
+            continue
+        latency, reference_latency = result.latency_ms.get("p50", 0.0), reference.latency_ms.get("p50", 0.0)
+        if latency and reference_latency:
+            figures[(result.key, "speedup")] = round(reference_latency / latency, 4)
+        if result.quality and "psnr_db" in result.quality:
+            figures[(result.key, "quality.psnr_db")] = result.quality["psnr_db"]
+    return figures
+
+
+def compare(
+    report: BenchReport,
+    baseline: BenchReport,
+    tolerance: float = 0.2,
+) -> tuple[list[BenchRegression], int]:
+    """
+    Compare the ratios() of a report with those of a stored baseline. Absolute
+    latencies are not compared, they depend on the machine and its neighbours;
+    a speedup measured against a reference of the same run does much less.
+    Args:
+        report: Current run
+        baseline: Stored run
+        tolerance: Allowed relative drop of a ratio, e.g. 0.2 = 20%
+    Returns:
+        (regressions beyond tolerance, number of figures compared); figures missing from either side are skipped
+    """
+    current = ratios(report)
+    expected = ratios(baseline)
+    regressions: list[BenchRegression] = []
+    compared = 0
+
+    for (key, metric), value in current.items():
+        previous = expected.get((key, metric))
+        if not previous:
+            continue
+        compared += 1
+        # both are higher-is-better
+        change = (value - previous) / previous
+        if change < -tolerance:
+            regressions.append(
+                BenchRegression(
+                    key=key,
+                    metric=metric,
+                    baseline=previous,
+                    current=value,
+                    change_pct=round(change * 100, 2),
+                )
+            )
+
+    return regressions, compared
@@ -0,0 +1,118 @@
+import json
+import tempfile
+from pathlib import Path
+
+import torch
+from diffusers import AutoencoderKL, DDIMScheduler, StableDiffusionPipeline, UNet2DConditionModel
+from loguru import logger
+from transformers import CLIPTextConfig, CLIPTextModel, CLIPTokenizer
+
+PRECISIONS: dict[str, torch.dtype] = {
+    "fp32": torch.float32,
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+}
+
+
+def _byte_unicode_chars() -> list[str]:
+    # same byte -> printable unicode table used by the CLIP byte-level BPE
+    bs = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    return [chr(c) for c in cs]
+
+
+def _build_tiny_tokenizer() -> CLIPTokenizer:
+    """
+    Build a character-level CLIP tokenizer without touching the hub.
+    The vocab holds every byte-level char (plain and end-of-word) and no merges.
+    """
+    chars = _byte_unicode_chars()
+    tokens = chars + [f"{c}</w>" for c in chars] + ["<|startoftext|>", "<|endoftext|>"]
+
+    tokenizer_dir = Path(tempfile.mkdtemp(prefix="tiny-clip-"))
+    vocab_file = tokenizer_dir / "vocab.json"
+    merges_file = tokenizer_dir / "merges.txt"
+    vocab_file.write_text(json.dumps({token: idx for idx, token in enumerate(tokens)}))
+    merges_file.write_text("#version: 0.2\n")
+
+    # from_pretrained on a local dir reads the same files on transformers 4.x and 5.x
+    return CLIPTokenizer.from_pretrained(tokenizer_dir, model_max_length=77)
+
+
+def build_tiny_pipeline(precision: str = "fp32", seed: int = 0) -> StableDiffusionPipeline:
+    """
+    Build a tiny, randomly-initialised StableDiffusionPipeline.
+    Shapes mirror SD 1.5 (4 latent channels, cross-attention UNet, KL VAE) at a
+    fraction of the width, so the benchmark runs offline on a CPU-only box.
+    Args:
+        precision: Key of PRECISIONS
+        seed: Seed for the random weights
+    Returns:
+        StableDiffusionPipeline on cpu
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {list(PRECISIONS)}")
+
+    logger.debug(f"build_tiny_pipeline(): precision={precision} seed={seed}")
+    torch.manual_seed(seed)
+
+    tokenizer = _build_tiny_tokenizer()
+    vocab_size = len(tokenizer.get_vocab())
+    text_encoder = CLIPTextModel(
+        CLIPTextConfig(
+            vocab_size=vocab_size,
+            bos_token_id=vocab_size - 2,
+            eos_token_id=vocab_size - 1,
+            pad_token_id=vocab_size - 1,
+            hidden_size=32,
+            intermediate_size=37,
+            num_attention_heads=4,
+            num_hidden_layers=2,
+            max_position_embeddings=77,
+        )
+    )
+    unet = UNet2DConditionModel(
+        sample_size=32,
+        in_channels=4,
+        out_channels=4,
+        layers_per_block=2,
+        block_out_channels=(32, 64),
+        down_block_types=("DownBlock2D", "CrossAttnDownBlock2D"),
+        up_block_types=("CrossAttnUpBlock2D", "UpBlock2D"),
+        cross_attention_dim=32,
+    )
+    vae = AutoencoderKL(
+        in_channels=3,
+        out_channels=3,
+        latent_channels=4,
+        block_out_channels=(32, 64),
+        down_block_types=("DownEncoderBlock2D", "DownEncoderBlock2D"),
+        up_block_types=("UpDecoderBlock2D", "UpDecoderBlock2D"),
+    )
+    scheduler = DDIMScheduler(
+        beta_start=0.00085,
+        beta_end=0.012,
+        beta_schedule="scaled_linear",
+        clip_sample=False,
+        set_alpha_to_one=False,
+        steps_offset=1,
+    )
+
+    pipeline = StableDiffusionPipeline(
+        vae=vae,
+        text_encoder=text_encoder,
+        tokenizer=tokenizer,
+        unet=unet,
+        scheduler=scheduler,
+        safety_checker=None,
+        feature_extractor=None,
+        requires_safety_checker=False,
+    )
+    pipeline.set_progress_bar_config(disable=True)
+    return pipeline.to("cpu", dtype=PRECISIONS[precision])
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Annotated, Any
+
+from loguru import logger
+from pydantic import Field
+from tortoise import BaseDBAsyncClient, Tortoise, fields
+
+from src.core.base import Base, BaseRepo, BaseSchema
+from src.core.format import utc_iso_timestamp
+
+DEFAULT_OUTPUT = Path("media/bench/pk.json")
+
+
+class CharUUIDRow(Base):
+    # the previous Base primary key: random uuid4 as CHAR(36)
+    id: uuid.UUID = fields.UUIDField(primary_key=True, default=uuid.uuid4)
+    name: str = fields.CharField(max_length=64)
+    score: float = fields.FloatField()
+
+    class Meta:
+        app = "bench"
+        table = "bench_pk_char_uuid4"
+
+
+class BinaryUUIDRow(Base):
+    name: str = fields.CharField(max_length=64)
+    score: float = fields.FloatField()
+
+    class Meta:
+        app = "bench"
+        table = "bench_pk_binary_uuid7"
+
+
+class PkResult(BaseSchema):
+    key: Annotated[str, Field(...)]
+    rows: Annotated[int, Field(...)]
+    rows_per_second: Annotated[float, Field(...)]
+    data_mb: Annotated[float, Field(...)]
+    index_mb: Annotated[float, Field(...)]
+
+
+class PkReport(BaseSchema):
+    meta: Annotated[dict[str, Any], Field(default_factory=dict)]
+    results: Annotated[list[PkResult], Field(default_factory=list)]
+
+
+async def table_size(connection: BaseDBAsyncClient, table: str) -> tuple[int, int]:
+    """
+    (data bytes, index bytes) of a table. On MySQL the data is the clustered
+    primary key, on SQLite the rowid tree with the primary key counted as an index.
+    """
+    if connection.capabilities.dialect == "mysql":
+        await connection.execute_script(f"ANALYZE TABLE `{table}`")
+        rows = await connection.execute_query_dict(
+            "SELECT DATA_LENGTH AS data, INDEX_LENGTH AS indexes FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [table],
+        )
+        return int(rows[0]["data"]), int(rows[0]["indexes"])
+    rows = await connection.execute_query_dict(
+        "SELECT s.name AS name, m.type AS type, SUM(s.pgsize) AS size FROM dbstat s "
+        "JOIN sqlite_master m ON m.name = s.name WHERE m.tbl_name = ? GROUP BY s.name, m.type",
+        [table],
+    )
+    data = sum(row["size"] for row in rows if row["type"] == "table")
+    return data, sum(row["size"] for row in rows if row["type"] == "index")
+
+
+async def bench_pk(rows: int = 100_000, batch_size: int = 1_000) -> PkReport:
+    """
+    Insert `rows` rows keyed by CHAR(36) uuid4 and by BINARY(16) uuid7, then
+    compare insert throughput and on-disk table and index size.
+    Expects Tortoise initialised with this module under the `bench` app.
+    """
+    report = PkReport(meta={"rows": rows, "batch_size": batch_size})
+    for key, model in (("char36_uuid4", CharUUIDRow), ("binary16_uuid7", BinaryUUIDRow)):
+        repo = BaseRepo(model)
+        await repo.delete_by_filter()
+        objects = [model(name=f"row-{index}", score=index / 7) for index in range(rows)]
+
+        start = time.perf_counter()
+        await repo.bulk_create(objects, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        data, indexes = await table_size(model._meta.db, model._meta.db_table)
+        result = PkResult(
+            key=key,
+            rows=rows,
+            rows_per_second=round(rows / elapsed, 1),
+            data_mb=round(data / 2**20, 2),
+            index_mb=round(indexes / 2**20, 2),
+        )
+        logger.info(
+            f"bench|pk(): {key} {result.rows_per_second} rows/s data {result.data_mb}MB index {result.index_mb}MB"
+        )
+        report.results.append(result)
+    report.meta["finished_at"] = utc_iso_timestamp()
+    return report
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bench.pk",
+        description="Compare CHAR(36) uuid4 and BINARY(16) uuid7 primary keys: insert rate and index size.",
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--db-url", default="sqlite://:memory:", help="scratch database, the tables are emptied first")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    await Tortoise.init(db_url=args.db_url, modules={"bench": [__name__]})
+    try:
+        await Tortoise.generate_schemas(safe=True)
+        report = await bench_pk(rows=args.rows, batch_size=args.batch_size)
+    finally:
+        await Tortoise.close_connections()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(report.model_dump_json(indent=2))
+    logger.info(f"bench|pk(): report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(_parse_args())))
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Annotated, Any
+
+from loguru import logger
+from pydantic import Field
+from tortoise import Tortoise, fields
+
+from src.core.base import Base, BaseRepo, BaseSchema
+from src.core.format import utc_iso_timestamp
+from src.core.type import RowFormat
+
+DEFAULT_OUTPUT = Path("media/bench/projection.json")
+PROJECTED_FIELDS = ("id", "name", "score", "created_at")
+
+
+class ProjectionRow(Base):
+    name: str = fields.CharField(max_length=64)
+    tag: str = fields.CharField(max_length=32)
+    score: float = fields.FloatField()
+    count: int = fields.IntField()
+    active: bool = fields.BooleanField(default=True)
+    payload: dict = fields.JSONField(default=dict)
+
+    class Meta:
+        app = "bench"
+        table = "bench_projection_row"
+
+
+class ProjectionResult(BaseSchema):
+    path: Annotated[str, Field(...)]
+    rows: Annotated[int, Field(...)]
+    median_ms: Annotated[float, Field(...)]
+    us_per_row: Annotated[float, Field(...)]
+    peak_mb: Annotated[float, Field(...)]
+
+
+class ProjectionReport(BaseSchema):
+    meta: Annotated[dict[str, Any], Field(default_factory=dict)]
+    results: Annotated[list[ProjectionResult], Field(default_factory=list)]
+
+
+async def _measure(path: str, read: Callable[[], Awaitable[Any]], rows: int, repeats: int) -> ProjectionResult:
+    timings: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await read()
+        timings.append(time.perf_counter() - start)
+
+    # separate pass, tracing slows the read down
+    tracemalloc.start()
+    result = await read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    median = statistics.median(timings)
+    return ProjectionResult(
+        path=path,
+        rows=rows,
+        median_ms=round(median * 1000, 2),
+        us_per_row=round(median / rows * 1e6, 3),
+        peak_mb=round(peak / 2**20, 2),
+    )
+
+
+async def bench_projection(rows: int = 100_000, repeats: int = 3) -> ProjectionReport:
+    """
+    Read `rows` rows through the model path and each projection format.
+    Expects Tortoise initialised with this module under the `bench` app.
+    """
+    repo = BaseRepo(ProjectionRow)
+    await repo.delete_by_filter()
+    await repo.bulk_create(
+        [
+            ProjectionRow(
+                name=f"row-{index}", tag=f"tag-{index % 16}", score=index / 7, count=index, payload={"i": index}
+            )
+            for index in range(rows)
+        ],
+        batch_size=5_000,
+    )
+    logger.info(f"bench|projection(): {rows} rows inserted")
+
+    cases: dict[str, Callable[[], Awaitable[Any]]] = {
+        "model": lambda: repo.all(),
+        "model_only": lambda: ProjectionRow.all().only(*PROJECTED_FIELDS),
+        **{
+            f"project_{row_format}": lambda row_format=row_format: repo.project(
+                fields=PROJECTED_FIELDS, row_format=row_format
+            )
+            for row_format in (RowFormat.DICT, RowFormat.TUPLE, RowFormat.RECORD, RowFormat.COLUMNS)
+        },
+    }
+    report = ProjectionReport(meta={"rows": rows, "repeats": repeats, "fields": list(PROJECTED_FIELDS)})
+    for path, read in cases.items():
+        result = await _measure(path, read, rows, repeats)
+        logger.info(
+            f"bench|projection(): {path} {result.median_ms}ms ({result.us_per_row}us/row) peak {result.peak_mb}MB"
+        )
+        report.results.append(result)
+    report.meta["finished_at"] = utc_iso_timestamp()
+    return report
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bench.projection",
+        description="Compare model rows against projected records, tuples, dicts and columns.",
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--db-url", default="sqlite://:memory:", help="scratch database, the table is emptied first")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    await Tortoise.init(db_url=args.db_url, modules={"bench": [__name__]})
+    try:
+        await Tortoise.generate_schemas(safe=True)
+        report = await bench_projection(rows=args.rows, repeats=args.repeats)
+    finally:
+        await Tortoise.close_connections()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(report.model_dump_json(indent=2))
+    logger.info(f"bench|projection(): report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(_parse_args())))
@@ -1,14 +1,19 @@
 from collections.abc import AsyncGenerator
 
-import torch
-from diffusers import StableDiffusionPipeline
 from loguru import logger
 
+from src.core.base import EntityCache
 from src.core.config import settings
 from src.core.constant import IMAGE_PRETRAINED_MODEL
+from src.core.type import QueueBackend
 
 from .cache import CacheClient
 from .image import ImageClient
+from .memo import invalidate_tags, memoize
+from .nearcache import NearCache
+from .progress import ProgressBus, ProgressEvent, ProgressSubscription
+from .queue import JobQueue, MemoryJobQueue, RedisJobQueue
+from .ratelimit import RateLimiter
 
 
 async def get_cache_client(
@@ -17,6 +22,57 @@ async def get_cache_client(
         cache_url=settings.cache_url
     )
 
+def near_cache(
+) -> NearCache:
+    return NearCache(
+        cache_client=CacheClient(cache_url=settings.cache_url),
+        max_entries=settings.near_cache_max_entries,
+        ttl=settings.near_cache_ttl_seconds,
+        channel=settings.near_cache_channel,
+        enabled=settings.near_cache_enabled,
+    )
+
+def entity_cache(
+) -> EntityCache:
+    # opt-in per repo: BaseRepo(Model, cache=entity_cache())
+    return EntityCache(
+        store=near_cache(),
+        ttl=settings.db_entity_cache_ttl_seconds,
+        negative_ttl=settings.db_entity_cache_negative_ttl_seconds,
+    )
+
+async def get_near_cache(
+) -> AsyncGenerator[NearCache]:
+    yield near_cache()
+
+async def get_rate_limiter(
+) -> AsyncGenerator[RateLimiter]:
+    yield RateLimiter(
+        cache_client=CacheClient(cache_url=settings.cache_url)
+    )
+
+def job_queue(
+) -> JobQueue:
+    if settings.queue_backend == QueueBackend.REDIS:
+        return RedisJobQueue(
+            cache_client=CacheClient(cache_url=settings.cache_url),
+            stream=settings.queue_stream,
+            group=settings.queue_group,
+        )
+    return MemoryJobQueue()
+
+def progress_bus(
+) -> ProgressBus:
+    # progress crosses processes only when jobs do
+    return ProgressBus(
+        cache_client=(
+            CacheClient(cache_url=settings.cache_url) if settings.queue_backend == QueueBackend.REDIS else None
+        ),
+        prefix=settings.progress_channel_prefix,
+        buffer_size=settings.progress_buffer_size,
+        max_inflight=settings.progress_publish_max_inflight,
+    )
+
 async def get_image_client(
 ) -> AsyncGenerator[ImageClient]:
     yield ImageClient(
@@ -24,9 +80,7 @@ async def get_image_client(
     )
 
 async def init_hf_model()->None:
-    logger.debug("init_hf_model(): StableDiffusionPipeline loading")
-    StableDiffusionPipeline.from_pretrained(
-        pretrained_model_name_or_path=IMAGE_PRETRAINED_MODEL,
-        torch_dtype=torch.float32
-    ).to("cpu")
+    # load into the client singleton, so the first request does not pay for it and readiness can report it
+    logger.debug(f"init_hf_model(): StableDiffusionPipeline loading {IMAGE_PRETRAINED_MODEL}")
+    ImageClient()
     logger.debug("init_hf_model(): StableDiffusionPipeline loaded")
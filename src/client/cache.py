@@ -1,23 +1,96 @@
+import time
+from collections.abc import Iterable, Mapping
 from typing import Annotated, Any
 
 import redis.asyncio as redis
 from pydantic import Field, RedisDsn
+from redis.asyncio.client import Pipeline, PubSub
+from redis.client import NEVER_DECODE
+from redis.commands.core import AsyncScript
 
+from src.core.config import settings
 from src.core.factory import SingletonMeta
 from src.core.format import serialize
+from src.core.metric import registry
+
+from .serializer import Serializer, build_serializer
+
+CACHE_POOL_CONNECTIONS = registry.gauge(
+    "cache_pool_connections",
+    "Cache pool connections by state",
+    labelnames=("state",),
+)
+CACHE_POOL_WAITERS = registry.gauge(
+    "cache_pool_waiters",
+    "Tasks waiting for a free cache connection",
+)
+CACHE_POOL_WAIT_SECONDS = registry.histogram(
+    "cache_pool_wait_seconds",
+    "Time to check a connection out of the cache pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class _MeteredPool(redis.BlockingConnectionPool):
+    """
+    Blocking pool (waits up to `timeout` for a free connection instead of failing)
+    that reports checkout waits.
+    """
+
+    async def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        CACHE_POOL_WAITERS.inc()
+        start = time.perf_counter()
+        try:
+            return await super().get_connection()
+        finally:
+            CACHE_POOL_WAITERS.dec()
+            CACHE_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use_connections)
+
+    @property
+    def idle(self) -> int:
+        return len(self._available_connections)
 
 
 class CacheClient(metaclass=SingletonMeta):
+    """
+    Text API (str in, str out) and binary API (values through `Serializer`, bytes
+    on the wire) over one connection pool. Binary reads skip response decoding per
+    command, so both share connections; a key belongs to one API or the other.
+    """
+
     _initialized: Annotated[bool, Field(default=False)] = False
     _cache: Annotated[redis.Redis, Field(...)]
 
-    def __init__(self, cache_url: Annotated[RedisDsn, Field(...)]) -> None:
+    def __init__(
+        self,
+        cache_url: Annotated[RedisDsn, Field(...)],
+        serializer: Serializer | None = None,
+    ) -> None:
         if self._initialized:
             return
-        self._cache = redis.from_url(
+        self._pool = _MeteredPool.from_url(
             serialize(cache_url),
-            decode_responses=True
+            decode_responses=True,
+            max_connections=settings.cache_pool_max_connections,
+            timeout=settings.cache_pool_timeout_seconds,
+            socket_timeout=settings.cache_socket_timeout_seconds,
+            socket_connect_timeout=settings.cache_socket_connect_timeout_seconds,
+            health_check_interval=settings.cache_health_check_interval_seconds,
+        )
+        self._cache = redis.Redis.from_pool(self._pool)
+        self._serializer = serializer or build_serializer(
+            settings.cache_serializer,
+            compress_threshold=settings.cache_compress_threshold_bytes,
+            compress_level=settings.cache_compress_level,
         )
+        self._scripts: dict[str, AsyncScript] = {}
+
+        CACHE_POOL_CONNECTIONS.set_function(lambda: self._pool.in_use, state="in_use")
+        CACHE_POOL_CONNECTIONS.set_function(lambda: self._pool.idle, state="idle")
         self._initialized = True
 
     @property
@@ -50,8 +123,95 @@ class CacheClient(metaclass=SingletonMeta):
         else:
             await self._cache.set(key, value)
 
-    async def delete(self, key: str) -> None:
-        await self._cache.delete(key)
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._cache.delete(*keys)
+
+    async def set_if_absent(self, key: str, value: str, ttl_ms: int) -> bool:
+        """
+        SET NX PX, e.g. for short locks.
+        """
+        return bool(await self._cache.set(key, value, nx=True, px=ttl_ms))
+
+    async def sadd(self, key: str, *members: str, ttl: int | None = None) -> None:
+        async with self._cache.pipeline(transaction=False) as pipe:
+            pipe.sadd(key, *members)
+            if ttl:
+                pipe.expire(key, ttl, gt=True)
+                pipe.expire(key, ttl, nx=True)
+            await pipe.execute()
+
+    async def smembers(self, key: str) -> list[str]:
+        return list(await self._cache.smembers(key))
+
+    async def get_with_ttl(self, key: str, binary: bool = False) -> tuple[Any, int]:
+        """
+        Value and remaining ttl in ms in one round trip (ttl -1: no expiry, -2: missing).
+        """
+        async with self._cache.pipeline(transaction=False) as pipe:
+            if binary:
+                pipe.execute_command("GET", key, **{NEVER_DECODE: True})
+            else:
+                pipe.get(key)
+            pipe.pttl(key)
+            value, ttl = await pipe.execute()
+        if binary and value is not None:
+            value = self._serializer.loads(value)
+        return value, ttl
+
+    async def mget(self, keys: Iterable[str]) -> list[str | None]:
+        keys = list(keys)
+        if not keys:
+            return []
+        return await self._cache.mget(keys)
+
+    async def mset(self, mapping: Mapping[str, str], ttl: int | None = None) -> None:
+        """
+        Set many keys in one round trip; with a ttl, one SET EX per key in a pipeline.
+        """
+        if not mapping:
+            return
+        if not ttl:
+            await self._cache.mset(dict(mapping))
+            return
+        async with self._cache.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ttl)
+            await pipe.execute()
+
+    # binary
+    async def get_binary(self, key: str, serializer: Serializer | None = None) -> Any:
+        data = await self._cache.execute_command("GET", key, **{NEVER_DECODE: True})
+        return None if data is None else (serializer or self._serializer).loads(data)
+
+    async def set_binary(
+        self, key: str, value: Any, ttl: int | None = None, serializer: Serializer | None = None
+    ) -> None:
+        await self._cache.set(key, (serializer or self._serializer).dumps(value), ex=ttl or None)
+
+    async def mget_binary(self, keys: Iterable[str], serializer: Serializer | None = None) -> list[Any]:
+        keys = list(keys)
+        if not keys:
+            return []
+        serializer = serializer or self._serializer
+        values = await self._cache.execute_command("MGET", *keys, **{NEVER_DECODE: True})
+        return [None if data is None else serializer.loads(data) for data in values]
+
+    async def mset_binary(
+        self, mapping: Mapping[str, Any], ttl: int | None = None, serializer: Serializer | None = None
+    ) -> None:
+        serializer = serializer or self._serializer
+        await self.mset({key: serializer.dumps(value) for key, value in mapping.items()}, ttl=ttl)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        """
+        Batch commands into one round trip: `async with cache.pipeline() as pipe: ...; await pipe.execute()`.
+        Binary replies need `NEVER_DECODE` on the queued command.
+        """
+        return self._cache.pipeline(transaction=transaction)
+
+    async def incrbyfloat(self, key: str, amount: float) -> float:
+        return float(await self._cache.incrbyfloat(key, amount))
 
     async def exists(self, key: str) -> bool:
         return await self._cache.exists(key) > 0
@@ -59,5 +219,65 @@ class CacheClient(metaclass=SingletonMeta):
     async def expire(self, key: str, ttl: int) -> None:
         await self._cache.expire(key, ttl)
 
+    # streams
+    async def xadd(self, stream: str, fields: dict[str, str], max_len: int | None = None) -> str:
+        return await self._cache.xadd(stream, fields, maxlen=max_len, approximate=True)
+
+    async def xlen(self, stream: str) -> int:
+        return await self._cache.xlen(stream)
+
+    async def xgroup_create(self, stream: str, group: str) -> None:
+        """
+        Create the consumer group (and the stream) if missing.
+        """
+        try:
+            await self._cache.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    async def xreadgroup(
+        self, stream: str, group: str, consumer: str, count: int = 1, block_ms: int | None = None
+    ) -> list[tuple[str, dict[str, str]]]:
+        """
+        New entries for this consumer, [(entry_id, fields)].
+        """
+        reply = await self._cache.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block_ms)
+        return [entry for _, entries in reply or [] for entry in entries]
+
+    async def xautoclaim(
+        self, stream: str, group: str, consumer: str, min_idle_ms: int, count: int = 10
+    ) -> list[tuple[str, dict[str, str]]]:
+        """
+        Take over entries pending longer than min_idle_ms on other consumers, [(entry_id, fields)].
+        """
+        reply = await self._cache.xautoclaim(stream, group, consumer, min_idle_time=min_idle_ms, count=count)
+        # reply: [next_start_id, claimed entries, deleted ids (redis >= 7)]
+        return [entry for entry in reply[1] if entry[1] is not None]
+
+    async def xack(self, stream: str, group: str, *entry_ids: str) -> int:
+        """
+        Ack and delete entries; returns how many were still pending.
+        """
+        acked = await self._cache.xack(stream, group, *entry_ids)
+        await self._cache.xdel(stream, *entry_ids)
+        return acked
+
+    # pub/sub
+    async def publish(self, channel: str, message: str) -> int:
+        return await self._cache.publish(channel, message)
+
+    def pubsub(self) -> PubSub:
+        return self._cache.pubsub()
+
+    async def run_script(self, source: str, keys: list[str], args: list[Any]) -> Any:
+        """
+        Run a Lua script atomically; registered once, then called by sha (EVALSHA).
+        """
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self._cache.register_script(source)
+        return await script(keys=keys, args=args)
+
     async def close(self) -> None:
-        await self._cache.close()
+        await self._cache.aclose()
@@ -0,0 +1,113 @@
+import functools
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import torch
+from diffusers import SchedulerMixin
+
+_STEP_ARGUMENTS = ("model_output", "timestep", "sample")
+
+
+def estimate_original_sample(
+    scheduler: SchedulerMixin, model_output: torch.Tensor, timestep: Any, sample: torch.Tensor
+) -> torch.Tensor:
+    """
+    x0 from the model output at `timestep`, for schedulers whose step() does not
+    return pred_original_sample (PNDM, the SD 1.5 default):
+        epsilon: x0 = (x_t - sqrt(1 - a_t) * eps) / sqrt(a_t)
+        v_prediction: x0 = sqrt(a_t) * x_t - sqrt(1 - a_t) * v
+    with a_t = alphas_cumprod[t].
+    """
+    prediction_type = scheduler.config.get("prediction_type", "epsilon")
+    if prediction_type == "sample":
+        return model_output
+    alpha_prod = scheduler.alphas_cumprod[int(timestep)].to(device=sample.device, dtype=torch.float32)
+    sample, model_output = sample.float(), model_output.float()
+    if prediction_type == "v_prediction":
+        return alpha_prod.sqrt() * sample - (1 - alpha_prod).sqrt() * model_output
+    return (sample - (1 - alpha_prod).sqrt() * model_output) / alpha_prod.sqrt()
+
+
+class ConvergenceTracker:
+    """
+    Tracks the relative change of the latents between denoising steps:
+        ||latents_t - latents_{t-1}|| / ||latents_{t-1}||
+    and reports convergence once it stays below `threshold` for `patience`
+    consecutive steps (never before `min_steps`, never on the last step).
+    """
+
+    def __init__(self, total_steps: int, threshold: float, min_steps: int = 8, patience: int = 2) -> None:
+        self.total_steps = total_steps
+        self.threshold = threshold
+        self.min_steps = min_steps
+        self.patience = patience
+        self.executed: int = 0
+        self.change: float | None = None
+        self.converged: bool = False
+        self._hits: int = 0
+        self._previous: torch.Tensor | None = None
+        # x0 estimate of the last scheduler step
+        self.pred_original_sample: torch.Tensor | None = None
+
+    def update(self, latents: torch.Tensor) -> bool:
+        self.executed += 1
+        current = latents.detach().float()
+
+        if self._previous is not None:
+            norm = self._previous.norm().clamp_min(1e-8)
+            self.change = float((current - self._previous).norm() / norm)
+            self._hits = self._hits + 1 if self.change < self.threshold else 0
+
+        self._previous = current.clone()
+        self.converged = (
+            self.executed >= self.min_steps
+            and self.executed < self.total_steps
+            and self._hits >= self.patience
+        )
+        return self.converged
+
+    @staticmethod
+    def supports(scheduler: SchedulerMixin) -> bool:
+        """
+        Whether an x0 estimate is available on every step: from step() itself, or
+        computed from alphas_cumprod. Without one an early stop would decode noisy latents.
+        """
+        return hasattr(scheduler, "alphas_cumprod") and scheduler.config.get("prediction_type", "epsilon") in (
+            "epsilon",
+            "v_prediction",
+            "sample",
+        )
+
+    @contextmanager
+    def watch(self, scheduler: SchedulerMixin) -> Iterator[None]:
+        """
+        Capture the x0 estimate of every scheduler.step for the duration of one
+        generation, so a converged run can jump straight to it. Taken from the
+        step output when the scheduler returns one, computed otherwise.
+        Raises:
+            ValueError: The scheduler offers no x0 estimate (see supports())
+        """
+        if not self.supports(scheduler):
+            raise ValueError(f"Adaptive mode is not supported with {type(scheduler).__name__}")
+        step = scheduler.step
+
+        @functools.wraps(step)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            output = step(*args, **kwargs)
+            if isinstance(output, tuple):
+                pred_original_sample = output[1] if len(output) > 1 else None
+            else:
+                pred_original_sample = getattr(output, "pred_original_sample", None)
+            if pred_original_sample is None:
+                arguments = dict(zip(_STEP_ARGUMENTS, args, strict=False))
+                arguments.update({name: kwargs[name] for name in _STEP_ARGUMENTS if name in kwargs})
+                pred_original_sample = estimate_original_sample(scheduler, **arguments)
+            self.pred_original_sample = pred_original_sample
+            return output
+
+        scheduler.step = wrapper
+        try:
+            yield
+        finally:
+            scheduler.step = step
@@ -0,0 +1,108 @@
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import torch
+from diffusers import UNet2DConditionModel
+
+from src.core.metric import registry
+
+IMAGE_DEEPCACHE_STEPS = registry.counter(
+    "image_deepcache_steps_total",
+    "UNet steps run in full or from the DeepCache feature cache",
+    labelnames=("kind",),
+)
+
+
+class DeepCache:
+    """
+    DeepCache-style feature reuse across adjacent denoising steps.
+    High-level UNet features barely change between steps, so on a full step the
+    output of the deep branch (down_blocks[1:], mid_block, up_blocks[:-1]) is cached,
+    and on the following `interval - 1` steps only the shallow branch (conv_in,
+    down_blocks[0], up_blocks[-1], conv_out) runs on top of the cached feature.
+    Block forwards are patched in place; with no open session they run as usual.
+    """
+
+    def __init__(self, unet: UNet2DConditionModel) -> None:
+        if len(unet.down_blocks) < 2 or len(unet.up_blocks) < 2 or unet.mid_block is None:
+            raise ValueError("DeepCache needs a UNet with at least two down/up blocks and a mid block")
+
+        self._interval: int = 0
+        self._step: int = 0
+        self._skip: bool = False
+        self._cache: torch.Tensor | None = None
+
+        for block in unet.down_blocks[1:]:
+            block.forward = self._wrap_down(block, block.forward)
+        unet.mid_block.forward = self._wrap_passthrough(unet.mid_block.forward)
+        for block in unet.up_blocks[:-2]:
+            block.forward = self._wrap_passthrough(block.forward)
+        cache_block = unet.up_blocks[-2]
+        cache_block.forward = self._wrap_cache(cache_block.forward)
+
+        unet.register_forward_pre_hook(self._on_unet_pre_forward)
+
+    @property
+    def active(self) -> bool:
+        return self._interval > 1
+
+    @contextmanager
+    def session(self, interval: int) -> Iterator[None]:
+        """
+        Enable caching for one generation; the cache is refreshed every `interval` steps.
+        interval <= 1 disables caching.
+        """
+        self._interval = interval
+        self._step = 0
+        self._cache = None
+        try:
+            yield
+        finally:
+            self._interval = 0
+            self._skip = False
+            self._cache = None
+
+    def _on_unet_pre_forward(self, *args: Any) -> None:
+        if not self.active:
+            self._skip = False
+            return
+
+        self._skip = self._cache is not None and self._step % self._interval != 0
+        self._step += 1
+        IMAGE_DEEPCACHE_STEPS.inc(kind="cached" if self._skip else "full")
+
+    @staticmethod
+    def _res_count(block: torch.nn.Module) -> int:
+        downsamplers = getattr(block, "downsamplers", None)
+        return len(block.resnets) + (len(downsamplers) if downsamplers else 0)
+
+    def _wrap_down(self, block: torch.nn.Module, forward: Callable[..., Any]) -> Callable[..., Any]:
+        res_count = self._res_count(block)
+
+        def wrapper(hidden_states: torch.Tensor, *args: Any, **kwargs: Any) -> Any:
+            if self._skip:
+                # placeholders, only consumed by up blocks that are skipped as well
+                return hidden_states, (hidden_states,) * res_count
+            return forward(hidden_states, *args, **kwargs)
+
+        return wrapper
+
+    def _wrap_passthrough(self, forward: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(hidden_states: torch.Tensor, *args: Any, **kwargs: Any) -> Any:
+            if self._skip:
+                return hidden_states
+            return forward(hidden_states, *args, **kwargs)
+
+        return wrapper
+
+    def _wrap_cache(self, forward: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(hidden_states: torch.Tensor, *args: Any, **kwargs: Any) -> Any:
+            if self._skip and self._cache is not None:
+                return self._cache
+            output = forward(hidden_states, *args, **kwargs)
+            if self.active:
+                self._cache = output
+            return output
+
+        return wrapper
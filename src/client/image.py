@@ -1,5 +1,9 @@
 import asyncio
+import io
+import threading
 import uuid
+from collections.abc import Callable
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Any
 
@@ -8,31 +12,63 @@ from diffusers import StableDiffusionPipeline
 from diffusers.utils import logging
 from loguru import logger
 
+from src.core.config import settings
 from src.core.constant import IMAGE_PRETRAINED_MODEL
 from src.core.factory import SingletonMeta
+from src.core.type import SafetyMode
+from src.data.schema.image import ImageResultSchema, ImageTimingSchema
+
+from .convergence import ConvergenceTracker
+from .deepcache import DeepCache
+from .safety import SafetyStage
+from .timing import STAGE_DISK_WRITE, STAGE_IMAGE_ENCODE, StageTimer
+from .tome import TokenMerging
 
 
 class ImageClient(metaclass=SingletonMeta):
     _initialized: bool = False
     _pipline: StableDiffusionPipeline
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        pipeline: StableDiffusionPipeline | None = None,
+        image_dir: Path | None = None,
+    ) -> None:
         if self._initialized:
             return
 
         logger.debug(f"{self._tag}|__init__():")
 
-        self._dir: Path = Path("media/image")
+        self._dir: Path = image_dir or Path("media/image")
         self._dir.mkdir(parents=True, exist_ok=True)
 
         logging.set_verbosity_info()
 
-        logger.debug(f"{self._tag}|__init__(): StableDiffusionPipeline: loading {IMAGE_PRETRAINED_MODEL}")
-        self._pipline = StableDiffusionPipeline.from_pretrained(
-            pretrained_model_name_or_path=IMAGE_PRETRAINED_MODEL,
-            torch_dtype=torch.float32
-        ).to("cpu")
-        logger.debug(f"{self._tag}|__init__(): StableDiffusionPipeline: loaded {IMAGE_PRETRAINED_MODEL}")
+        if pipeline is not None:
+            # injected pipeline (e.g. the tiny offline pipeline used by the benchmark suite)
+            logger.debug(f"{self._tag}|__init__(): StableDiffusionPipeline: injected")
+            self._pipline = pipeline
+        else:
+            logger.debug(f"{self._tag}|__init__(): StableDiffusionPipeline: loading {IMAGE_PRETRAINED_MODEL}")
+            self._pipline = StableDiffusionPipeline.from_pretrained(
+                pretrained_model_name_or_path=IMAGE_PRETRAINED_MODEL,
+                torch_dtype=torch.float32
+            ).to("cpu")
+            logger.debug(f"{self._tag}|__init__(): StableDiffusionPipeline: loaded {IMAGE_PRETRAINED_MODEL}")
+
+        self._safety = SafetyStage(
+            self._pipline,
+            quarantine_dir=self._dir.parent / "quarantine",
+            batch_size=settings.image_safety_batch_size,
+            batch_wait_ms=settings.image_safety_batch_wait_ms,
+            workers=settings.image_safety_workers,
+        )
+        self._timer = StageTimer()
+        self._timer.attach(self._pipline)
+        self._deepcache = DeepCache(self._pipline.unet)
+        self._tome = TokenMerging(self._pipline.unet, levels=settings.image_tome_levels)
+        # the pipeline keeps per-call state (scheduler timesteps, interrupt flag), so one generation at a time
+        self._lock = threading.Lock()
 
         # logger.debug(f"{self._tag}|__init__(): loading StableDiffusionPipeline")
         # self._pipline = StableDiffusionPipeline.from_pretrained(
@@ -46,6 +82,14 @@ class ImageClient(metaclass=SingletonMeta):
 
         self._initialized = True
 
+    @classmethod
+    def loaded(cls) -> bool:
+        """
+        Whether the pipeline of this process is loaded, without loading it.
+        """
+        instance = SingletonMeta._instances.get(cls)
+        return instance is not None and instance._initialized
+
     @property
     def _tag(self) -> str:
         return self.__class__.__name__
@@ -56,46 +100,182 @@ class ImageClient(metaclass=SingletonMeta):
         pipeline: "StableDiffusionPipeline",
         step_idx: int,
         timestep: int,
-        callback_kwargs: dict[str, Any]
+        callback_kwargs: dict[str, Any],
+        convergence: ConvergenceTracker | None = None,
+        on_step: Callable[[int, int], None] | None = None,
     ) -> dict[str, Any]:
         # Clamp step index
         current_step = min(step_idx + 1, total_steps)
         pct: float = current_step / total_steps * 100
         logger.info(f"{self._tag}|Step {current_step}/{total_steps} ({pct:.1f}%) timestep={timestep}")
 
+        # progress listeners must never break the generation
+        if on_step is not None:
+            try:
+                on_step(current_step, total_steps)
+            except Exception as error:
+                logger.warning(f"{self._tag}|_on_step_end(): on_step failed: {error}")
+
         # Optionally handle latents
         latents = callback_kwargs.get("latents")
         if latents is not None:
             logger.debug(f"{self._tag}|Latents shape: {tuple(latents.shape)}")
 
+        # Adaptive mode: stop once the latents stop moving and jump to the x0 estimate
+        if convergence is not None and latents is not None and convergence.update(latents):
+            logger.info(
+                f"{self._tag}|Converged at step {current_step}/{total_steps} "
+                f"change={convergence.change:.5f} threshold={convergence.threshold}"
+            )
+            if convergence.pred_original_sample is not None:
+                callback_kwargs["latents"] = convergence.pred_original_sample.to(latents.dtype)
+            pipeline._interrupt = True
+
         return callback_kwargs
 
-    def _generate_blocking(self, prompt: str, steps: int, width: int, height: int) -> str:
-        logger.debug(f"{self._tag}|_generate_blocking(): prompt={prompt}")
-
-        result = self._pipline(
-            prompt=prompt,
-            negative_prompt="",
-            num_inference_steps=steps,
-            width=width,
-            height=height,
-            callback_on_step_end=lambda *args, **kwargs: self._on_step_end(steps, *args, **kwargs),
-            callback_on_step_end_tensor_inputs=["latents"],
+    @property
+    def pipeline(self) -> StableDiffusionPipeline:
+        return self._pipline
+
+    def _generate_blocking(
+        self,
+        prompt: str,
+        steps: int,
+        width: int,
+        height: int,
+        num_images: int = 1,
+        safety_mode: SafetyMode = SafetyMode.INLINE,
+        adaptive_threshold: float | None = None,
+        deepcache_interval: int = 0,
+        tome_ratio: float = 0.0,
+        seed: int | None = None,
+        on_step: Callable[[int, int], None] | None = None,
+        on_verdict: Callable[[str, bool | None], None] | None = None,
+    ) -> ImageResultSchema:
+        logger.debug(
+            f"{self._tag}|_generate_blocking(): prompt={prompt} num_images={num_images} safety={safety_mode} "
+            f"adaptive_threshold={adaptive_threshold} deepcache_interval={deepcache_interval} "
+            f"tome_ratio={tome_ratio} seed={seed}"
         )
 
-        img = result.images[0]
+        generator = torch.Generator(device="cpu").manual_seed(seed) if seed is not None else None
 
-        file_path = f"{self._dir}/{uuid.uuid4()}.png"
-        img.save(file_path)
-        # imageio.imwrite(file_path, img)
+        convergence: ConvergenceTracker | None = None
+        if adaptive_threshold:
+            convergence = ConvergenceTracker(
+                total_steps=steps,
+                threshold=adaptive_threshold,
+                min_steps=settings.image_adaptive_min_steps,
+                patience=settings.image_adaptive_patience,
+            )
 
-        return file_path
+        with self._timer.track() as record, self._safety.mode(safety_mode):
+            with (
+                self._lock,
+                self._deepcache.session(deepcache_interval),
+                self._tome.session(tome_ratio),
+                convergence.watch(self._pipline.scheduler) if convergence else nullcontext(),
+            ):
+                result = self._pipline(
+                    prompt=prompt,
+                    negative_prompt="",
+                    num_inference_steps=steps,
+                    width=width,
+                    height=height,
+                    num_images_per_prompt=num_images,
+                    generator=generator,
+                    callback_on_step_end=lambda *args, **kwargs: self._on_step_end(
+                        steps, *args, convergence=convergence, on_step=on_step, **kwargs
+                    ),
+                    callback_on_step_end_tensor_inputs=["latents"],
+                )
+
+            file_paths: list[str] = []
+            for img in result.images:
+                # encode and write separately so each shows up in the stage timing
+                with self._timer.stage(STAGE_IMAGE_ENCODE):
+                    buffer = io.BytesIO()
+                    img.save(buffer, format="PNG")
+                    # imageio.imwrite(buffer, img)
+
+                file_path = f"{self._dir}/{uuid.uuid4()}.png"
+                with self._timer.stage(STAGE_DISK_WRITE):
+                    Path(file_path).write_bytes(buffer.getbuffer())
+                file_paths.append(file_path)
+
+                if safety_mode == SafetyMode.DEFERRED:
+                    self._safety.submit(file_path, img, on_verdict=on_verdict)
+
+        return ImageResultSchema(
+            outputs=file_paths,
+            timing=ImageTimingSchema.from_record(record),
+            safety=safety_mode,
+            nsfw=result.nsfw_content_detected,
+            steps=steps,
+            steps_executed=convergence.executed if convergence else steps,
+        )
 
     async def run(
-        self, prompt: str, steps: int, width: int, height: int
-    ) -> str:
+        self,
+        prompt: str,
+        steps: int,
+        width: int,
+        height: int,
+        safety_mode: SafetyMode = SafetyMode.INLINE,
+        adaptive_threshold: float | None = None,
+        deepcache_interval: int = 0,
+        tome_ratio: float = 0.0,
+        seed: int | None = None,
+        on_step: Callable[[int, int], None] | None = None,
+        on_verdict: Callable[[str, bool | None], None] | None = None,
+    ) -> ImageResultSchema:
         logger.debug(f"{self._tag}|run(): prompt={prompt}")
 
-        file_path = await asyncio.to_thread(self._generate_blocking, prompt, steps, width, height)
+        return await asyncio.to_thread(
+            self._generate_blocking,
+            prompt,
+            steps,
+            width,
+            height,
+            num_images=1,
+            safety_mode=safety_mode,
+            adaptive_threshold=adaptive_threshold,
+            deepcache_interval=deepcache_interval,
+            tome_ratio=tome_ratio,
+            seed=seed,
+            on_step=on_step,
+            on_verdict=on_verdict,
+        )
 
-        return file_path
+    async def run_batch(
+        self,
+        prompt: str,
+        steps: int,
+        width: int,
+        height: int,
+        num_images: int,
+        safety_mode: SafetyMode = SafetyMode.INLINE,
+        adaptive_threshold: float | None = None,
+        deepcache_interval: int = 0,
+        tome_ratio: float = 0.0,
+        seed: int | None = None,
+        on_step: Callable[[int, int], None] | None = None,
+        on_verdict: Callable[[str, bool | None], None] | None = None,
+    ) -> ImageResultSchema:
+        logger.debug(f"{self._tag}|run_batch(): prompt={prompt} num_images={num_images}")
+
+        return await asyncio.to_thread(
+            self._generate_blocking,
+            prompt,
+            steps,
+            width,
+            height,
+            num_images=num_images,
+            safety_mode=safety_mode,
+            adaptive_threshold=adaptive_threshold,
+            deepcache_interval=deepcache_interval,
+            tome_ratio=tome_ratio,
+            seed=seed,
+            on_step=on_step,
+            on_verdict=on_verdict,
+        )
@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import inspect
+import math
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import suppress
+from typing import Any, ParamSpec, TypeVar, get_type_hints
+
+from loguru import logger
+from pydantic import TypeAdapter
+
+from src.core.common import compute_checksum
+from src.core.config import settings
+from src.core.format import serialize
+from src.core.metric import registry
+
+from .cache import CacheClient
+
+MEMO_REQUESTS = registry.counter(
+    "memo_requests_total",
+    "Memoized service calls by outcome",
+    labelnames=("name", "result"),
+)
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+_PREFIX = "memo"
+# compare-and-delete, so a lock that expired and was taken by another caller is not released
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _tag_key(tag: str) -> str:
+    return f"{_PREFIX}:tag:{tag}"
+
+
+def _cache_of(service: Any) -> CacheClient:
+    cache_client = getattr(service, "_cache_client", None)
+    return cache_client if isinstance(cache_client, CacheClient) else CacheClient(cache_url=settings.cache_url)
+
+
+async def invalidate_tags(*tags: str, cache_client: CacheClient | None = None) -> int:
+    """
+    Drop every memoized entry stored under any of `tags`.
+    Returns:
+        Number of entries dropped
+    """
+    cache_client = cache_client or CacheClient(cache_url=settings.cache_url)
+    keys: set[str] = set()
+    for tag in tags:
+        keys.update(await cache_client.smembers(_tag_key(tag)))
+    await cache_client.delete(*keys, *(_tag_key(tag) for tag in tags))
+    return len(keys)
+
+
+def _recompute_early(entry: dict[str, Any], beta: float) -> bool:
+    if beta <= 0:
+        return False
+    return time.time() - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["expires_at"]
+
+
+def memoize(
+    ttl: int,
+    tags: Sequence[str] = (),
+    name: str | None = None,
+    beta: float = 1.0,
+    lock_ms: int = 5_000,
+) -> Callable[[Callable[_P, Awaitable[_R]]], Callable[_P, Awaitable[_R]]]:
+    """
+    Cache-aside memoization for async service methods.
+    The key is the method name plus a checksum of the serialized arguments (self
+    excluded); results are stored serialized and validated back into the return
+    annotation. Hot keys are recomputed before they expire with probability
+    growing as expiry nears (XFetch: compute time x beta x -log(rand)), and a
+    short lock lets one caller recompute while the others keep the current value;
+    a cold miss waits for the lock holder up to `lock_ms`. Tags may reference
+    arguments (`"image:{job_id}"`), see `invalidate_tags`. Cache errors fall back
+    to calling the method.
+    Args:
+        ttl: Entry lifetime in seconds
+        tags: Tag templates formatted with the call arguments
+        name: Key namespace, `Class.method` by default
+        beta: Early recompute eagerness, 0 disables it
+        lock_ms: Recompute lock lifetime and max wait on a cold miss
+    """
+
+    def decorator(method: Callable[_P, Awaitable[_R]]) -> Callable[_P, Awaitable[_R]]:
+        signature = inspect.signature(method)
+        namespace = name or method.__qualname__
+        adapter: TypeAdapter | None = None
+
+        def _adapter() -> TypeAdapter:
+            nonlocal adapter
+            if adapter is None:
+                adapter = TypeAdapter(get_type_hints(method).get("return", Any))
+            return adapter
+
+        async def _compute(cache_client: CacheClient, key: str, arguments: dict[str, Any], *args, **kwargs) -> _R:
+            start = time.perf_counter()
+            result = await method(*args, **kwargs)
+            delta = time.perf_counter() - start
+            try:
+                entry = {"value": serialize(result), "delta": delta, "expires_at": time.time() + ttl}
+                await cache_client.set_binary(key, entry, ttl=ttl)
+                for tag in tags:
+                    await cache_client.sadd(_tag_key(tag.format(**arguments)), key, ttl=ttl)
+            except Exception as error:
+                logger.warning(f"memoize|{namespace}: store failed {error}")
+            return result
+
+        @functools.wraps(method)
+        async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            service = arguments.pop(next(iter(signature.parameters)), None)
+            cache_client = _cache_of(service)
+            key = f"{_PREFIX}:{namespace}:{compute_checksum(serialize(arguments))}"
+
+            try:
+                entry = await cache_client.get_binary(key)
+            except Exception as error:
+                logger.warning(f"memoize|{namespace}: cache unavailable {error}")
+                MEMO_REQUESTS.inc(name=namespace, result="bypass")
+                return await method(*args, **kwargs)
+
+            if entry is not None and not _recompute_early(entry, beta):
+                MEMO_REQUESTS.inc(name=namespace, result="hit")
+                return _adapter().validate_python(entry["value"])
+
+            token = uuid.uuid4().hex
+            lock_key = f"{key}:lock"
+            try:
+                locked = await cache_client.set_if_absent(lock_key, token, ttl_ms=lock_ms)
+            except Exception:
+                locked = False
+            if locked:
+                MEMO_REQUESTS.inc(name=namespace, result="early" if entry is not None else "miss")
+                try:
+                    return await _compute(cache_client, key, arguments, *args, **kwargs)
+                finally:
+                    try:
+                        await cache_client.run_script(_RELEASE, keys=[lock_key], args=[token])
+                    except Exception as error:
+                        logger.warning(f"memoize|{namespace}: lock release failed {error}")
+
+            if entry is not None:
+                # someone else is already refreshing it
+                MEMO_REQUESTS.inc(name=namespace, result="hit")
+                return _adapter().validate_python(entry["value"])
+
+            deadline = time.monotonic() + lock_ms / 1000
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                with suppress(Exception):
+                    entry = await cache_client.get_binary(key)
+                if entry is not None:
+                    MEMO_REQUESTS.inc(name=namespace, result="wait")
+                    return _adapter().validate_python(entry["value"])
+            MEMO_REQUESTS.inc(name=namespace, result="miss")
+            return await _compute(cache_client, key, arguments, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any
+
+from loguru import logger
+from redis.asyncio.client import PubSub
+
+from src.core.factory import SingletonMeta
+from src.core.metric import registry
+
+from .cache import CacheClient
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "Two-tier cache lookups per tier",
+    labelnames=("tier", "result"),
+)
+CACHE_HIT_RATIO = registry.gauge(
+    "cache_hit_ratio",
+    "Hit ratio per cache tier since start",
+    labelnames=("tier",),
+)
+CACHE_LOCAL_ENTRIES = registry.gauge(
+    "cache_local_entries",
+    "Entries in the in-process cache tier",
+)
+
+_TIERS = ("local", "remote")
+
+
+def _hit_ratio(tier: str) -> float:
+    hits = CACHE_REQUESTS.value(tier=tier, result="hit")
+    total = hits + CACHE_REQUESTS.value(tier=tier, result="miss")
+    return hits / total if total else 0.0
+
+
+class NearCache(metaclass=SingletonMeta):
+    """
+    Bounded in-process LRU in front of the cache.
+    Local entries live at most `ttl` seconds and never outlive the cache key.
+    Writes and deletes through this class broadcast the key on `channel`, and
+    every replica drops its local copy. Invalidations sent while a replica's
+    listener is disconnected are lost, so the whole local tier is cleared each
+    time the listener (re)subscribes, including redis-py's silent reconnects.
+    Keys written around this class (CacheClient directly) are only bounded by `ttl`.
+    """
+
+    _initialized: bool = False
+
+    def __init__(
+        self,
+        cache_client: CacheClient,
+        max_entries: int = 10_000,
+        ttl: float = 30.0,
+        channel: str = "cache:invalidate",
+        enabled: bool = True,
+    ) -> None:
+        if self._initialized:
+            return
+
+        self._cache_client = cache_client
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._channel = channel
+        self._enabled = enabled
+        self._origin = uuid.uuid4().hex
+        # key -> (value, expires at)
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        # bumped on every invalidation; a remote read racing one is not stored locally
+        self._epoch: int = 0
+        self._pubsub: PubSub | None = None
+        self._listener: asyncio.Task | None = None
+
+        for tier in _TIERS:
+            CACHE_HIT_RATIO.set_function(lambda tier=tier: _hit_ratio(tier), tier=tier)
+        CACHE_LOCAL_ENTRIES.set_function(lambda: len(self._entries))
+        self._initialized = True
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    # local tier
+    def _local_get(self, key: str) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _local_set(self, key: str, value: Any, ttl_ms: int | None) -> None:
+        ttl = self._ttl if ttl_ms is None or ttl_ms < 0 else min(self._ttl, ttl_ms / 1000)
+        if ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _drop(self, keys: list[str]) -> None:
+        self._epoch += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+
+    # api
+    async def get(self, key: str, binary: bool = False) -> Any:
+        """
+        Value from the local tier, else from the cache (then kept locally).
+        Binary values are shared by every local reader, treat them as read-only.
+        """
+        if not self._enabled:
+            return await (self._cache_client.get_binary(key) if binary else self._cache_client.get(key))
+
+        await self._listen()
+        hit, value = self._local_get(key)
+        CACHE_REQUESTS.inc(tier="local", result="hit" if hit else "miss")
+        if hit:
+            return value
+
+        epoch = self._epoch
+        value, ttl_ms = await self._cache_client.get_with_ttl(key, binary=binary)
+        CACHE_REQUESTS.inc(tier="remote", result="miss" if value is None else "hit")
+        if value is not None and epoch == self._epoch:
+            self._local_set(key, value, ttl_ms)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int | None = None, binary: bool = False) -> None:
+        if binary:
+            await self._cache_client.set_binary(key, value, ttl=ttl)
+        else:
+            await self._cache_client.set(key, value, ttl=ttl)
+        await self.invalidate(key)
+
+    async def delete(self, *keys: str) -> None:
+        await self._cache_client.delete(*keys)
+        await self.invalidate(*keys)
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Drop keys here and on every other replica.
+        The writer does not fill its local tier, the next read fetches the new value once.
+        """
+        if not keys:
+            return
+        self._drop(list(keys))
+        if not self._enabled:
+            return
+        try:
+            await self._cache_client.publish(self._channel, json.dumps({"origin": self._origin, "keys": list(keys)}))
+        except Exception as error:
+            logger.warning(f"{self._tag}|invalidate(): broadcast failed, replicas keep stale keys up to ttl: {error}")
+
+    # invalidation listener
+    async def _listen(self) -> None:
+        if self._listener is not None and not self._listener.done():
+            return
+        self._listener = asyncio.create_task(self._relay())
+
+    async def _relay(self) -> None:
+        while True:
+            try:
+                if self._pubsub is None:
+                    self._pubsub = self._cache_client.pubsub()
+                    await self._pubsub.subscribe(self._channel)
+                # subscribe confirmations are kept: redis-py reconnects and resubscribes inside get_message
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"{self._tag}|_relay(): invalidation stream lost, clearing local tier: {error}")
+                self.clear()
+                if self._pubsub is not None:
+                    with suppress(Exception):
+                        await self._pubsub.aclose()
+                    self._pubsub = None
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            if message.get("type") == "subscribe":
+                # first subscription or a reconnect, anything cached before it may have missed its invalidation
+                logger.info(f"{self._tag}|_relay(): subscribed to {self._channel}, clearing local tier")
+                self.clear()
+                continue
+            if message.get("type") != "message":
+                continue
+            try:
+                payload = json.loads(message["data"])
+            except ValueError as error:
+                logger.warning(f"{self._tag}|_relay(): bad message {error}")
+                continue
+            if payload.get("origin") != self._origin:
+                self._drop(payload.get("keys", []))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
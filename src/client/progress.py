@@ -0,0 +1,194 @@
+import asyncio
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from typing import Annotated
+
+from loguru import logger
+from pydantic import Field
+from redis.asyncio.client import PubSub
+
+from src.core.base import BaseSchema
+from src.core.factory import SingletonMeta
+from src.core.metric import registry
+from src.core.type import JobStatus
+
+from .cache import CacheClient
+
+PROGRESS_EVENTS_DROPPED = registry.counter(
+    "progress_events_dropped_total",
+    "Intermediate progress events dropped for slow consumers",
+    labelnames=("side",),
+)
+PROGRESS_SUBSCRIBERS = registry.gauge(
+    "progress_subscribers",
+    "Progress subscriptions open on this replica",
+)
+
+
+class ProgressEvent(BaseSchema):
+    job_id: Annotated[str, Field(...)]
+    status: Annotated[JobStatus, Field(...)]
+    step: Annotated[int | None, Field(default=None)] = None
+    total: Annotated[int | None, Field(default=None)] = None
+    output: Annotated[str | None, Field(default=None)] = None
+    error: Annotated[str | None, Field(default=None)] = None
+
+    @property
+    def final(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class ProgressSubscription:
+    """
+    Bounded per-connection buffer. When full, the oldest intermediate event is
+    dropped (the newest step supersedes it); final events are always kept, so a
+    slow reader loses steps but never the outcome and never blocks the publisher.
+    """
+
+    def __init__(self, job_id: str, size: int) -> None:
+        self.job_id = job_id
+        self._size = size
+        self._events: deque[ProgressEvent] = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def push(self, event: ProgressEvent) -> None:
+        if self.closed:
+            return
+        if len(self._events) >= self._size:
+            for index, queued in enumerate(self._events):
+                if not queued.final:
+                    del self._events[index]
+                    PROGRESS_EVENTS_DROPPED.inc(side="subscriber")
+                    break
+            else:
+                if not event.final:
+                    PROGRESS_EVENTS_DROPPED.inc(side="subscriber")
+                    return
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self, timeout: float | None = None) -> ProgressEvent | None:
+        """
+        Next event, or None on timeout.
+        """
+        if not self._events:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except TimeoutError:
+                return None
+        return self._events.popleft()
+
+
+class ProgressBus(metaclass=SingletonMeta):
+    """
+    Per-job progress fan-out.
+    With a cache client, events are published to `<prefix>:<job_id>` and every
+    replica relays the channels its own connections subscribed to (one pubsub
+    connection per replica). Without one, events are delivered in process.
+    Publishing never waits on the cache: intermediate steps are dropped once
+    `max_inflight` publishes are outstanding.
+    """
+
+    _initialized: bool = False
+
+    def __init__(
+        self,
+        cache_client: CacheClient | None = None,
+        prefix: str = "image:progress",
+        buffer_size: int = 8,
+        max_inflight: int = 64,
+    ) -> None:
+        if self._initialized:
+            return
+
+        self._cache_client = cache_client
+        self._prefix = prefix
+        self._buffer_size = buffer_size
+        self._max_inflight = max_inflight
+        self._inflight: int = 0
+        self._subscriptions: defaultdict[str, set[ProgressSubscription]] = defaultdict(set)
+        self._pubsub: PubSub | None = None
+        self._listener: asyncio.Task | None = None
+
+        PROGRESS_SUBSCRIBERS.set_function(lambda: sum(len(subs) for subs in self._subscriptions.values()))
+        self._initialized = True
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    def _channel(self, job_id: str) -> str:
+        return f"{self._prefix}:{job_id}"
+
+    def _dispatch(self, event: ProgressEvent) -> None:
+        for subscription in list(self._subscriptions.get(event.job_id, ())):
+            subscription.push(event)
+
+    # publisher
+    def publish(self, event: ProgressEvent) -> None:
+        """
+        Fire and forget, call from the event loop thread.
+        """
+        if self._cache_client is None:
+            self._dispatch(event)
+            return
+
+        if self._inflight >= self._max_inflight and not event.final:
+            PROGRESS_EVENTS_DROPPED.inc(side="publisher")
+            return
+        self._inflight += 1
+        asyncio.get_running_loop().create_task(self._send(event))
+
+    async def _send(self, event: ProgressEvent) -> None:
+        try:
+            await self._cache_client.publish(self._channel(event.job_id), event.model_dump_json(exclude_none=True))
+        except Exception as error:
+            logger.warning(f"{self._tag}|_send(): job={event.job_id} {error}")
+        finally:
+            self._inflight -= 1
+
+    # subscriber
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[ProgressSubscription]:
+        subscription = ProgressSubscription(job_id, size=self._buffer_size)
+        first = not self._subscriptions.get(job_id)
+        self._subscriptions[job_id].add(subscription)
+        try:
+            if first and self._cache_client is not None:
+                await self._listen(job_id)
+            yield subscription
+        finally:
+            subscription.closed = True
+            subscriptions = self._subscriptions.get(job_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[job_id]
+                    if self._pubsub is not None:
+                        with suppress(Exception):
+                            await self._pubsub.unsubscribe(self._channel(job_id))
+
+    async def _listen(self, job_id: str) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._cache_client.pubsub()
+        await self._pubsub.subscribe(self._channel(job_id))
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._relay())
+
+    async def _relay(self) -> None:
+        while self._subscriptions:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as error:
+                logger.warning(f"{self._tag}|_relay(): {error}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            try:
+                self._dispatch(ProgressEvent.model_validate_json(message["data"]))
+            except ValueError as error:
+                logger.warning(f"{self._tag}|_relay(): bad event {error}")
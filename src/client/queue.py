@@ -0,0 +1,216 @@
+import asyncio
+import itertools
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+from loguru import logger
+
+from src.core.factory import SingletonMeta
+
+from .cache import CacheClient
+
+_JOB_FIELD = "job_id"
+
+
+class JobQueue(ABC):
+    """
+    At-least-once job queue with consumer groups.
+    Stream entries carry only the job id; the job record lives under its own key
+    with a TTL. A delivered entry stays pending on its consumer until acked, and
+    entries pending too long (crashed worker) can be reclaimed by another consumer.
+    The backlog counter holds the cost units of queued and running jobs.
+    """
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    @abstractmethod
+    async def setup(self) -> None:
+        ...
+
+    @abstractmethod
+    async def enqueue(self, job_id: str, cost: float = 0.0) -> str:
+        """
+        Returns:
+            Stream entry id
+        """
+
+    @abstractmethod
+    async def read(self, consumer: str, count: int = 1, block_ms: int | None = None) -> list[tuple[str, str]]:
+        """
+        New entries for `consumer`, [(entry_id, job_id)].
+        """
+
+    @abstractmethod
+    async def reclaim(self, consumer: str, min_idle_ms: int, count: int = 10) -> list[tuple[str, str]]:
+        """
+        Entries pending longer than `min_idle_ms` on any consumer, now owned by `consumer`.
+        """
+
+    @abstractmethod
+    async def ack(self, entry_id: str, cost: float = 0.0) -> None:
+        ...
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """
+        Queued + pending entries.
+        """
+
+    @abstractmethod
+    async def backlog(self) -> float:
+        """
+        Cost units of queued + pending jobs.
+        """
+
+    @abstractmethod
+    async def put(self, job_id: str, data: str, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> str | None:
+        ...
+
+
+class RedisJobQueue(JobQueue, metaclass=SingletonMeta):
+    """
+    Redis Streams backend: XADD / XREADGROUP / XACK + XDEL / XAUTOCLAIM on one
+    stream and consumer group, shared by every API replica and worker.
+    """
+
+    _initialized: bool = False
+
+    def __init__(self, cache_client: CacheClient, stream: str, group: str) -> None:
+        if self._initialized:
+            return
+
+        self._cache_client = cache_client
+        self._stream = stream
+        self._group = group
+        self._backlog_key = f"{stream}:backlog"
+        self._initialized = True
+
+    def _record_key(self, job_id: str) -> str:
+        return f"{self._stream}:job:{job_id}"
+
+    async def setup(self) -> None:
+        await self._cache_client.xgroup_create(self._stream, self._group)
+
+    async def enqueue(self, job_id: str, cost: float = 0.0) -> str:
+        # never trimmed: entries leave the stream when acked, the service caps the depth
+        entry_id = await self._cache_client.xadd(self._stream, {_JOB_FIELD: job_id})
+        if cost:
+            await self._cache_client.incrbyfloat(self._backlog_key, cost)
+        logger.debug(f"{self._tag}|enqueue(): job={job_id} entry={entry_id}")
+        return entry_id
+
+    async def read(self, consumer: str, count: int = 1, block_ms: int | None = None) -> list[tuple[str, str]]:
+        entries = await self._cache_client.xreadgroup(
+            self._stream, self._group, consumer, count=count, block_ms=block_ms
+        )
+        return [(entry_id, fields[_JOB_FIELD]) for entry_id, fields in entries]
+
+    async def reclaim(self, consumer: str, min_idle_ms: int, count: int = 10) -> list[tuple[str, str]]:
+        entries = await self._cache_client.xautoclaim(
+            self._stream, self._group, consumer, min_idle_ms=min_idle_ms, count=count
+        )
+        return [(entry_id, fields[_JOB_FIELD]) for entry_id, fields in entries]
+
+    async def ack(self, entry_id: str, cost: float = 0.0) -> None:
+        acked = await self._cache_client.xack(self._stream, self._group, entry_id)
+        if acked and cost:
+            await self._cache_client.incrbyfloat(self._backlog_key, -cost)
+
+    async def depth(self) -> int:
+        return await self._cache_client.xlen(self._stream)
+
+    async def backlog(self) -> float:
+        return max(float(await self._cache_client.get(self._backlog_key) or 0.0), 0.0)
+
+    async def put(self, job_id: str, data: str, ttl: int) -> None:
+        await self._cache_client.set(self._record_key(job_id), data, ttl=ttl)
+
+    async def get(self, job_id: str) -> str | None:
+        return await self._cache_client.get(self._record_key(job_id))
+
+
+class MemoryJobQueue(JobQueue, metaclass=SingletonMeta):
+    """
+    In-process stand-in with the same semantics, for local runs and tests.
+    Only consumers inside the same process can read it.
+    """
+
+    _initialized: bool = False
+
+    def __init__(self) -> None:
+        if self._initialized:
+            return
+
+        self._ids = itertools.count(1)
+        self._entries: deque[tuple[str, str]] = deque()
+        # entry_id -> (consumer, delivered at, job_id)
+        self._pending: dict[str, tuple[str, float, str]] = {}
+        # job_id -> (data, expires at)
+        self._records: dict[str, tuple[str, float]] = {}
+        self._backlog: float = 0.0
+        self._ready = asyncio.Event()
+        self._initialized = True
+
+    async def setup(self) -> None:
+        return None
+
+    async def enqueue(self, job_id: str, cost: float = 0.0) -> str:
+        entry_id = f"{int(time.time() * 1000)}-{next(self._ids)}"
+        self._entries.append((entry_id, job_id))
+        self._backlog += cost
+        self._ready.set()
+        return entry_id
+
+    async def read(self, consumer: str, count: int = 1, block_ms: int | None = None) -> list[tuple[str, str]]:
+        if not self._entries and block_ms:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=block_ms / 1000)
+            except TimeoutError:
+                return []
+
+        entries: list[tuple[str, str]] = []
+        while self._entries and len(entries) < count:
+            entry_id, job_id = self._entries.popleft()
+            self._pending[entry_id] = (consumer, time.monotonic(), job_id)
+            entries.append((entry_id, job_id))
+        return entries
+
+    async def reclaim(self, consumer: str, min_idle_ms: int, count: int = 10) -> list[tuple[str, str]]:
+        now = time.monotonic()
+        entries: list[tuple[str, str]] = []
+        for entry_id, (_, delivered_at, job_id) in list(self._pending.items()):
+            if len(entries) >= count:
+                break
+            if (now - delivered_at) * 1000 >= min_idle_ms:
+                self._pending[entry_id] = (consumer, now, job_id)
+                entries.append((entry_id, job_id))
+        return entries
+
+    async def ack(self, entry_id: str, cost: float = 0.0) -> None:
+        if self._pending.pop(entry_id, None) is not None:
+            self._backlog = max(self._backlog - cost, 0.0)
+
+    async def depth(self) -> int:
+        return len(self._entries) + len(self._pending)
+
+    async def backlog(self) -> float:
+        return self._backlog
+
+    async def put(self, job_id: str, data: str, ttl: int) -> None:
+        now = time.monotonic()
+        self._records = {key: value for key, value in self._records.items() if value[1] > now}
+        self._records[job_id] = (data, now + ttl)
+
+    async def get(self, job_id: str) -> str | None:
+        record = self._records.get(job_id)
+        if record is None or record[1] <= time.monotonic():
+            return None
+        return record[0]
@@ -0,0 +1,265 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+from loguru import logger
+from pydantic import Field
+
+from src.core.base import BaseSchema
+from src.core.config import settings
+from src.core.error import Error
+from src.core.factory import SingletonMeta
+from src.core.metric import registry
+from src.core.type import RateLimitAlgorithm
+
+from .cache import CacheClient
+
+RATE_LIMIT_DECISIONS = registry.counter(
+    "rate_limit_decisions_total",
+    "Rate limit decisions per route and backend",
+    labelnames=("route", "result", "backend"),
+)
+
+# KEYS[1] bucket hash; ARGV capacity, refill per second, cost
+# returns {allowed, tokens left, seconds until full, seconds until cost fits}
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring((capacity - tokens) / rate), tostring(retry_after)}
+"""
+
+# KEYS[1] current window, KEYS[2] previous window; ARGV limit, window seconds, cost, elapsed share of the window
+# returns {allowed, units left, seconds until the window rolls, seconds until cost fits}
+_SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local elapsed = tonumber(ARGV[4])
+
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local used = previous * (1 - elapsed) + current
+
+local allowed = 0
+local retry_after = 0
+if used + cost <= limit then
+    redis.call('INCRBYFLOAT', KEYS[1], cost)
+    redis.call('EXPIRE', KEYS[1], window * 2)
+    used = used + cost
+    allowed = 1
+else
+    retry_after = window * (1 - elapsed)
+end
+return {allowed, tostring(math.max(limit - used, 0)), tostring(window * (1 - elapsed)), tostring(retry_after)}
+"""
+
+# per algorithm, least recently used keys are dropped beyond it (their limit starts over)
+_LOCAL_MAX_KEYS = 10_000
+
+
+class RateLimitResult(BaseSchema):
+    allowed: Annotated[bool, Field(...)]
+    limit: Annotated[float, Field(...)]
+    remaining: Annotated[float, Field(...)]
+    reset_seconds: Annotated[float, Field(...)]
+    retry_after_seconds: Annotated[float, Field(default=0.0)] = 0.0
+    window_seconds: Annotated[int, Field(...)]
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """
+        RateLimit-* response headers (IETF httpapi draft), Retry-After when rejected.
+        """
+        headers = {
+            "RateLimit-Policy": f"{math.floor(self.limit)};w={self.window_seconds}",
+            "RateLimit-Limit": str(math.floor(self.limit)),
+            "RateLimit-Remaining": str(math.floor(self.remaining)),
+            "RateLimit-Reset": str(math.ceil(self.reset_seconds)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after_seconds), 1))
+        return headers
+
+
+class RateLimiter(metaclass=SingletonMeta):
+    """
+    Cost-weighted rate limiting shared by all replicas: each check is one atomic
+    Lua script on the cache (token bucket or sliding window counter).
+    When the cache is unreachable or slow, checks fall back to the same algorithm
+    in process memory (per replica) for `rate_limit_fallback_seconds`, so the cache
+    is never a hard dependency of the request path.
+    """
+
+    _initialized: bool = False
+
+    def __init__(self, cache_client: CacheClient) -> None:
+        if self._initialized:
+            return
+
+        self._cache_client = cache_client
+        self._cache_down_until: float = 0.0
+        # local fallback state, least recently used first:
+        # key -> [tokens, ts] (token bucket) / key -> (window index, used in it, used in the previous one)
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._windows: OrderedDict[str, tuple[int, float, float]] = OrderedDict()
+        self._initialized = True
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    @staticmethod
+    def key(route: str, tenant: str | None, ip: str | None) -> str:
+        """
+        Bucket of a request: its tenant when authenticated (src.core.auth.get_tenant),
+        its client IP otherwise. Never pass a client-supplied identity as `tenant`,
+        a caller could take a fresh bucket on every request.
+        """
+        identity = f"tenant:{tenant}" if tenant else f"ip:{ip or 'unknown'}"
+        return f"ratelimit:{route}:{identity}"
+
+    async def hit(self, route: str, key: str, cost: float = 1.0) -> RateLimitResult:
+        """
+        Consume `cost` units for `key`.
+        """
+        if not settings.rate_limit_enabled:
+            return RateLimitResult(
+                allowed=True,
+                limit=settings.rate_limit_units,
+                remaining=settings.rate_limit_units,
+                reset_seconds=0.0,
+                window_seconds=settings.rate_limit_window_seconds,
+            )
+
+        backend = "local"
+        result: RateLimitResult | None = None
+        if time.monotonic() >= self._cache_down_until:
+            try:
+                result = await asyncio.wait_for(
+                    self._hit_cache(key, cost), timeout=settings.rate_limit_cache_timeout_ms / 1000
+                )
+                backend = "cache"
+            except Exception as error:
+                logger.warning(f"{self._tag}|hit(): cache unavailable, using local fallback: {error!r}")
+                self._cache_down_until = time.monotonic() + settings.rate_limit_fallback_seconds
+        if result is None:
+            result = self._hit_local(key, cost)
+
+        RATE_LIMIT_DECISIONS.inc(route=route, result="allowed" if result.allowed else "limited", backend=backend)
+        return result
+
+    async def acquire(self, route: str, key: str, cost: float = 1.0) -> RateLimitResult:
+        """
+        Like hit(), but raises a 429 carrying the RateLimit headers when limited.
+        Raises:
+            Error: 413 when `cost` exceeds a whole window and can never be admitted, 429 when limited
+        """
+        if settings.rate_limit_enabled and cost > settings.rate_limit_units:
+            raise Error.payload_too_large(
+                message=(
+                    f"Request costs {cost:.1f} units, the rate limit allows {settings.rate_limit_units:.1f} "
+                    f"per {settings.rate_limit_window_seconds}s; lower steps or resolution."
+                )
+            )
+        result = await self.hit(route=route, key=key, cost=cost)
+        if not result.allowed:
+            logger.info(f"{self._tag}|acquire(): limited {key} cost={cost}")
+            raise Error.too_many_requests(
+                message="Rate limit exceeded, retry later.",
+                details=[f"retry_after_seconds={math.ceil(result.retry_after_seconds)}"],
+                headers=result.headers,
+            )
+        return result
+
+    async def _hit_cache(self, key: str, cost: float) -> RateLimitResult:
+        limit = settings.rate_limit_units
+        window = settings.rate_limit_window_seconds
+        if settings.rate_limit_algorithm == RateLimitAlgorithm.TOKEN_BUCKET:
+            reply = await self._cache_client.run_script(_TOKEN_BUCKET, keys=[key], args=[limit, limit / window, cost])
+        else:
+            now = time.time()
+            index, elapsed = divmod(now, window)
+            reply = await self._cache_client.run_script(
+                _SLIDING_WINDOW,
+                # hash tag keeps both windows in one cluster slot
+                keys=[f"{{{key}}}:{int(index)}", f"{{{key}}}:{int(index) - 1}"],
+                args=[limit, window, cost, elapsed / window],
+            )
+        allowed, remaining, reset, retry_after = reply
+        return RateLimitResult(
+            allowed=bool(int(allowed)),
+            limit=limit,
+            remaining=float(remaining),
+            reset_seconds=float(reset),
+            retry_after_seconds=float(retry_after),
+            window_seconds=window,
+        )
+
+    @staticmethod
+    def _keep(state: OrderedDict, key: str) -> None:
+        state.move_to_end(key)
+        while len(state) > _LOCAL_MAX_KEYS:
+            state.popitem(last=False)
+
+    def _hit_local(self, key: str, cost: float) -> RateLimitResult:
+        limit = settings.rate_limit_units
+        window = settings.rate_limit_window_seconds
+        now = time.time()
+
+        if settings.rate_limit_algorithm == RateLimitAlgorithm.TOKEN_BUCKET:
+            rate = limit / window
+            tokens, ts = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + max(0.0, now - ts) * rate)
+            allowed = tokens >= cost
+            retry_after = 0.0 if allowed else (cost - tokens) / rate
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = [tokens, now]
+            self._keep(self._buckets, key)
+            remaining, reset = tokens, (limit - tokens) / rate
+        else:
+            index, elapsed = divmod(now, window)
+            index = int(index)
+            # only the current and previous windows are ever read
+            last, current, previous = self._windows.get(key, (index, 0.0, 0.0))
+            if last != index:
+                current, previous = 0.0, current if last == index - 1 else 0.0
+            used = previous * (1 - elapsed / window) + current
+            allowed = used + cost <= limit
+            retry_after = 0.0 if allowed else window - elapsed
+            if allowed:
+                current += cost
+                used += cost
+            self._windows[key] = (index, current, previous)
+            self._keep(self._windows, key)
+            remaining, reset = max(limit - used, 0.0), window - elapsed
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=remaining,
+            reset_seconds=reset,
+            retry_after_seconds=retry_after,
+            window_seconds=window,
+        )
@@ -0,0 +1,175 @@
+import queue
+import shutil
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+from diffusers import StableDiffusionPipeline
+from loguru import logger
+from PIL.Image import Image
+
+from src.core.metric import registry
+from src.core.type import SafetyMode
+
+from .timing import IMAGE_STAGE_SECONDS, STAGE_SAFETY_CHECK
+
+IMAGE_SAFETY_CHECKS = registry.counter(
+    "image_safety_checks_total",
+    "Safety checker verdicts per image",
+    labelnames=("mode", "result"),
+)
+
+# on_verdict(file_path, flagged), flagged is None when the file could not be checked
+OnVerdict = Callable[[str, bool | None], None]
+
+
+class SafetyStage:
+    """
+    Safety checking as a configurable stage of the pipeline.
+    - inline: the pipeline's own run_safety_checker (flagged images are blacked out)
+    - deferred: skipped in the pipeline; written files are checked in batches on a
+      separate pool and moved to the quarantine dir if flagged, then each file's
+      `on_verdict` gets flagged or None when it could not be checked
+    - disabled: skipped
+    The mode is per generation (thread-local), the pipeline is shared.
+    """
+
+    def __init__(
+        self,
+        pipeline: StableDiffusionPipeline,
+        quarantine_dir: Path,
+        batch_size: int = 8,
+        batch_wait_ms: int = 200,
+        workers: int = 1,
+    ) -> None:
+        self._pipeline = pipeline
+        self._quarantine_dir = quarantine_dir
+        self._batch_size = batch_size
+        self._batch_wait = batch_wait_ms / 1000
+        self._local = threading.local()
+
+        self._run_inline = pipeline.run_safety_checker
+        pipeline.run_safety_checker = self._run_safety_checker
+
+        self._queue: queue.Queue[tuple[str, Image, OnVerdict | None]] = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="safety")
+        self._collector = threading.Thread(target=self._collect, name="safety-collector", daemon=True)
+        self._collector.start()
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    @property
+    def enabled(self) -> bool:
+        return self._pipeline.safety_checker is not None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @contextmanager
+    def mode(self, mode: SafetyMode) -> Iterator[None]:
+        self._local.mode = mode
+        try:
+            yield
+        finally:
+            self._local.mode = None
+
+    def _run_safety_checker(self, image: Any, device: torch.device, dtype: torch.dtype) -> tuple[Any, Any]:
+        mode = getattr(self._local, "mode", None) or SafetyMode.INLINE
+        if mode != SafetyMode.INLINE:
+            return image, None
+
+        image, has_nsfw_concept = self._run_inline(image, device, dtype)
+        if has_nsfw_concept is not None:
+            for flagged in has_nsfw_concept:
+                IMAGE_SAFETY_CHECKS.inc(mode=SafetyMode.INLINE.value, result="flagged" if flagged else "clean")
+        return image, has_nsfw_concept
+
+    def submit(
+        self,
+        file_path: str,
+        image: Image,
+        on_verdict: OnVerdict | None = None,
+    ) -> None:
+        """
+        Queue a written image for the deferred check.
+        `on_verdict(file_path, flagged)` is called on a safety thread once the file is checked.
+        """
+        if not self.enabled:
+            logger.debug(f"{self._tag}|submit(): no safety checker loaded, skipping {file_path}")
+            self._notify(on_verdict, file_path, None)
+            return
+        self._queue.put((file_path, image, on_verdict))
+
+    def _notify(
+        self,
+        on_verdict: OnVerdict | None,
+        file_path: str,
+        flagged: bool | None,
+    ) -> None:
+        if on_verdict is None:
+            return
+        try:
+            on_verdict(file_path, flagged)
+        except Exception as error:
+            logger.error(f"Error|{self._tag}|_notify(): {file_path} {error}")
+
+    def _collect(self) -> None:
+        # drain the queue into batches: up to batch_size images or batch_wait seconds
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._batch_wait
+            while len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._check_batch, batch)
+
+    def _check_batch(self, batch: list[tuple[str, Image, OnVerdict | None]]) -> None:
+        images = [image for _, image, _ in batch]
+        logger.debug(f"{self._tag}|_check_batch(): checking {len(batch)} images")
+
+        start_at = time.perf_counter()
+        try:
+            safety_checker = self._pipeline.safety_checker
+            dtype = next(safety_checker.parameters()).dtype
+            clip_input = self._pipeline.feature_extractor(images, return_tensors="pt").pixel_values
+            pixels = np.stack([np.asarray(image, dtype=np.float32) / 255.0 for image in images])
+            with torch.no_grad():
+                _, has_nsfw_concepts = safety_checker(
+                    images=pixels, clip_input=clip_input.to(safety_checker.device, dtype)
+                )
+        except Exception as error:
+            logger.error(f"Error|{self._tag}|_check_batch(): {error}")
+            IMAGE_SAFETY_CHECKS.inc(len(batch), mode=SafetyMode.DEFERRED.value, result="error")
+            for file_path, _, on_verdict in batch:
+                self._notify(on_verdict, file_path, None)
+            return
+        IMAGE_STAGE_SECONDS.observe(time.perf_counter() - start_at, stage=f"{STAGE_SAFETY_CHECK}_deferred")
+
+        for (file_path, _, on_verdict), flagged in zip(batch, has_nsfw_concepts, strict=True):
+            IMAGE_SAFETY_CHECKS.inc(mode=SafetyMode.DEFERRED.value, result="flagged" if flagged else "clean")
+            if flagged:
+                self._quarantine(file_path)
+            self._notify(on_verdict, file_path, bool(flagged))
+
+    def _quarantine(self, file_path: str) -> None:
+        source = Path(file_path)
+        if not source.exists():
+            return
+        self._quarantine_dir.mkdir(parents=True, exist_ok=True)
+        target = self._quarantine_dir / source.name
+        shutil.move(source, target)
+        logger.warning(f"{self._tag}|_quarantine(): flagged {file_path}, moved to {target}")
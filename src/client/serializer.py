@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+import msgpack
+import numpy as np
+import zstandard
+
+from src.core.type import CacheSerializer
+
+# msgpack extension type codes
+_EXT_NDARRAY = 1
+
+# first byte of every stored binary value
+_PLAIN = b"\x00"
+_ZSTD = b"\x01"
+
+
+class Serializer(ABC):
+    """
+    Turns values into bytes for the cache and back.
+    """
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        ...
+
+
+class RawSerializer(Serializer):
+    def dumps(self, value: Any) -> bytes:
+        if not isinstance(value, bytes | bytearray | memoryview):
+            raise TypeError(f"RawSerializer stores bytes, got {type(value).__name__}")
+        return bytes(value)
+
+    def loads(self, data: bytes) -> bytes:
+        return data
+
+
+class MsgpackSerializer(Serializer):
+    """
+    msgpack with bytes kept as bytes; numpy arrays (latents, embeddings) travel
+    as an extension type holding dtype, shape and the raw buffer.
+    """
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        if isinstance(value, np.ndarray):
+            array = np.ascontiguousarray(value)
+            return msgpack.ExtType(
+                _EXT_NDARRAY, msgpack.packb((array.dtype.str, array.shape, array.tobytes()), use_bin_type=True)
+            )
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    @staticmethod
+    def _ext_hook(code: int, data: bytes) -> Any:
+        if code == _EXT_NDARRAY:
+            dtype, shape, buffer = msgpack.unpackb(data, raw=False)
+            return np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape)
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True, default=self._default)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, ext_hook=self._ext_hook)
+
+
+class CompressedSerializer(Serializer):
+    """
+    Wraps another serializer; payloads of at least `threshold` bytes are zstd
+    compressed. One header byte marks the encoding, so values written with any
+    threshold stay readable.
+    """
+
+    def __init__(self, inner: Serializer, threshold: int, level: int = 3) -> None:
+        self._inner = inner
+        self._threshold = threshold
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def dumps(self, value: Any) -> bytes:
+        data = self._inner.dumps(value)
+        if self._threshold and len(data) >= self._threshold:
+            return _ZSTD + self._compressor.compress(data)
+        return _PLAIN + data
+
+    def loads(self, data: bytes) -> Any:
+        header, payload = data[:1], data[1:]
+        if header == _ZSTD:
+            payload = self._decompressor.decompress(payload)
+        elif header != _PLAIN:
+            raise ValueError(f"Unknown cache value header {header!r}")
+        return self._inner.loads(payload)
+
+
+def build_serializer(kind: CacheSerializer, compress_threshold: int = 0, compress_level: int = 3) -> Serializer:
+    inner = RawSerializer() if kind == CacheSerializer.RAW else MsgpackSerializer()
+    return CompressedSerializer(inner, threshold=compress_threshold, level=compress_level)
@@ -0,0 +1,101 @@
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import torch
+from diffusers import StableDiffusionPipeline
+
+from src.core.metric import registry
+
+STAGE_TEXT_ENCODE = "text_encode"
+STAGE_UNET_STEP = "unet_step"
+STAGE_VAE_DECODE = "vae_decode"
+STAGE_SAFETY_CHECK = "safety_check"
+STAGE_IMAGE_ENCODE = "image_encode"
+STAGE_DISK_WRITE = "disk_write"
+STAGE_TOTAL = "total"
+
+IMAGE_STAGE_SECONDS = registry.histogram(
+    "image_stage_duration_seconds",
+    "Duration of each diffusion pipeline stage",
+    labelnames=("stage",),
+)
+
+
+class StageTimer:
+    """
+    Per-stage durations for the generation running on the current thread.
+    Generations run in worker threads (asyncio.to_thread), so the active record
+    is thread-local and concurrent requests never mix their stages.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    @property
+    def _record(self) -> dict[str, list[float]] | None:
+        return getattr(self._local, "record", None)
+
+    @contextmanager
+    def track(self) -> Iterator[dict[str, list[float]]]:
+        """
+        Open a record for the current thread; stages observed inside land in it.
+        """
+        record: dict[str, list[float]] = {}
+        self._local.record = record
+        start_at = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(STAGE_TOTAL, time.perf_counter() - start_at)
+            self._local.record = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        IMAGE_STAGE_SECONDS.observe(seconds, stage=stage)
+        record = self._record
+        if record is not None:
+            record.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        start_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start_at)
+
+    def wrap(self, function: Callable[..., Any], stage: str) -> Callable[..., Any]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.stage(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def attach(self, pipeline: StableDiffusionPipeline) -> None:
+        """
+        Instrument a loaded pipeline in place:
+        - encode_prompt (tokenization + text encoder)
+        - every UNet forward (one per denoising step, CFG is batched)
+        - vae.decode
+        - run_safety_checker (feature extraction + CLIP safety model)
+        """
+        pipeline.encode_prompt = self.wrap(pipeline.encode_prompt, STAGE_TEXT_ENCODE)
+        pipeline.vae.decode = self.wrap(pipeline.vae.decode, STAGE_VAE_DECODE)
+        pipeline.run_safety_checker = self.wrap(pipeline.run_safety_checker, STAGE_SAFETY_CHECK)
+
+        unet: torch.nn.Module = pipeline.unet
+        unet.register_forward_pre_hook(self._on_unet_pre_forward)
+        unet.register_forward_hook(self._on_unet_forward)
+
+    def _on_unet_pre_forward(self, *args: Any) -> None:
+        self._local.unet_start_at = time.perf_counter()
+
+    def _on_unet_forward(self, *args: Any) -> None:
+        start_at = getattr(self._local, "unet_start_at", None)
+        if start_at is not None:
+            self.add(STAGE_UNET_STEP, time.perf_counter() - start_at)
+            self._local.unet_start_at = None
@@ -0,0 +1,195 @@
+import math
+import re
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import torch
+from diffusers import UNet2DConditionModel
+
+_Merge = Callable[[torch.Tensor], torch.Tensor]
+
+_LEVEL_PATTERN = re.compile(r"^(down_blocks|up_blocks)\.(\d+)\.|^mid_block\.")
+
+
+def _identity(x: torch.Tensor) -> torch.Tensor:
+    return x
+
+
+def bipartite_soft_matching(
+    metric: torch.Tensor,
+    h: int,
+    w: int,
+    r: int,
+    generator: torch.Generator | None = None,
+) -> tuple[_Merge, _Merge]:
+    """
+    ToMe bipartite soft matching on an h x w token grid.
+    One destination token is drawn per 2x2 region, every other token is a source;
+    the r sources most similar (cosine) to their best destination are averaged into it.
+    Args:
+        metric: (B, N, C) tokens used for similarity
+        h, w: token grid, h * w == N
+        r: number of tokens to remove
+        generator: rng for the destination draw
+    Returns:
+        (merge, unmerge) callables for (B, N, C) / (B, N - r, C) tensors
+    """
+    batch, tokens, _ = metric.shape
+    if r <= 0:
+        return _identity, _identity
+
+    with torch.no_grad():
+        hsy, wsx = h // 2, w // 2
+        # dst position inside each 2x2 region
+        rand_idx = torch.randint(4, size=(hsy, wsx, 1), generator=generator).to(metric.device)
+        idx_buffer_view = torch.zeros(hsy, wsx, 4, device=metric.device, dtype=torch.int64)
+        idx_buffer_view.scatter_(dim=2, index=rand_idx, src=-torch.ones_like(rand_idx, dtype=torch.int64))
+        idx_buffer_view = idx_buffer_view.view(hsy, wsx, 2, 2).transpose(1, 2).reshape(hsy * 2, wsx * 2)
+
+        # leftover rows/cols (odd sizes) are always sources
+        if hsy * 2 < h or wsx * 2 < w:
+            idx_buffer = torch.zeros(h, w, device=metric.device, dtype=torch.int64)
+            idx_buffer[: hsy * 2, : wsx * 2] = idx_buffer_view
+        else:
+            idx_buffer = idx_buffer_view
+
+        # dst (-1) first, then src (0)
+        rand_idx = idx_buffer.reshape(1, -1, 1).argsort(dim=1)
+        num_dst = hsy * wsx
+        a_idx = rand_idx[:, num_dst:, :]  # src
+        b_idx = rand_idx[:, :num_dst, :]  # dst
+
+        def split(x: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+            channels = x.shape[-1]
+            src = torch.gather(x, dim=1, index=a_idx.expand(x.shape[0], tokens - num_dst, channels))
+            dst = torch.gather(x, dim=1, index=b_idx.expand(x.shape[0], num_dst, channels))
+            return src, dst
+
+        metric = metric / metric.norm(dim=-1, keepdim=True)
+        a, b = split(metric)
+        scores = a @ b.transpose(-1, -2)
+
+        r = min(a.shape[1], r)
+        node_max, node_idx = scores.max(dim=-1)
+        edge_idx = node_max.argsort(dim=-1, descending=True)[..., None]
+
+        unm_idx = edge_idx[..., r:, :]  # unmerged src
+        src_idx = edge_idx[..., :r, :]  # merged src
+        dst_idx = torch.gather(node_idx[..., None], dim=-2, index=src_idx)
+
+    def merge(x: torch.Tensor) -> torch.Tensor:
+        src, dst = split(x)
+        n, t1, c = src.shape
+        unm = torch.gather(src, dim=-2, index=unm_idx.expand(n, t1 - r, c))
+        src = torch.gather(src, dim=-2, index=src_idx.expand(n, r, c))
+        dst = dst.scatter_reduce(-2, dst_idx.expand(n, r, c), src, reduce="mean")
+        return torch.cat([unm, dst], dim=1)
+
+    def unmerge(x: torch.Tensor) -> torch.Tensor:
+        unm_len = unm_idx.shape[1]
+        unm, dst = x[..., :unm_len, :], x[..., unm_len:, :]
+        _, _, c = unm.shape
+        src = torch.gather(dst, dim=-2, index=dst_idx.expand(batch, r, c))
+
+        # grid positions of the unmerged / merged sources
+        a_positions = a_idx.expand(batch, a_idx.shape[1], 1)
+        unm_positions = torch.gather(a_positions, dim=1, index=unm_idx)
+        src_positions = torch.gather(a_positions, dim=1, index=src_idx)
+
+        out = torch.zeros(batch, tokens, c, device=x.device, dtype=x.dtype)
+        out.scatter_(dim=-2, index=b_idx.expand(batch, num_dst, c), src=dst)
+        out.scatter_(dim=-2, index=unm_positions.expand(batch, unm_len, c), src=unm)
+        out.scatter_(dim=-2, index=src_positions.expand(batch, r, c), src=src)
+        return out
+
+    return merge, unmerge
+
+
+class TokenMerging:
+    """
+    Token merging (ToMe for SD) on the self-attention layers of a loaded UNet.
+    Before each self-attention (attn1) in the highest-resolution `levels` attention
+    levels, `ratio` of the tokens are merged into their most similar neighbour;
+    the attention runs on the reduced set and its output is unmerged back.
+    Weight-free; with no open session the layers run as usual.
+    """
+
+    def __init__(self, unet: UNet2DConditionModel, levels: int = 1, seed: int = 0) -> None:
+        self._ratio: float = 0.0
+        self._latent_hw: tuple[int, int] | None = None
+        self._seed = seed
+        self._generator = torch.Generator(device="cpu").manual_seed(seed)
+
+        attentions: list[tuple[int, torch.nn.Module]] = []
+        num_levels = len(unet.down_blocks)
+        for name, module in unet.named_modules():
+            if not name.endswith(".attn1"):
+                continue
+            match = _LEVEL_PATTERN.match(name)
+            if match is None:
+                continue
+            if match.group(1) == "down_blocks":
+                level = int(match.group(2))
+            elif match.group(1) == "up_blocks":
+                level = num_levels - 1 - int(match.group(2))
+            else:
+                level = num_levels - 1
+            attentions.append((level, module))
+
+        if attentions:
+            top_level = min(level for level, _ in attentions)
+            for level, module in attentions:
+                if level - top_level < levels:
+                    module.forward = self._wrap_attention(module.forward)
+
+        unet.register_forward_pre_hook(self._on_unet_pre_forward, with_kwargs=True)
+
+    @property
+    def active(self) -> bool:
+        return self._ratio > 0
+
+    @contextmanager
+    def session(self, ratio: float) -> Iterator[None]:
+        """
+        Merge `ratio` (0 <= ratio < 1) of the tokens for one generation.
+        """
+        self._ratio = min(max(ratio, 0.0), 0.95)
+        self._generator.manual_seed(self._seed)
+        try:
+            yield
+        finally:
+            self._ratio = 0.0
+            self._latent_hw = None
+
+    def _on_unet_pre_forward(self, module: torch.nn.Module, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        if not self.active:
+            return
+        sample: torch.Tensor | None = args[0] if args else kwargs.get("sample")
+        if sample is not None:
+            self._latent_hw = (sample.shape[-2], sample.shape[-1])
+
+    def _grid(self, tokens: int) -> tuple[int, int] | None:
+        if self._latent_hw is None:
+            return None
+        height, width = self._latent_hw
+        downsample = round(math.sqrt(height * width / tokens))
+        if downsample <= 0:
+            return None
+        h, w = math.ceil(height / downsample), math.ceil(width / downsample)
+        return (h, w) if h * w == tokens else None
+
+    def _wrap_attention(self, forward: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(hidden_states: torch.Tensor, *args: Any, **kwargs: Any) -> Any:
+            if not self.active or hidden_states.ndim != 3:
+                return forward(hidden_states, *args, **kwargs)
+
+            grid = self._grid(hidden_states.shape[1])
+            if grid is None:
+                return forward(hidden_states, *args, **kwargs)
+
+            r = int(hidden_states.shape[1] * self._ratio)
+            merge, unmerge = bipartite_soft_matching(hidden_states, *grid, r=r, generator=self._generator)
+            return unmerge(forward(merge(hidden_states), *args, **kwargs))
+
+        return wrapper
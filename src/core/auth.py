@@ -0,0 +1,37 @@
+import hashlib
+import hmac
+from typing import Annotated
+
+from fastapi import Header
+
+from .config import settings
+from .constant import API_KEY_HEADER
+from .error import Error
+
+
+def tenant_for_key(api_key: str) -> str | None:
+    """
+    Tenant an API key authenticates, None for an unknown key.
+    Keys are configured by digest, so the settings never hold a usable key.
+    """
+    digest = hashlib.sha256(api_key.encode()).hexdigest()
+    for known, tenant in settings.api_keys.items():
+        if hmac.compare_digest(digest, known.lower()):
+            return tenant
+    return None
+
+
+async def get_tenant(
+    api_key: Annotated[str | None, Header(alias=API_KEY_HEADER)] = None,
+) -> str | None:
+    """
+    Authenticated tenant of the request, None for anonymous requests.
+    Raises:
+        Error: 401 when a key is sent but not recognised
+    """
+    if api_key is None:
+        return None
+    tenant = tenant_for_key(api_key)
+    if tenant is None:
+        raise Error.unauthorized(message="Invalid API key.")
+    return tenant
@@ -1,28 +1,79 @@
+import base64
+import functools
+import itertools
+import json
+import operator
+import time
 import uuid
-from collections.abc import Iterable, Sequence
+from collections import namedtuple
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
 from datetime import UTC, datetime
 from functools import cached_property
-from typing import Annotated, Any, Generic, TypeVar
+from typing import Annotated, Any, ClassVar, Generic, TypeVar
 
 from fastapi.encoders import jsonable_encoder
 from loguru import logger
 from pydantic import BaseModel, ConfigDict, Field
 from tortoise import fields, models, queryset
 from tortoise.exceptions import DoesNotExist
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
+from .common import uuid7
+from .config import settings
+from .field import BinaryUUIDField
+from .format import serialize
+from .metric import registry
+from .type import RowFormat
 
 # database - mode + repo
 _ModelT = TypeVar("_ModelT", bound=models.Model)
 
+ENTITY_CACHE_REQUESTS = registry.counter(
+    "entity_cache_requests_total",
+    "Primary key lookups through the entity cache",
+    labelnames=("model", "result"),
+)
+ENTITY_CACHE_HIT_RATIO = registry.gauge(
+    "entity_cache_hit_ratio",
+    "Entity cache hit ratio (negative hits included) since start",
+    labelnames=("model",),
+)
+DB_BULK_ROWS = registry.counter(
+    "db_bulk_rows_total",
+    "Rows written by bulk operations",
+    labelnames=("model", "operation"),
+)
+DB_BULK_ROWS_PER_SECOND = registry.gauge(
+    "db_bulk_rows_per_second",
+    "Throughput of the last bulk operation",
+    labelnames=("model", "operation"),
+)
+
 
 class Base(models.Model):
-    id: uuid.UUID = fields.UUIDField(primary_key=True, default=uuid.uuid4)
+    # time-ordered, 16 bytes on disk
+    id: uuid.UUID = BinaryUUIDField(primary_key=True, default=uuid7)
     created_at: datetime = fields.DatetimeField(auto_now_add=True, db_index=True)
     updated_at: datetime = fields.DatetimeField(auto_now=True, db_index=True)
     deleted_at: datetime | None = fields.DatetimeField(null=True, db_index=True)
 
+    # read-through cache of get_by_id, attached by a repo that opts in
+    _entity_cache: ClassVar["EntityCache | None"] = None
+
     class Meta:
         abstract = True
 
+    async def save(self, *args: Any, **kwargs: Any) -> None:
+        await super().save(*args, **kwargs)
+        if self._entity_cache is not None:
+            await self._entity_cache.invalidate(type(self), self.id)
+
+    async def delete(self, *args: Any, **kwargs: Any) -> None:
+        await super().delete(*args, **kwargs)
+        if self._entity_cache is not None:
+            await self._entity_cache.invalidate(type(self), self.id)
+
     async def soft_delete(self) -> None:
         self.deleted_at = datetime.now(UTC)
         return await self.save()
@@ -66,12 +117,134 @@ class Base(models.Model):
         return instance
 
 
+@functools.cache
+def record_type(model: type[models.Model], names: tuple[str, ...]) -> type[tuple]:
+    """
+    Named tuple class for rows of `names` from `model`, one class per projection.
+    """
+    return namedtuple(f"{model.__name__}Record", names, rename=True)
+
+
+def shape_rows(model: type[models.Model], names: Sequence[str], rows: list[dict], row_format: RowFormat) -> Any:
+    """
+    Rows from values() in the requested projection format.
+    values() is the leanest ORM read (converters only for non-native columns,
+    applied in place), the other formats are cut from its dicts with itemgetter.
+    """
+    if row_format == RowFormat.DICT:
+        return rows
+    if row_format == RowFormat.COLUMNS:
+        return {name: [row[name] for row in rows] for name in names}
+    if len(names) == 1:
+        tuples: Iterable[tuple] = ((row[names[0]],) for row in rows)
+    else:
+        tuples = map(operator.itemgetter(*names), rows)
+    if row_format == RowFormat.TUPLE:
+        return list(tuples)
+    if row_format == RowFormat.RECORD:
+        return list(map(record_type(model, tuple(names))._make, tuples))
+    raise ValueError(f"Projection cannot produce {row_format} rows")
+
+
+class EntityCache:
+    """
+    Read-through cache of rows by primary key for `BaseRepo.get_by_id`.
+    Rows are stored as serialized db fields in `store` (NearCache-like: get/set/delete
+    with binary values, e.g. an in-process LRU in front of Redis) and rebuilt into
+    instances on a hit. Misses can be cached too (`negative_ttl`). Entries are
+    dropped by Base.save()/delete() (so update, delete, soft_delete and creation) and
+    by the repo's bulk and filter writes; queryset .update() bypasses it and is
+    bounded by `ttl`.
+    """
+
+    _MISSING: ClassVar[dict[str, bool]] = {"__missing__": True}
+
+    def __init__(self, store: Any, ttl: int = 300, negative_ttl: int = 0, prefix: str = "entity") -> None:
+        self._store = store
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._prefix = prefix
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    def key(self, model: type[models.Model], id: Any) -> str:
+        return f"{self._prefix}:{model._meta.db_table}:{id}"
+
+    def register(self, model: type[Base]) -> None:
+        model._entity_cache = self
+        name = model.__name__
+
+        def hit_ratio() -> float:
+            hits = sum(ENTITY_CACHE_REQUESTS.value(model=name, result=result) for result in ("hit", "negative_hit"))
+            total = hits + ENTITY_CACHE_REQUESTS.value(model=name, result="miss")
+            return hits / total if total else 0.0
+
+        ENTITY_CACHE_HIT_RATIO.set_function(hit_ratio, model=name)
+
+    @staticmethod
+    def _dump(instance: models.Model) -> dict[str, Any]:
+        return {
+            source: serialize(getattr(instance, name))
+            for name, source in instance._meta.fields_db_projection.items()
+        }
+
+    @staticmethod
+    def _restore(model: type[_ModelT], data: dict[str, Any]) -> _ModelT:
+        fields_map = model._meta.fields_map
+        # same path as a fetched row, so the instance saves as an UPDATE
+        return model._init_from_db(**{
+            source: fields_map[name].to_python_value(data.get(source))
+            for name, source in model._meta.fields_db_projection.items()
+        })
+
+    async def get(self, model: type[_ModelT], id: Any, load: Callable[[], Awaitable[_ModelT | None]]) -> _ModelT | None:
+        key = self.key(model, id)
+        try:
+            data = await self._store.get(key, binary=True)
+        except Exception as error:
+            logger.warning(f"{self._tag}|get(): {key} cache unavailable {error}")
+            return await load()
+
+        if data is not None:
+            if data.get("__missing__"):
+                ENTITY_CACHE_REQUESTS.inc(model=model.__name__, result="negative_hit")
+                return None
+            ENTITY_CACHE_REQUESTS.inc(model=model.__name__, result="hit")
+            return self._restore(model, data)
+
+        ENTITY_CACHE_REQUESTS.inc(model=model.__name__, result="miss")
+        instance = await load()
+        try:
+            if instance is not None:
+                await self._store.set(key, self._dump(instance), ttl=self._ttl, binary=True)
+            elif self._negative_ttl > 0:
+                await self._store.set(key, self._MISSING, ttl=self._negative_ttl, binary=True)
+        except Exception as error:
+            logger.warning(f"{self._tag}|get(): {key} store failed {error}")
+        return instance
+
+    async def invalidate(self, model: type[models.Model], *ids: Any) -> None:
+        if not ids:
+            return
+        try:
+            await self._store.delete(*(self.key(model, id) for id in ids))
+        except Exception as error:
+            logger.warning(f"{self._tag}|invalidate(): {model.__name__} {len(ids)} ids failed {error}")
+
+
 # repo - operation on the database
 class BaseRepo(Generic[_ModelT]):
     _model: type[_ModelT]
+    # count query sql -> (count, expires at), shared by all repos of the process
+    _counts: ClassVar[dict[str, tuple[int, float]]] = {}
 
-    def __init__(self, model: type[_ModelT]) -> None:
+    def __init__(self, model: type[_ModelT], cache: EntityCache | None = None) -> None:
         self._model = model
+        self._cache = cache
+        if cache is not None:
+            cache.register(model)
 
     @cached_property
     def _tag(self) -> str:
@@ -107,6 +280,10 @@ class BaseRepo(Generic[_ModelT]):
     ) -> _ModelT | None:
         query: queryset.QuerySet[_ModelT] = self._model.filter(id=id)
 
+        # plain lookups only, relations and annotations are not cached
+        if self._cache is not None and not (select_related or prefetch_related or annotations):
+            return await self._cache.get(self._model, id, load=query.first)
+
         # Apply select_related (JOINs for foreign keys)
         if select_related:
             if isinstance(select_related, str):
@@ -242,6 +419,122 @@ class BaseRepo(Generic[_ModelT]):
 
         return results, meta
 
+    @staticmethod
+    def encode_cursor(instance: Base) -> str:
+        raw = json.dumps([instance.created_at.isoformat(), str(instance.id)]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+        """
+        Raises:
+            ValueError: Malformed cursor
+        """
+        try:
+            created_at, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return datetime.fromisoformat(created_at), uuid.UUID(id)
+        except (ValueError, TypeError) as error:
+            raise ValueError("Invalid cursor") from error
+
+    async def estimate_count(self, *args: Any, **kwargs: Any) -> tuple[int, bool]:
+        """
+        Row count without a scan per page: table statistics on MySQL when unfiltered,
+        otherwise an exact count reused for `db_count_cache_seconds`.
+        Returns:
+            (count, estimated) - estimated is True unless counted just now
+        """
+        if not args and not kwargs and self._model._meta.db.capabilities.dialect == "mysql":
+            rows = await self._model._meta.db.execute_query_dict(
+                "SELECT TABLE_ROWS AS n FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [self._model._meta.db_table],
+            )
+            if rows and rows[0]["n"] is not None:
+                return int(rows[0]["n"]), True
+
+        query = self._model.filter(*args, **kwargs).count()
+        key = query.sql()
+        now = time.monotonic()
+        cached = self._counts.get(key)
+        if cached is not None and cached[1] > now:
+            return cached[0], True
+        total = await query
+        if settings.db_count_cache_seconds > 0:
+            if len(self._counts) > 1024:
+                for stale in [k for k, v in self._counts.items() if v[1] <= now]:
+                    del self._counts[stale]
+            self._counts[key] = (total, now + settings.db_count_cache_seconds)
+        return total, False
+
+    async def paginate(
+        self,
+        *args: Any,
+        cursor: str | None = None,
+        page_size: int = 10,
+        ascending: bool = False,
+        with_total: bool = False,
+        select_related: str | list[str] | None = None,
+        prefetch_related: str | list[str] | None = None,
+        annotations: dict[str, Any] | None = None,
+        **kwargs: Any
+    ) -> tuple[list[_ModelT], dict[str, Any]]:
+        """
+        Keyset pagination over (created_at, id), newest first unless `ascending`.
+        Each page is a range scan of the created_at index (InnoDB secondary indexes
+        carry the primary key) starting at the cursor, so deep pages cost the same
+        as the first. Only for models based on `Base`.
+        Args:
+            cursor: `next_cursor` of the previous page, None for the first page
+            page_size: Rows per page
+            ascending: Oldest first
+            with_total: Add an approximate total (see estimate_count)
+        Returns:
+            (rows, meta) - meta carries cursor, next_cursor, has_more, page_size and total
+        Raises:
+            ValueError: Malformed cursor
+        """
+        query: queryset.QuerySet[_ModelT] = self._model.filter(*args, **kwargs)
+
+        if select_related:
+            if isinstance(select_related, str):
+                select_related = [select_related]
+            query = query.select_related(*select_related)
+
+        if prefetch_related:
+            if isinstance(prefetch_related, str):
+                prefetch_related = [prefetch_related]
+            query = query.prefetch_related(*prefetch_related)
+
+        if annotations:
+            query = query.annotate(**annotations)
+
+        if cursor:
+            created_at, id = self.decode_cursor(cursor)
+            if ascending:
+                query = query.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=id))
+            else:
+                query = query.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id))
+
+        order_fields = ("created_at", "id") if ascending else ("-created_at", "-id")
+        # one extra row tells whether another page exists
+        results: list[_ModelT] = await query.order_by(*order_fields).limit(page_size + 1)
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        total, estimated = await self.estimate_count(*args, **kwargs) if with_total else (None, None)
+        meta: dict[str, Any] = {
+            "page": None,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": None,
+            "total_estimated": estimated,
+            "cursor": cursor,
+            "next_cursor": self.encode_cursor(results[-1]) if has_more else None,
+            "has_more": has_more,
+        }
+
+        return results, meta
+
     async def first(
         self,
         *args: Any,
@@ -273,26 +566,221 @@ class BaseRepo(Generic[_ModelT]):
 
         return await query.first()
 
+    async def iterate_chunks(
+        self,
+        *args: Any,
+        chunk_size: int = 1000,
+        row_format: RowFormat = RowFormat.MODEL,
+        fields: Sequence[str] | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[list[Any]]:
+        """
+        Walk all matching rows in primary-key order, one query per chunk
+        (`id > last id LIMIT chunk_size`), so memory stays at one chunk however
+        large the table is and no query holds a long-running cursor.
+        Rows inserted behind the walk are skipped, rows deleted ahead of it are not returned.
+        Args:
+            chunk_size: Rows per query
+            row_format: Model instances or a projection (dicts, tuples, records, columns)
+            fields: Columns for projected rows, all db fields by default
+        """
+        names = list(fields or self._model._meta.db_fields)
+        # the key is always fetched to continue the walk
+        columns = [*names, "id"] if "id" not in names else names
+        query: queryset.QuerySet[_ModelT] = self._model.filter(*args, **kwargs).order_by("id")
+        last_id: Any = None
+
+        while True:
+            chunk_query = query.filter(id__gt=last_id) if last_id is not None else query
+            chunk_query = chunk_query.limit(chunk_size)
+            if row_format == RowFormat.MODEL:
+                rows: list[Any] = await chunk_query
+                if not rows:
+                    return
+                last_id = rows[-1].id
+            else:
+                rows = await chunk_query.values(*columns)
+                if not rows:
+                    return
+                last_id = rows[-1]["id"]
+                if row_format == RowFormat.DICT and len(columns) > len(names):
+                    for row in rows:
+                        del row["id"]
+
+            fetched = len(rows)
+            yield rows if row_format == RowFormat.MODEL else shape_rows(self._model, names, rows, row_format)
+            if fetched < chunk_size:
+                return
+
+    async def iterate(
+        self,
+        *args: Any,
+        chunk_size: int = 1000,
+        row_format: RowFormat = RowFormat.MODEL,
+        fields: Sequence[str] | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Row by row over iterate_chunks(), e.g. as the source of a StreamingResponse.
+        """
+        if row_format == RowFormat.COLUMNS:
+            raise ValueError("Column projections come in chunks, use iterate_chunks()")
+        async for rows in self.iterate_chunks(
+            *args, chunk_size=chunk_size, row_format=row_format, fields=fields, **kwargs
+        ):
+            for row in rows:
+                yield row
+
+    async def project(
+        self,
+        *args: Any,
+        fields: Sequence[str],
+        row_format: RowFormat = RowFormat.RECORD,
+        sort: str | None = None,
+        offset: int | None = None,
+        limit: int | None = None,
+        **kwargs: Any
+    ) -> list[Any] | dict[str, list[Any]]:
+        """
+        Read-only rows holding just `fields`, for list endpoints and exports.
+        Only those columns are selected and no model instance is built: records are
+        named tuples (`row.name`), columns are one list per field. Related fields
+        use the ORM path syntax (`owner__name`).
+        Args:
+            fields: Columns to select, in result order
+            row_format: Records, tuples, dicts or columns
+            sort: Comma separated order fields, `-` for descending
+        """
+        if row_format == RowFormat.MODEL:
+            raise ValueError("Projection cannot produce model rows, use all()")
+        query: queryset.QuerySet[_ModelT] = self._model.filter(*args, **kwargs)
+        if sort:
+            query = query.order_by(*(field.strip() for field in sort.split(",")))
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return shape_rows(self._model, fields, await query.values(*fields), row_format)
+
     async def filter_existing_ids(self, ids: list[uuid.UUID]) -> list[uuid.UUID]:
         return await self._model.filter(id__in=ids).values_list("id", flat=True)
 
+    def _instance(self, obj: _ModelT | dict[str, Any]) -> _ModelT:
+        return self._model(**obj) if isinstance(obj, dict) else obj
+
+    def _report(self, operation: str, rows: int, chunks: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        model = self._model.__name__
+        DB_BULK_ROWS.inc(rows, model=model, operation=operation)
+        DB_BULK_ROWS_PER_SECOND.set(rate, model=model, operation=operation)
+        logger.info(
+            f"{self._tag}|{operation}(): model={model} rows={rows} chunks={chunks} "
+            f"seconds={elapsed:.3f} rows_per_second={rate:.0f}"
+        )
+
+    async def _write_chunks(
+        self,
+        operation: str,
+        objects: Iterable[_ModelT | dict[str, Any]],
+        batch_size: int,
+        write: Callable[[list[_ModelT], Any], Awaitable[None]],
+        written: list[_ModelT] | None = None,
+    ) -> int:
+        """
+        Consume `objects` lazily, `batch_size` at a time; each chunk is written by
+        `write(chunk, connection)` in its own transaction, so a failure rolls back only that chunk.
+        Written instances are collected into `written` when given, otherwise memory stays at one chunk.
+        """
+        started = time.perf_counter()
+        rows = chunks = 0
+        for batch in itertools.batched(objects, batch_size):
+            chunk = [self._instance(obj) for obj in batch]
+            async with in_transaction(self._model._meta.default_connection) as connection:
+                await write(chunk, connection)
+            if self._cache is not None:
+                await self._cache.invalidate(self._model, *(obj.pk for obj in chunk if obj.pk is not None))
+            if written is not None:
+                written.extend(chunk)
+            rows += len(chunk)
+            chunks += 1
+        self._report(operation, rows, chunks, started)
+        return rows
+
+    def _with_updated_at(self, update_fields: Sequence[str]) -> list[str]:
+        fields_ = list(update_fields)
+        # auto_now is applied by save() only
+        if "updated_at" in self._model._meta.fields_map and "updated_at" not in fields_:
+            fields_.append("updated_at")
+        return fields_
+
     async def bulk_create(
         self,
         objects: Iterable[_ModelT | dict[str, Any]],
-        ignore_conflicts: bool = False
+        ignore_conflicts: bool = False,
+        batch_size: int = 1000,
     ) -> list[_ModelT]:
+        """
+        Multi-row INSERT per chunk of `batch_size`, one transaction per chunk.
+        Accepts any iterable (generators included) of instances or field dicts.
+        """
 
-        if isinstance(next(iter(objects)), dict):
-            model_instances = [self._model(**obj) for obj in objects]  # type: ignore
-        else:
-            model_instances = list(objects)
+        async def write(chunk: list[_ModelT], connection: Any) -> None:
+            await self._model.bulk_create(chunk, ignore_conflicts=ignore_conflicts, using_db=connection)
 
-        await self._model.bulk_create(
-            model_instances,
-            ignore_conflicts=ignore_conflicts
-        )
+        written: list[_ModelT] = []
+        await self._write_chunks("bulk_create", objects, batch_size, write, written=written)
+        return written
 
-        return model_instances
+    async def bulk_upsert(
+        self,
+        objects: Iterable[_ModelT | dict[str, Any]],
+        update_fields: Sequence[str],
+        conflict_fields: Sequence[str] = ("id",),
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        Insert, or update `update_fields` of rows that already exist
+        (INSERT ... ON DUPLICATE KEY UPDATE on MySQL, keyed by any unique index;
+        `conflict_fields` names the key for backends that need it).
+        Returns:
+            Rows sent
+        """
+        update_fields = self._with_updated_at(update_fields)
+        now = datetime.now(UTC)
+
+        async def write(chunk: list[_ModelT], connection: Any) -> None:
+            if "updated_at" in update_fields:
+                for instance in chunk:
+                    instance.updated_at = now
+            await self._model.bulk_create(
+                chunk, update_fields=update_fields, on_conflict=list(conflict_fields), using_db=connection
+            )
+
+        return await self._write_chunks("bulk_upsert", objects, batch_size, write)
+
+    async def bulk_update(
+        self,
+        objects: Iterable[_ModelT],
+        fields: Sequence[str],
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        Write `fields` of existing instances with one multi-row UPDATE (CASE id WHEN ...)
+        per chunk instead of a save() per row.
+        Returns:
+            Rows sent
+        """
+        fields = self._with_updated_at(fields)
+        now = datetime.now(UTC)
+
+        async def write(chunk: list[_ModelT], connection: Any) -> None:
+            if "updated_at" in fields:
+                for instance in chunk:
+                    instance.updated_at = now
+            await self._model.bulk_update(chunk, fields=fields, using_db=connection)
+
+        return await self._write_chunks("bulk_update", objects, batch_size, write)
 
     # async def update(self, instance: _ModelT, **kwargs: Any) -> _ModelT | None:
     #     for attr, value in kwargs.items():
@@ -331,7 +819,13 @@ class BaseRepo(Generic[_ModelT]):
         return False
 
     async def delete_by_filter(self, *args: Any, **kwargs: Any) -> int:
-        return await self._model.filter(*args, **kwargs).delete()
+        query = self._model.filter(*args, **kwargs)
+        if self._cache is None:
+            return await query.delete()
+        ids = await query.values_list("id", flat=True)
+        deleted = await self._model.filter(id__in=ids).delete() if ids else 0
+        await self._cache.invalidate(self._model, *ids)
+        return deleted
 
 
 # schema - request + response + validation
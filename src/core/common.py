@@ -1,8 +1,13 @@
 import hashlib
 import json
 import re
+import secrets
+import threading
+import time
+import uuid
 from collections.abc import Mapping, Sequence
 from datetime import UTC, datetime
+from functools import cache
 from pathlib import Path
 from typing import Any, TypeVar
 from urllib.parse import urlparse
@@ -18,7 +23,9 @@ T = TypeVar("T")
 VarTuple = tuple[V] | tuple[V, V] | tuple[V, V, V]
 
 
+@cache
 def get_app_version() -> str:
+    # fixed for the life of the process
     try:
         with open("pyproject.toml") as f:
             data = toml.load(f)
@@ -136,3 +143,30 @@ def safe_filename(title: str, ext: str = "mp4") -> Path:
     safe_title = safe_title[:150]
 
     return Path(f"{safe_title}.{ext}")
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last: tuple[int, int] = (0, 0)  # (unix ms, 12-bit sequence) of the last id
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit unix milliseconds, a 12-bit
+    sequence, 62 random bits. Ids from one process strictly increase, also
+    within a millisecond and if the clock steps back; across processes they
+    are ordered to the millisecond.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        now_ms = time.time_ns() // 1_000_000
+        last_ms, last_seq = _uuid7_last
+        if now_ms > last_ms:
+            # random start, half the range left for ids in the same millisecond
+            ms, seq = now_ms, secrets.randbits(11)
+        elif last_seq < 0xFFF:
+            ms, seq = last_ms, last_seq + 1
+        else:
+            ms, seq = last_ms + 1, 0
+        _uuid7_last = (ms, seq)
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | seq << 64 | 0b10 << 62 | secrets.randbits(62)
+    return uuid.UUID(int=value)
@@ -5,13 +5,17 @@ from urllib.parse import quote_plus
 from pydantic import Field, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from .type import Env
+from .type import AdmissionPolicy, CacheSerializer, Env, QueueBackend, RateLimitAlgorithm, SafetyMode
 
 
 class Settings(BaseSettings):
     # core
     env: Annotated[Env, Field(description="Application environment")]
     debug: Annotated[bool, Field(description="Enable debug mode")]
+    api_keys: Annotated[
+        dict[str, str],
+        Field(default_factory=dict, description="SHA-256 hex digest of an API key -> tenant it authenticates"),
+    ]
     # db
     db_schema: Annotated[str, Field(description="Database schema")]
     db_host: Annotated[str, Field(description="Database host")]
@@ -20,12 +24,184 @@ class Settings(BaseSettings):
     db_user: Annotated[str, Field(description="Database user")]
     db_password: Annotated[str, Field(description="Database password")]
     db_root_password: Annotated[str, Field(description="Root database password")]
+    db_count_cache_seconds: Annotated[
+        float, Field(default=30.0, ge=0, description="Reuse filtered row counts for cursor pages this long")
+    ]
+    db_entity_cache_ttl_seconds: Annotated[int, Field(default=300, gt=0, description="Cached rows by primary key")]
+    db_entity_cache_negative_ttl_seconds: Annotated[
+        int, Field(default=30, ge=0, description="Cached misses by primary key, 0 = off")
+    ]
+    db_pool_min_size: Annotated[int, Field(default=1, ge=0, description="Connections kept open per pool")]
+    db_pool_max_size: Annotated[
+        # run_migration() holds one connection for its lock while the upgrade transaction takes another
+        int, Field(default=10, ge=2, description="Connection cap per pool, startup migrations need 2")
+    ]
+    db_connect_timeout_seconds: Annotated[float, Field(default=5.0, gt=0, description="New connection timeout")]
+    db_pool_recycle_seconds: Annotated[
+        int, Field(default=3600, ge=-1, description="Reopen pooled connections older than this, -1 = never")
+    ]
+    db_replica_hosts: Annotated[
+        list[str], Field(default_factory=list, description="Read replicas as host or host:port, empty = primary only")
+    ]
+    db_read_your_writes_seconds: Annotated[
+        float, Field(default=2.0, ge=0, description="Reads stay on the primary this long after a write in a request")
+    ]
+    db_migration_lock_timeout_seconds: Annotated[
+        int, Field(default=120, gt=0, description="Wait for another replica's startup migration this long")
+    ]
+    db_slow_query_ms: Annotated[float, Field(default=200.0, ge=0, description="Log statements slower than this")]
+    db_n_plus_one_threshold: Annotated[
+        int, Field(default=10, ge=0, description="Flag a statement shape repeated this often in one request, 0 = off")
+    ]
     # cache
     cache_schema: Annotated[str, Field(description="Cache schema")]
     cache_host: Annotated[str, Field(description="Cache host")]
     cache_port: Annotated[int, Field(description="Cache port")]
     cache_user: Annotated[str, Field(description="Cache user")]
     cache_password: Annotated[str, Field(description="Cache password")]
+    cache_pool_max_connections: Annotated[int, Field(default=64, gt=0, description="Cache connection pool size")]
+    cache_pool_timeout_seconds: Annotated[
+        float, Field(default=5.0, gt=0, description="Max wait for a free pooled connection")
+    ]
+    cache_socket_timeout_seconds: Annotated[
+        float, Field(default=10.0, gt=0, description="Cache command timeout, keep above queue_block_ms")
+    ]
+    cache_socket_connect_timeout_seconds: Annotated[
+        float, Field(default=2.0, gt=0, description="Cache connect timeout")
+    ]
+    cache_health_check_interval_seconds: Annotated[
+        int, Field(default=30, ge=0, description="Ping idle pooled connections before reuse after this long")
+    ]
+    cache_serializer: Annotated[
+        CacheSerializer, Field(default=CacheSerializer.MSGPACK, description="Binary value serializer: raw|msgpack")
+    ]
+    cache_compress_threshold_bytes: Annotated[
+        int, Field(default=16_384, ge=0, description="zstd-compress binary values at least this large, 0 = never")
+    ]
+    cache_compress_level: Annotated[int, Field(default=3, ge=1, le=22, description="zstd compression level")]
+    near_cache_enabled: Annotated[bool, Field(default=True, description="Keep hot cache keys in process memory")]
+    near_cache_max_entries: Annotated[int, Field(default=10_000, gt=0, description="In-process cache tier size")]
+    near_cache_ttl_seconds: Annotated[
+        float, Field(default=30.0, gt=0, description="Max local lifetime, also bounds missed invalidations")
+    ]
+    near_cache_channel: Annotated[str, Field(default="cache:invalidate", description="Invalidation channel")]
+    # health
+    health_snapshot_ttl_seconds: Annotated[
+        float, Field(default=2.0, ge=0, description="Serve health results from a snapshot this old at most")
+    ]
+    health_probe_timeout_seconds: Annotated[float, Field(default=1.0, gt=0, description="Per-probe timeout")]
+    health_ready_max_queue_depth: Annotated[
+        int, Field(default=0, ge=0, description="Not ready above this many queued jobs, 0 = no limit")
+    ]
+    # image
+    image_safety_mode: Annotated[
+        SafetyMode, Field(default=SafetyMode.INLINE, description="Safety checker stage: inline|deferred|disabled")
+    ]
+    image_safety_batch_size: Annotated[int, Field(default=8, gt=0, description="Max images per deferred check")]
+    image_safety_batch_wait_ms: Annotated[
+        int, Field(default=200, ge=0, description="Max wait to fill a deferred safety batch")
+    ]
+    image_safety_workers: Annotated[int, Field(default=1, gt=0, description="Deferred safety check pool size")]
+    image_trusted_tenants: Annotated[
+        list[str], Field(default_factory=list, description="API key tenants whose images skip the safety checker")
+    ]
+    image_adaptive_threshold: Annotated[
+        float, Field(default=0.02, gt=0, description="Default relative latent change for adaptive early stop")
+    ]
+    image_adaptive_min_steps: Annotated[int, Field(default=8, gt=0, description="Steps before adaptive stop")]
+    image_adaptive_patience: Annotated[
+        int, Field(default=2, gt=0, description="Consecutive converged steps before adaptive stop")
+    ]
+    image_deepcache_interval: Annotated[
+        int, Field(default=0, ge=0, description="DeepCache refresh interval in steps, 0/1 = off")
+    ]
+    image_tome_ratio: Annotated[
+        float, Field(default=0.0, ge=0, lt=1, description="Token merging ratio for self-attention, 0 = off")
+    ]
+    image_tome_levels: Annotated[
+        int, Field(default=1, gt=0, description="Highest-resolution attention levels that merge tokens")
+    ]
+    image_idempotency_ttl_seconds: Annotated[
+        int, Field(default=600, ge=0, description="Keep results of Idempotency-Key requests for retries")
+    ]
+    # image admission (cost units = steps x pixels / 512^2)
+    image_admission_policy: Annotated[
+        AdmissionPolicy, Field(default=AdmissionPolicy.REJECT, description="Over-budget requests: reject|downgrade")
+    ]
+    image_admission_request_units: Annotated[
+        float, Field(default=60.0, gt=0, description="Max cost units of a single request")
+    ]
+    image_admission_tenant_units: Annotated[
+        float, Field(default=120.0, gt=0, description="Max in-flight cost units per tenant")
+    ]
+    image_admission_global_units: Annotated[
+        float, Field(default=480.0, gt=0, description="Max in-flight cost units per replica")
+    ]
+    image_admission_min_steps: Annotated[int, Field(default=10, gt=0, description="Lowest steps of a downgrade")]
+    image_admission_min_side: Annotated[int, Field(default=256, gt=0, description="Lowest side of a downgrade")]
+    image_cost_seconds_per_unit: Annotated[
+        float, Field(default=1.0, gt=0, description="Initial cost model estimate, learned from observed runs")
+    ]
+    image_cost_alpha: Annotated[
+        float, Field(default=0.2, gt=0, le=1, description="Cost model smoothing of new observations")
+    ]
+    image_history_enabled: Annotated[
+        bool, Field(default=True, description="Record finished generations for search and reuse")
+    ]
+    image_reuse_matches: Annotated[
+        int, Field(default=5, gt=0, description="Past generations returned with a reuse request")
+    ]
+    image_reuse_min_relevance: Annotated[
+        float,
+        Field(
+            default=0.0,
+            ge=0,
+            description="Full-text relevance a different prompt needs to be served by reuse=instead, 0 = exact only",
+        ),
+    ]
+    # rate limit (cost units per tenant/ip and route, shared by all replicas through the cache)
+    rate_limit_enabled: Annotated[bool, Field(default=True, description="Enable rate limiting")]
+    rate_limit_algorithm: Annotated[
+        RateLimitAlgorithm,
+        Field(default=RateLimitAlgorithm.TOKEN_BUCKET, description="Rate limit: token_bucket|sliding_window"),
+    ]
+    rate_limit_units: Annotated[float, Field(default=240.0, gt=0, description="Cost units allowed per window")]
+    rate_limit_window_seconds: Annotated[int, Field(default=60, gt=0, description="Rate limit window")]
+    rate_limit_cache_timeout_ms: Annotated[
+        int, Field(default=50, gt=0, description="Cache call timeout before the local fallback is used")
+    ]
+    rate_limit_fallback_seconds: Annotated[
+        int, Field(default=10, ge=0, description="Stay on the local fallback this long after a cache failure")
+    ]
+    # job queue
+    queue_backend: Annotated[
+        QueueBackend, Field(default=QueueBackend.MEMORY, description="Job queue backend: memory|redis")
+    ]
+    queue_inline_worker: Annotated[
+        bool, Field(default=False, description="Also consume the redis queue inside the API process")
+    ]
+    queue_stream: Annotated[str, Field(default="image:jobs", description="Job stream key")]
+    queue_group: Annotated[str, Field(default="image-workers", description="Job stream consumer group")]
+    queue_max_len: Annotated[
+        int, Field(default=10_000, gt=0, description="Max queued + running jobs, submits beyond get 503")
+    ]
+    queue_block_ms: Annotated[int, Field(default=5_000, gt=0, description="Worker blocking read timeout")]
+    queue_claim_idle_ms: Annotated[
+        int, Field(default=300_000, gt=0, description="Reclaim jobs pending this long on a crashed worker")
+    ]
+    queue_max_attempts: Annotated[int, Field(default=3, gt=0, description="Deliveries before a job fails")]
+    queue_result_ttl_seconds: Annotated[int, Field(default=86_400, gt=0, description="Keep job records this long")]
+    # job progress
+    progress_channel_prefix: Annotated[str, Field(default="image:progress", description="Progress channel prefix")]
+    progress_buffer_size: Annotated[
+        int, Field(default=8, gt=0, description="Events buffered per connection before steps are dropped")
+    ]
+    progress_publish_max_inflight: Annotated[
+        int, Field(default=64, gt=0, description="Outstanding publishes before steps are dropped")
+    ]
+    progress_heartbeat_seconds: Annotated[
+        int, Field(default=15, gt=0, description="Event stream keep-alive and job record re-check interval")
+    ]
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -41,6 +217,11 @@ class Settings(BaseSettings):
     def is_prod(self) -> bool:
         return self.env == Env.PROD
 
+    @cached_property
+    def runs_worker(self) -> bool:
+        # memory queue jobs never leave this process; with redis only an inline worker runs them here
+        return self.queue_backend == QueueBackend.MEMORY or self.queue_inline_worker
+
     @cached_property
     def db_url(self) -> str:
         return f"{self.db_schema}://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
@@ -98,3 +98,15 @@ FORMAT_FIELDS = [
 ]
 
 IMAGE_PRETRAINED_MODEL = "runwayml/stable-diffusion-v1-5"
+
+API_KEY_HEADER = "X-API-Key"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# hard request limits, the cost budgets in settings apply below these
+IMAGE_MAX_STEPS = 150
+IMAGE_MIN_SIDE = 64
+IMAGE_MAX_SIDE = 2048
+IMAGE_SEARCH_MAX_PAGE_SIZE = 100
+# one cost unit = one denoising step at 512x512
+IMAGE_COST_UNIT_PIXELS = 512 * 512
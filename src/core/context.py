@@ -0,0 +1,62 @@
+import re
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# set per request by the request context middleware
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def statement_shape(sql: str) -> str:
+    """
+    The statement with literals and IN lists folded, so lookups that differ only by value compare equal.
+    """
+    shape = _NUMBER.sub("?", _STRING.sub("?", sql))
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """
+    Statements issued while serving one request.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    # (seconds, statement), slowest first, at most `keep_slowest`
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+    shapes: Counter[str] = field(default_factory=Counter)
+    # shapes already reported as repeated
+    flagged: set[str] = field(default_factory=set)
+    keep_slowest: int = 5
+    # monotonic time of the last write, reads shortly after it stay on the primary
+    wrote_at: float | None = None
+
+    def add(self, sql: str, seconds: float) -> int:
+        """
+        Returns:
+            How many times this statement shape ran in the request so far
+        """
+        self.count += 1
+        self.seconds += seconds
+        if len(self.slowest) < self.keep_slowest or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.keep_slowest:]
+        shape = statement_shape(sql)
+        self.shapes[shape] += 1
+        return self.shapes[shape]
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
@@ -38,6 +38,7 @@ class Error(Exception, BaseMixin):
         details: list[ErrorDetail] | None = None,
         retry_able: bool = False,
         timestamp: str | None = None,
+        headers: dict[str, str] | None = None,
     ) -> None:
         super().__init__()
         self.status = status
@@ -47,6 +48,8 @@ class Error(Exception, BaseMixin):
         self.details = details
         self.retry_able = retry_able
         self.timestamp = timestamp or utc_iso_timestamp()
+        # response headers only, not part of the body
+        self.headers = headers
 
     def __str__(self) -> str:
         return (
@@ -78,6 +81,7 @@ class Error(Exception, BaseMixin):
         return JSONResponse(
             content=self.to_json(),
             status_code=self.code.value,
+            headers=self.headers,
         )
 
     @classmethod
@@ -164,6 +168,65 @@ class Error(Exception, BaseMixin):
             ] if details else None
         )
 
+    @classmethod
+    def payload_too_large(
+        cls: type["Error"],
+        message: str | None = None,
+        details: list[str] | None = None
+    ) -> "Error":
+        return cls(
+            code=Code.REQUEST_ENTITY_TOO_LARGE,
+            message=message or "Request too large.",
+            type=ErrorType.PAYLOAD_TOO_LARGE,
+            details=[
+                ErrorDetail(
+                    description=d
+                )
+                for d in details
+            ] if details else None
+        )
+
+    @classmethod
+    def too_many_requests(
+        cls: type["Error"],
+        message: str | None = None,
+        details: list[str] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> "Error":
+        return cls(
+            code=Code.TOO_MANY_REQUESTS,
+            message=message or "Too many requests, retry later.",
+            type=ErrorType.RATE_LIMITED,
+            details=[
+                ErrorDetail(
+                    description=d
+                )
+                for d in details
+            ] if details else None,
+            retry_able=True,
+            headers=headers,
+        )
+
+    @classmethod
+    def service_unavailable(
+        cls: type["Error"],
+        message: str | None = None,
+        details: list[str] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> "Error":
+        return cls(
+            code=Code.SERVICE_UNAVAILABLE,
+            message=message or "Service unavailable, retry later.",
+            type=ErrorType.SERVICE_UNAVAILABLE,
+            details=[
+                ErrorDetail(
+                    description=d
+                )
+                for d in details
+            ] if details else None,
+            retry_able=True,
+            headers=headers,
+        )
 
     @classmethod
     def process_exception(
@@ -1,10 +1,12 @@
 import threading
+from abc import ABCMeta
 from typing import Any, TypeVar
 
 _T = TypeVar("_T")
 
 
-class SingletonMeta(type):
+class SingletonMeta(ABCMeta):
+    # ABCMeta so singletons can implement abstract bases
     _instances: dict[type, Any] = {}
     _lock: threading.Lock = threading.Lock()
 
@@ -0,0 +1,38 @@
+import uuid
+from typing import Any
+
+from tortoise import fields, models
+
+from .common import uuid7
+
+
+class BinaryUUIDField(fields.Field[uuid.UUID], uuid.UUID):
+    """
+    UUID stored as its 16 raw bytes (BINARY(16)) instead of CHAR(36).
+    Primary keys default to uuid7(), whose bytes sort by creation time, so inserts
+    append to the clustered index and every secondary index entry carries 16 bytes
+    of key instead of 36. Reads and filters take UUID objects, canonical strings or bytes.
+    """
+
+    SQL_TYPE = "BINARY(16)"
+
+    def __init__(self, **kwargs: Any) -> None:
+        if (kwargs.get("primary_key") or kwargs.get("pk", False)) and "default" not in kwargs:
+            kwargs["default"] = uuid7
+        super().__init__(**kwargs)
+
+    def to_db_value(self, value: Any, instance: type[models.Model] | models.Model) -> bytes | None:
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        if isinstance(value, bytes | bytearray | memoryview):
+            return bytes(value)
+        return uuid.UUID(str(value)).bytes
+
+    def to_python_value(self, value: Any) -> uuid.UUID | None:
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, bytes | bytearray | memoryview):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(str(value))
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class _Flight(Generic[_T]):
+    __slots__ = ("task", "ttl", "expires_at")
+
+    def __init__(self, task: asyncio.Task[_T], ttl: float) -> None:
+        self.task = task
+        self.ttl = ttl
+        self.expires_at: float | None = None
+
+
+class SingleFlight(Generic[_T]):
+    """
+    Coalesces concurrent calls with the same key into one execution.
+    The first caller starts the work as a task, later callers with the key await
+    the same task. The work is shielded: a cancelled caller does not cancel it
+    for the others. Successful results can be kept for `ttl` seconds after
+    completion (e.g. for health snapshots); failures are never kept.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight[_T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.expires_at is not None and flight.expires_at <= now
+        ]
+        for key in expired:
+            del self._flights[key]
+
+    def _on_done(self, key: str, flight: _Flight[_T]) -> None:
+        if self._flights.get(key) is not flight:
+            return
+        if flight.task.cancelled() or flight.task.exception() is not None or flight.ttl <= 0:
+            del self._flights[key]
+        else:
+            flight.expires_at = time.monotonic() + flight.ttl
+
+    async def do(self, key: str, work: Callable[[], Awaitable[_T]], ttl: float = 0.0) -> tuple[_T, bool]:
+        """
+        Run `work` once per key.
+        Args:
+            key: Coalescing key
+            work: Coroutine factory, only called by the first caller
+            ttl: Keep a successful result this long after completion; joining callers can extend it
+        Returns:
+            (result, shared) - shared is True when another caller's execution was reused
+        """
+        self._purge(time.monotonic())
+
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(work()), ttl)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, flight=flight: self._on_done(key, flight))
+        elif ttl > flight.ttl:
+            flight.ttl = ttl
+            if flight.expires_at is not None:
+                flight.expires_at = time.monotonic() + ttl
+
+        return await asyncio.shield(flight.task), shared
@@ -3,7 +3,18 @@ from collections.abc import Awaitable, Callable
 
 from fastapi import FastAPI, Request, Response
 
+from src.core.constant import REQUEST_ID_HEADER
+from src.core.context import QueryStats, new_request_id, query_stats, request_id
 from src.core.format import format_duration
+from src.core.metric import registry
+
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements issued per request",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+_MAX_REQUEST_ID_LENGTH = 128
 
 
 def init_process_time_tracing(app: FastAPI) -> None:
@@ -18,3 +29,34 @@ def init_process_time_tracing(app: FastAPI) -> None:
 
         response.headers["X-Process-Time"] = format_duration(elapsed)
         return response
+
+
+def init_request_context(app: FastAPI) -> None:
+    """
+    Every request gets an id (the caller's `X-Request-ID` when sane, otherwise
+    a new one), echoed in the response and visible to logs through `request_id`.
+    SQL issued while serving it is totalled in a `Server-Timing: db` entry.
+    """
+
+    @app.middleware("http")
+    async def add_request_context(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        current_id = incoming if 0 < len(incoming) <= _MAX_REQUEST_ID_LENGTH else new_request_id()
+        stats = QueryStats()
+        id_token = request_id.set(current_id)
+        stats_token = query_stats.set(stats)
+        try:
+            response: Response = await call_next(request)
+        finally:
+            request_id.reset(id_token)
+            query_stats.reset(stats_token)
+
+        REQUEST_QUERIES.observe(stats.count)
+        timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+        response.headers[REQUEST_ID_HEADER] = current_id
+        return response
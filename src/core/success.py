@@ -13,10 +13,15 @@ _T = TypeVar("_T")
 
 
 class Meta(BaseSchema):
-    page: Annotated[int, Field(default=1)] = 1
+    # offset pages set page/total/total_pages, cursor pages set cursor/next_cursor/has_more (page fields None)
+    page: Annotated[int | None, Field(default=1)] = 1
     page_size: Annotated[int, Field(default=10)] = 10
-    total: Annotated[int, Field(default=100)] = 100
-    total_pages: Annotated[int, Field(default=10)] = 10
+    total: Annotated[int | None, Field(default=100)] = 100
+    total_pages: Annotated[int | None, Field(default=10)] = 10
+    total_estimated: Annotated[bool | None, Field(default=None, description="total is approximate")] = None
+    cursor: Annotated[str | None, Field(default=None, description="Cursor of this page")] = None
+    next_cursor: Annotated[str | None, Field(default=None, description="Pass as cursor for the next page")] = None
+    has_more: Annotated[bool | None, Field(default=None)] = None
 
 
 class Success(BaseSchema, Generic[_T]):
@@ -60,3 +65,14 @@ class Success(BaseSchema, Generic[_T]):
             data=data,
             meta=meta
         )
+
+    @classmethod
+    def accepted(
+        cls: type["Success"], message: str | None = None, data: Any = None, meta: Meta | None = None
+    ) -> "Success":
+        return cls(
+            code=Code.ACCEPTED,
+            message=message,
+            data=data,
+            meta=meta
+        )
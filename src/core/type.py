@@ -64,6 +64,53 @@ class Status(BaseEnum):
     ERROR = "error"
 
 
+class SafetyMode(BaseEnum):
+    INLINE = "inline"  # checked inside the pipeline call, flagged images are blacked out
+    DEFERRED = "deferred"  # returned immediately, checked in background, flagged files quarantined
+    DISABLED = "disabled"  # not checked (trusted internal tenants)
+
+
+class AdmissionPolicy(BaseEnum):
+    REJECT = "reject"  # over-budget requests fail with 429 / 400
+    DOWNGRADE = "downgrade"  # over-budget requests run with fewer steps / a smaller resolution
+
+
+class RateLimitAlgorithm(BaseEnum):
+    TOKEN_BUCKET = "token_bucket"  # bursts up to the limit, refilled continuously
+    SLIDING_WINDOW = "sliding_window"  # weighted previous + current fixed window
+
+
+class RowFormat(BaseEnum):
+    MODEL = "model"  # model instances
+    DICT = "dict"  # {field: value}
+    TUPLE = "tuple"  # values in field order
+    RECORD = "record"  # slotted named tuples, attribute access without model overhead
+    COLUMNS = "columns"  # {field: [values]}, one list per column
+
+
+class CacheSerializer(BaseEnum):
+    RAW = "raw"  # bytes in, bytes out
+    MSGPACK = "msgpack"  # msgpack, numpy arrays as an extension type
+
+
+class QueueBackend(BaseEnum):
+    MEMORY = "memory"  # in-process stand-in, consumed by a worker inside the API process
+    REDIS = "redis"  # redis streams consumer group, consumed by standalone workers
+
+
+class JobStatus(BaseEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ReuseMode(BaseEnum):
+    NONE = "none"  # always generate
+    ALONGSIDE = "alongside"  # generate, return similar past generations with the output
+    INSTEAD = "instead"  # return a past generation of the same request, generate only without one
+
+
 class Code(BaseEnum):
     # 1xx Informational
     CONTINUE = status.HTTP_100_CONTINUE
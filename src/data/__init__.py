@@ -1,33 +1,62 @@
-import asyncio
+import time
+from pathlib import Path
 
+from aerich import Command
+from aerich.migrate import Migrate
+from aerich.models import Aerich
 from fastapi import FastAPI
 from loguru import logger
 from tortoise import Tortoise
 from tortoise.contrib.fastapi import register_tortoise
+from tortoise.exceptions import OperationalError
 
 from src.core.config import settings
+from src.core.format import format_duration
+
+from .router import PRIMARY, REPLICAS
+
+
+def _credentials(host: str, port: int) -> dict:
+    return {
+        "host": host,
+        "port": port,
+        "database": settings.db_name,
+        "user": settings.db_user,
+        "password": settings.db_password,
+        "minsize": settings.db_pool_min_size,
+        "maxsize": settings.db_pool_max_size,
+        "connect_timeout": settings.db_connect_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+def _replica(address: str) -> dict:
+    host, _, port = address.partition(":")
+    return {"engine": "src.data.engine", "credentials": _credentials(host, int(port or settings.db_port))}
+
+
+# aerich app and location, as in [tool.aerich] of pyproject.toml
+MIGRATION_APP = "model"
+MIGRATION_LOCATION = Path(__file__).parent / "migration"
+MIGRATION_LOCK = "tensor:migration"
 
 DB_CONFIG = {
     "connections": {
-        "default": {
-            "engine": "tortoise.backends.mysql",
-            "credentials": {
-                "host": settings.db_host,
-                "port": settings.db_port,
-                "database": settings.db_name,
-                "user": settings.db_user,
-                "password": settings.db_password,
-            }
-        }
+        PRIMARY: {
+            "engine": "src.data.engine",
+            "credentials": _credentials(settings.db_host, settings.db_port),
+        },
+        **{name: _replica(address) for name, address in zip(REPLICAS, settings.db_replica_hosts, strict=True)},
     },
+    "routers": ["src.data.router.ReplicaRouter"] if REPLICAS else [],
     "apps": {
-        "model": {
+        MIGRATION_APP: {
             "models": ["src.data.model"],
-            "default_connection": "default",
+            "default_connection": PRIMARY,
         },
         "aerich": {
             "models": ["aerich.models"],
-            "default_connection": "default",
+            "default_connection": PRIMARY,
         }
     }
 }
@@ -42,30 +71,63 @@ def init_db(app: FastAPI) -> None:
     )
 
 
+async def _pending_migrations() -> tuple[list[str], list[str]]:
+    """
+    (versions in code, versions not yet recorded in the aerich table).
+    """
+    versions = Migrate.get_all_version_files()
+    try:
+        applied = set(await Aerich.filter(app=MIGRATION_APP).values_list("version", flat=True))
+    except OperationalError:
+        # fresh database, no aerich table yet
+        applied = set()
+    return versions, [version for version in versions if version not in applied]
+
+
 async def run_migration() -> None:
-    async def run_command(*args):
-        process = await asyncio.create_subprocess_exec(
-            *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            logger.debug(f"Command {' '.join(args)} failed with error:\n{stderr.decode().strip()}")
-        else:
-            logger.debug(f"Command {' '.join(args)} succeeded:\n{stdout.decode().strip()}")
-
-        return process.returncode
-
-    # Step 1: aerich init-db (only initializes if DB is empty)
-    rc_init = await run_command("aerich", "init-db")
-    if rc_init != 0:
-        logger.warning("Skipping `aerich upgrade` because `aerich init-db` failed.")
+    """
+    Apply pending aerich migrations in-process over the ORM's connections.
+    Boots with the recorded versions matching the code cost one query; otherwise
+    replicas take turns on a MySQL advisory lock and re-check under it, so a
+    replica that waited finds the work done. Failures are logged, not raised.
+    """
+    started = time.perf_counter()
+
+    def took() -> str:
+        return format_duration(time.perf_counter() - started)
+
+    command = Command(tortoise_config=DB_CONFIG, app=MIGRATION_APP, location=str(MIGRATION_LOCATION))
+    Migrate.migrate_location = Migrate.get_migration_dir(str(MIGRATION_LOCATION), MIGRATION_APP)
+
+    try:
+        versions, pending = await _pending_migrations()
+        head = versions[-1] if versions else None
+        if not pending:
+            logger.info(f"Database|run_migration(): up to date at {head} in {took()}")
+            return
+
+        timeout = settings.db_migration_lock_timeout_seconds
+        # the lock is per session: this connection holds it, the upgrade transaction takes a second one
+        async with Tortoise.get_connection(PRIMARY).acquire_connection() as connection, connection.cursor() as cursor:
+            await cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, timeout))
+            (acquired,) = await cursor.fetchone()
+            if acquired != 1:
+                logger.error(f"Database|run_migration(): lock not acquired in {timeout}s, {len(pending)} pending")
+                return
+            locked_at = time.perf_counter()
+            try:
+                migrated = await command.upgrade(run_in_transaction=True)
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+                await cursor.fetchone()
+    except Exception as error:
+        logger.error(f"Database|run_migration(): failed after {took()}: {error}")
         return
 
-    # Step 2: aerich upgrade
-    await run_command("aerich", "upgrade")
+    logger.info(
+        f"Database|run_migration(): applied {migrated or 'nothing, done by another replica'} up to {head}, "
+        f"lock wait {format_duration(locked_at - started)}, total {took()}"
+    )
 
 
 async def get_db_health() -> bool:
@@ -0,0 +1,74 @@
+"""
+SQL for moving existing MariaDB/MySQL tables from CHAR(36) UUID columns (Tortoise
+UUIDField) to BINARY(16) (BinaryUUIDField), for use in an aerich migration:
+
+    async def upgrade(db: BaseDBAsyncClient) -> str:
+        return binary_uuid_sql("image") + binary_uuid_sql("image_tag", "image_id", primary_key=False, indexed=True)
+
+Convert the primary key and every column referencing it in the same migration.
+Foreign key constraints on those columns must be dropped before and added back
+after, the server refuses to drop a column a constraint uses. Existing ids keep
+their (random) value, only rows created afterwards get time-ordered ids.
+The expressions avoid UUID_TO_BIN/BIN_TO_UUID, which MariaDB does not have.
+"""
+
+# canonical string -> 16 bytes, BinaryUUIDField's byte order (no time swap)
+_TO_BINARY = "UNHEX(REPLACE({0}, '-', ''))"
+# 16 bytes -> lower-case canonical string; CONCAT keeps NULL as NULL where CONCAT_WS would give ''
+_TO_CHAR = (
+    "LOWER(CONCAT(SUBSTR(HEX({0}), 1, 8), '-', SUBSTR(HEX({0}), 9, 4), '-', SUBSTR(HEX({0}), 13, 4), '-', "
+    "SUBSTR(HEX({0}), 17, 4), '-', SUBSTR(HEX({0}), 21, 12)))"
+)
+
+
+def _convert(
+    table: str,
+    column: str,
+    definition: str,
+    expression: str,
+    primary_key: bool,
+    nullable: bool,
+    indexed: bool,
+) -> str:
+    staging = f"{column}__new"
+    null = "NULL" if nullable else "NOT NULL"
+    drop = "DROP PRIMARY KEY, " if primary_key else ""
+    keys = ", ADD PRIMARY KEY (`{0}`)" if primary_key else (", ADD INDEX (`{0}`)" if indexed else "")
+    return (
+        f"ALTER TABLE `{table}` ADD COLUMN `{staging}` {definition} NULL AFTER `{column}`;\n"
+        f"UPDATE `{table}` SET `{staging}` = {expression.format(f'`{column}`')};\n"
+        f"ALTER TABLE `{table}` {drop}DROP COLUMN `{column}`;\n"
+        f"ALTER TABLE `{table}` CHANGE COLUMN `{staging}` `{column}` {definition} {null}{keys.format(column)};\n"
+    )
+
+
+def binary_uuid_sql(
+    table: str,
+    column: str = "id",
+    primary_key: bool = True,
+    nullable: bool = False,
+    indexed: bool = False,
+) -> str:
+    """
+    CHAR(36) -> BINARY(16), values kept.
+    Args:
+        table: Table name
+        column: UUID column
+        primary_key: The column is the table's primary key
+        nullable: Keep the column nullable (optional foreign keys)
+        indexed: Recreate a plain index on the column (foreign keys)
+    """
+    return _convert(table, column, "BINARY(16)", _TO_BINARY, primary_key, nullable, indexed)
+
+
+def char_uuid_sql(
+    table: str,
+    column: str = "id",
+    primary_key: bool = True,
+    nullable: bool = False,
+    indexed: bool = False,
+) -> str:
+    """
+    BINARY(16) -> CHAR(36), the downgrade of binary_uuid_sql().
+    """
+    return _convert(table, column, "CHAR(36)", _TO_CHAR, primary_key, nullable, indexed)
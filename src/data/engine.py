@@ -0,0 +1,29 @@
+"""
+Tortoise engine module for MySQL with per-statement instrumentation and pool
+metrics, referenced by `engine` in `DB_CONFIG`.
+"""
+
+from tortoise.backends.base.client import NestedTransactionContext, TransactionContext, TransactionContextPooled
+from tortoise.backends.mysql.client import MySQLClient, TransactionWrapper
+
+from .instrument import InstrumentedClientMixin, MeteredPoolConnectionWrapper, register_pool
+
+
+class InstrumentedMySQLClient(InstrumentedClientMixin, MySQLClient):
+    async def create_connection(self, with_db: bool) -> None:
+        await super().create_connection(with_db)
+        register_pool(self)
+
+    def acquire_connection(self) -> MeteredPoolConnectionWrapper:
+        return MeteredPoolConnectionWrapper(self, self._pool_init_lock)
+
+    def _in_transaction(self) -> TransactionContext:
+        return TransactionContextPooled(InstrumentedTransactionWrapper(self), self._pool_init_lock)
+
+
+class InstrumentedTransactionWrapper(InstrumentedClientMixin, TransactionWrapper):
+    def _in_transaction(self) -> TransactionContext:
+        return NestedTransactionContext(InstrumentedTransactionWrapper(self))
+
+
+client_class = InstrumentedMySQLClient
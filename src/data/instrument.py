@@ -0,0 +1,163 @@
+import time
+from typing import Any
+
+from loguru import logger
+from tortoise.backends.base.client import PoolConnectionWrapper
+
+from src.core.config import settings
+from src.core.context import query_stats, request_id, statement_shape
+from src.core.metric import registry
+
+DB_QUERIES = registry.counter(
+    "db_queries_total",
+    "SQL statements executed",
+    labelnames=("operation",),
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_seconds",
+    "SQL statement latency",
+    labelnames=("operation",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total",
+    "SQL statements slower than db_slow_query_ms",
+    labelnames=("operation",),
+)
+DB_N_PLUS_ONE = registry.counter(
+    "db_n_plus_one_total",
+    "Requests repeating one statement shape at least db_n_plus_one_threshold times",
+)
+DB_POOL_CONNECTIONS = registry.gauge(
+    "db_pool_connections",
+    "Pooled database connections by state",
+    labelnames=("connection", "state"),
+)
+DB_POOL_WAITERS = registry.gauge(
+    "db_pool_waiters",
+    "Callers waiting for a pooled database connection",
+    labelnames=("connection",),
+)
+DB_POOL_WAIT_SECONDS = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time to acquire a pooled database connection",
+    labelnames=("connection",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+_OPERATIONS = {"select", "insert", "update", "delete"}
+_LOG_SQL_CHARS = 500
+
+
+def _operation(sql: str) -> str:
+    keyword = sql.lstrip(" (\n\t").split(None, 1)[0].lower() if sql.strip() else ""
+    return keyword if keyword in _OPERATIONS else "other"
+
+
+def record_query(sql: str, seconds: float) -> None:
+    """
+    Account one statement: metrics, the slow statement log, and the current
+    request's stats (last write time included), where a shape seen
+    `db_n_plus_one_threshold` times is reported once as a likely N+1.
+    """
+    operation = _operation(sql)
+    DB_QUERIES.inc(operation=operation)
+    DB_QUERY_SECONDS.observe(seconds, operation=operation)
+
+    if seconds * 1000 >= settings.db_slow_query_ms:
+        DB_SLOW_QUERIES.inc(operation=operation)
+        logger.warning(
+            f"Database|slow query {seconds * 1000:.1f}ms request={request_id.get()}: {sql[:_LOG_SQL_CHARS]}"
+        )
+
+    stats = query_stats.get()
+    if stats is None:
+        return
+    if operation != "select":
+        stats.wrote_at = time.monotonic()
+    repeats = stats.add(sql, seconds)
+    threshold = settings.db_n_plus_one_threshold
+    if threshold and repeats >= threshold:
+        shape = statement_shape(sql)
+        if shape not in stats.flagged:
+            stats.flagged.add(shape)
+            DB_N_PLUS_ONE.inc()
+            logger.warning(
+                f"Database|possible N+1, {repeats} x same statement request={request_id.get()}: "
+                f"{shape[:_LOG_SQL_CHARS]}"
+            )
+
+
+class MeteredPoolConnectionWrapper(PoolConnectionWrapper):
+    """
+    Times pool checkouts and counts callers waiting for one.
+    """
+
+    __slots__ = ()
+
+    async def __aenter__(self) -> Any:
+        await self.ensure_connection()
+        name = self.client.connection_name
+        start = time.perf_counter()
+        DB_POOL_WAITERS.inc(connection=name)
+        try:
+            self.connection = await self.client._pool.acquire()
+        finally:
+            DB_POOL_WAITERS.dec(connection=name)
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start, connection=name)
+        return self.connection
+
+
+def register_pool(client: Any) -> None:
+    """
+    Export in use, idle and max connections of a pooled client (aiomysql or asyncmy pool).
+    """
+    name = client.connection_name
+
+    def _count(state: str) -> float:
+        pool = client._pool
+        if pool is None:
+            return 0.0
+        if state == "max":
+            return float(pool.maxsize)
+        if state == "idle":
+            return float(pool.freesize)
+        return float(pool.size - pool.freesize)
+
+    for state in ("in_use", "idle", "max"):
+        DB_POOL_CONNECTIONS.set_function(lambda state=state: _count(state), connection=name, state=state)
+
+
+class InstrumentedClientMixin:
+    """
+    Times every statement sent through a Tortoise client, see `record_query`.
+    Mixed in ahead of the backend client class.
+    """
+
+    async def execute_insert(self, query: str, values: list) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_insert(query, values)
+        finally:
+            record_query(query, time.perf_counter() - start)
+
+    async def execute_many(self, query: str, values: list) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_many(query, values)
+        finally:
+            record_query(query, time.perf_counter() - start)
+
+    async def execute_query(self, query: str, values: list | None = None) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_query(query, values)
+        finally:
+            record_query(query, time.perf_counter() - start)
+
+    async def execute_script(self, query: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_script(query)
+        finally:
+            record_query(query, time.perf_counter() - start)
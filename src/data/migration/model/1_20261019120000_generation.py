@@ -0,0 +1,56 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `generation` (
+    `id` BINARY(16) NOT NULL PRIMARY KEY,
+    `created_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `tenant` VARCHAR(255),
+    `prompt` LONGTEXT NOT NULL,
+    `options_key` VARCHAR(64) NOT NULL,
+    `output` VARCHAR(1024) NOT NULL,
+    `steps` INT NOT NULL,
+    `width` INT NOT NULL,
+    `height` INT NOT NULL,
+    `seed` BIGINT,
+    `nsfw` BOOL,
+    KEY `idx_generation_created_d8b4d1` (`created_at`),
+    KEY `idx_generation_updated_aeed9f` (`updated_at`),
+    KEY `idx_generation_deleted_1d2e47` (`deleted_at`),
+    KEY `idx_generation_tenant_411e0e` (`tenant`),
+    KEY `idx_generation_options_5e9326` (`options_key`),
+    FULLTEXT KEY `ft_generation_prompt` (`prompt`)
+) CHARACTER SET utf8mb4 COMMENT='A finished image generation, kept so later requests can find and reuse it.';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS `generation`;"""
+
+
+MODELS_STATE = (
+    "eJztmP1v2jgYx/8VKz91Ug+1KYXeNJ0EHeuQKJy69Lbb3SkzyUOwSOwsdtSiiv/9HpuEkB"
+    "e4Dm3qeuoPoPh5sR9/vrZj5cGKhA9h6wo4JFQxwa3X5MHiNAJ8qDuPiUXjeOPSbUWnoQkO"
+    "ymFTqRLqKfTMaCgBTT5IL2FxNorVIzPGmZyDT1hEAyBFB8dkAbEiUpCQKkhIAl9TkEoSj3"
+    "Kd5ROKvwRSCYSplh7PFx4OyHjwfbv+m38RpmLpLmD5hTBJ1ByINwdvIdNo3RA0xKlhZxgi"
+    "ieCvCXZKQ5JlHmdN9JpSU85wTFeJADA9wYL/+gfNODbcg9TNB2vGIPTNsxUnIoqVpUPgPk"
+    "5ASt1pnpVLNVNuMUk3y9HyLGPjf3c7GjmDT45lukFptNFa6S7ihWuGK0nPfB1p7G7eR59x"
+    "mixvb4dv35l4jX3qeiJMI17kxEs1xxLypDRlfkvnaF9WIvhby4KnYZitody0JoQGlaSwQe"
+    "MXBh9mNA314rLezFLu6UkTmXgtTySAf1EkeEuP3P0tq3Irw3XHE8f9MHBc16otS11NZTll"
+    "Jg+pIzfGlYb/sFr3WxAyVstwGo57N38enXZeWSsTRhV1C0ULyF4CGoZLVR32W/QoFkEz6n"
+    "JmBbmfpbbyh0PQ54Y97HNWP4CuhfPzJzxcZuPuoe0MrwcfnN7173q4SMqvocHXcwbaYxvr"
+    "smI9QmnQLvCEWh9em07Ix6Hznugm+TwZDwxdIVWQmBGLOOezpWuiqRIuF3cu9bcQ5dYcI0"
+    "YWoqexf6Do5cwX0X8S0XNoW6pn1Rei48sSDhO9nPkdRM8U/Uk0f74a13e2Ak55g8CXc5o0"
+    "i1tkVIRFRM9OSiui924IPFBzbNrn53u0/aN3c/m+d3OEURXBxpnLXvtWJcLFvaZM2MErTT"
+    "PhIuMgwo84IYvr7RNvl+x2t9kpOcmj696nV6XdMpqMr/LwLfKXo0m/Anzr8vst67qS9qPQ"
+    "P93q7rQfsbg77Z1rW7sqpFMVp990eBQZ/4ulXQZ8emI/BrEO2wl57SxjlgpiWac85DvOj0"
+    "18hTFbH9vPjXGgi/jFPm132xdnnfYFhphCN5buHujDsVOhecd8VOvxNDfxLzQbaM6BBfOG"
+    "I2AnziLhhWcDTwnQ+BUj2L3bs4yDcP73bewpaP5q22dnXfvkrHNx3u52zy9ONljrrn18+8"
+    "Mrjbh01taZczm7a2AuRAiUN0PPUyrQp5jz/KjvAziZjEoXtP6wegO7ve4P8KVm3mgYxNQW"
+    "Zf2pbrbY+o6kDVPqLe5o4rs1j7DFrti6K7KjqoVyGhh8ep6r1b+MpBIe"
+)
@@ -1 +1 @@
-
+from .generation import Generation
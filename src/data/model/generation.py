@@ -0,0 +1,25 @@
+from tortoise import fields
+from tortoise.contrib.mysql.indexes import FullTextIndex
+
+from src.core.base import Base
+
+
+class Generation(Base):
+    """
+    A finished image generation, kept so later requests can find and reuse it.
+    `options_key` is the checksum the coalescer keys on: equal options, equal key.
+    """
+
+    tenant: str | None = fields.CharField(max_length=255, null=True, db_index=True)
+    prompt: str = fields.TextField()
+    options_key: str = fields.CharField(max_length=64, db_index=True)
+    output: str = fields.CharField(max_length=1024)
+    steps: int = fields.IntField()
+    width: int = fields.IntField()
+    height: int = fields.IntField()
+    seed: int | None = fields.BigIntField(null=True)
+    nsfw: bool | None = fields.BooleanField(null=True)
+
+    class Meta:
+        table = "generation"
+        indexes = (FullTextIndex(fields=("prompt",), name="ft_generation_prompt"),)
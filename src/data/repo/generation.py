@@ -0,0 +1,74 @@
+from typing import Any
+
+from pypika_tortoise.terms import Term
+from tortoise import queryset
+from tortoise.contrib.mysql.search import SearchCriterion
+from tortoise.expressions import Function
+
+from src.core.base import BaseRepo
+from src.data.model import Generation
+
+
+class Relevance(Function):
+    """
+    MATCH(field) AGAINST(query) in natural language mode, the score MariaDB/MySQL rank
+    full-text matches by. Needs a FULLTEXT index on the field.
+    """
+
+    def _get_function_field(self, field: Term | str, *default_values: Any) -> SearchCriterion:
+        return SearchCriterion(field, expr=default_values[0])
+
+
+class GenerationRepo(BaseRepo[Generation]):
+    def __init__(self) -> None:
+        super().__init__(Generation)
+
+    def _search_query(self, query: str, tenant: str) -> queryset.QuerySet[Generation]:
+        """
+        Live generations of `tenant` whose prompt matches `query`, best match first,
+        answered from the FULLTEXT index (MariaDB/MySQL only, like the table itself).
+        """
+        return (
+            Generation.filter(tenant=tenant, deleted_at__isnull=True, prompt__search=query)
+            .annotate(relevance=Relevance("prompt", query))
+            .order_by("-relevance", "-id")
+        )
+
+    async def search(
+        self,
+        query: str,
+        tenant: str,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> tuple[list[Generation], dict[str, int]]:
+        """
+        Full-text search over past prompts, offset paged like BaseRepo.filter.
+        Returns:
+            (generations, meta) - meta carries page, page_size, total and total_pages
+        """
+        rows = self._search_query(query, tenant)
+        total: int = await rows.count()
+        results: list[Generation] = await rows.offset((page - 1) * page_size).limit(page_size)
+        meta: dict[str, int] = {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size,
+        }
+        return results, meta
+
+    async def matches(self, query: str, tenant: str, limit: int = 5) -> list[Generation]:
+        """
+        Best `limit` matches of `query`, without the count a page needs.
+        """
+        return await self._search_query(query, tenant).limit(limit)
+
+    async def latest_by_options(self, options_key: str, tenant: str) -> Generation | None:
+        """
+        Most recent generation run with exactly these options.
+        """
+        return (
+            await Generation.filter(options_key=options_key, tenant=tenant, deleted_at__isnull=True)
+            .order_by("-id")
+            .first()
+        )
@@ -0,0 +1,43 @@
+import itertools
+import time
+from typing import Any
+
+from tortoise.backends.base.client import TransactionalDBClient
+from tortoise.connection import get_connection
+
+from src.core.config import settings
+from src.core.context import query_stats
+
+PRIMARY = "default"
+REPLICAS: list[str] = [f"replica_{index}" for index in range(len(settings.db_replica_hosts))]
+
+
+class ReplicaRouter:
+    """
+    Tortoise router sending reads to the replicas in turn; writes use the model's connection.
+    Reads stay on the primary inside a transaction, outside a request (no way to
+    know what the caller just wrote), and for `db_read_your_writes_seconds`
+    after a write issued by the same request.
+    """
+
+    def __init__(self) -> None:
+        self._replicas = itertools.cycle(REPLICAS) if REPLICAS else None
+
+    def db_for_read(self, model: Any) -> str | None:
+        if self._replicas is None:
+            return None
+        stats = query_stats.get()
+        if stats is None:
+            return None
+        if stats.wrote_at is not None and time.monotonic() - stats.wrote_at < settings.db_read_your_writes_seconds:
+            return None
+        if isinstance(get_connection(PRIMARY), TransactionalDBClient):
+            return None
+        return next(self._replicas)
+
+    def db_for_write(self, model: Any) -> str | None:
+        # ORM writes are marked here, raw statements by `record_query`
+        stats = query_stats.get()
+        if stats is not None:
+            stats.wrote_at = time.monotonic()
+        return None
@@ -1 +1,9 @@
-from .health import CacheSchema, DatabaseSchema, HealthSchema
+from .health import (
+    CacheSchema,
+    DatabaseSchema,
+    HealthSchema,
+    LivenessSchema,
+    ModelSchema,
+    QueueSchema,
+    ReadinessSchema,
+)
@@ -3,7 +3,7 @@ from typing import Annotated
 from pydantic import Field
 
 from src.core.base import BaseSchema
-from src.core.type import Status
+from src.core.type import QueueBackend, Status
 
 
 class DatabaseSchema(BaseSchema):
@@ -20,3 +20,32 @@ class HealthSchema(BaseSchema):
     version: Annotated[str, Field(default="0.0.1", description="Application version")]
     db: Annotated[DatabaseSchema, Field(default=None)]
     cache: Annotated[CacheSchema, Field(default=None)]
+
+
+class ModelSchema(BaseSchema):
+    status: Annotated[Status, Field(default=Status.ERROR)]
+    loaded: Annotated[bool, Field(default=False)]
+    required: Annotated[bool, Field(default=True, description="Whether this replica runs generations from the queue")]
+
+
+class QueueSchema(BaseSchema):
+    status: Annotated[Status, Field(default=Status.ERROR)]
+    backend: Annotated[QueueBackend, Field(...)]
+    depth: Annotated[int | None, Field(default=None, description="Queued + running jobs")]
+
+
+class LivenessSchema(BaseSchema):
+    status: Annotated[Status, Field(default=Status.SUCCESS)]
+    version: Annotated[str, Field(default="0.0.1", description="Application version")]
+    uptime_seconds: Annotated[float, Field(default=0.0)]
+
+
+class ReadinessSchema(BaseSchema):
+    status: Annotated[Status, Field(default=Status.ERROR)]
+    version: Annotated[str, Field(default="0.0.1", description="Application version")]
+    db: Annotated[DatabaseSchema, Field(...)]
+    cache: Annotated[CacheSchema, Field(...)]
+    model: Annotated[ModelSchema, Field(...)]
+    queue: Annotated[QueueSchema, Field(...)]
+    reasons: Annotated[list[str], Field(default_factory=list, description="Why the replica is not ready")]
+    checked_at: Annotated[str, Field(..., description="Snapshot time")]
@@ -1 +1,10 @@
-from .image import ImageInSchema, ImageOutSchema
+from .image import (
+    ImageAdmissionSchema,
+    ImageInSchema,
+    ImageJobSchema,
+    ImageMatchSchema,
+    ImageOptionsSchema,
+    ImageOutSchema,
+    ImageResultSchema,
+    ImageTimingSchema,
+)
@@ -1,11 +1,138 @@
+import uuid
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import Field
+
 from src.core.base import BaseSchema
+from src.core.constant import IMAGE_MAX_SIDE, IMAGE_MAX_STEPS, IMAGE_MIN_SIDE
+from src.core.type import JobStatus, ReuseMode, SafetyMode
+
+
+def _ms(values: list[float] | None) -> float | None:
+    return round(sum(values) * 1000, 3) if values else None
+
+
+class ImageTimingSchema(BaseSchema):
+    text_encode_ms: Annotated[float | None, Field(default=None)] = None
+    unet_steps_ms: Annotated[list[float], Field(default_factory=list)]
+    unet_total_ms: Annotated[float | None, Field(default=None)] = None
+    vae_decode_ms: Annotated[float | None, Field(default=None)] = None
+    safety_check_ms: Annotated[float | None, Field(default=None)] = None
+    image_encode_ms: Annotated[float | None, Field(default=None)] = None
+    disk_write_ms: Annotated[float | None, Field(default=None)] = None
+    total_ms: Annotated[float | None, Field(default=None)] = None
+
+    @classmethod
+    def from_record(cls, record: dict[str, list[float]]) -> "ImageTimingSchema":
+        """
+        Build from a StageTimer record (stage -> durations in seconds).
+        """
+        return cls(
+            text_encode_ms=_ms(record.get("text_encode")),
+            unet_steps_ms=[round(value * 1000, 3) for value in record.get("unet_step", [])],
+            unet_total_ms=_ms(record.get("unet_step")),
+            vae_decode_ms=_ms(record.get("vae_decode")),
+            safety_check_ms=_ms(record.get("safety_check")),
+            image_encode_ms=_ms(record.get("image_encode")),
+            disk_write_ms=_ms(record.get("disk_write")),
+            total_ms=_ms(record.get("total")),
+        )
+
+
+class ImageResultSchema(BaseSchema):
+    outputs: Annotated[list[str], Field(default_factory=list)]
+    timing: Annotated[ImageTimingSchema | None, Field(default=None)] = None
+    safety: Annotated[SafetyMode, Field(default=SafetyMode.INLINE)] = SafetyMode.INLINE
+    # per output, only known when the check ran inline
+    nsfw: Annotated[list[bool] | None, Field(default=None)] = None
+    steps: Annotated[int | None, Field(default=None)] = None
+    steps_executed: Annotated[int | None, Field(default=None)] = None
 
 
 class ImageInSchema(BaseSchema):
     prompt: str
-    steps: int = 30
-    width: int = 512
-    height: int = 512
+    steps: Annotated[int, Field(default=30, gt=0, le=IMAGE_MAX_STEPS)] = 30
+    width: Annotated[int, Field(default=512, ge=IMAGE_MIN_SIDE, le=IMAGE_MAX_SIDE, multiple_of=8)] = 512
+    height: Annotated[int, Field(default=512, ge=IMAGE_MIN_SIDE, le=IMAGE_MAX_SIDE, multiple_of=8)] = 512
+    # stop denoising once the latents converge, threshold defaults to settings.image_adaptive_threshold
+    adaptive: bool = False
+    adaptive_threshold: Annotated[float | None, Field(default=None, gt=0)] = None
+    # reuse deep UNet features for interval - 1 steps, defaults to settings.image_deepcache_interval
+    deepcache_interval: Annotated[int | None, Field(default=None, ge=0)] = None
+    # merge this share of self-attention tokens, defaults to settings.image_tome_ratio
+    tome_ratio: Annotated[float | None, Field(default=None, ge=0, lt=1)] = None
+    seed: Annotated[int | None, Field(default=None, ge=0)] = None
+    # look up past generations of a similar prompt first, see ReuseMode
+    reuse: Annotated[ReuseMode, Field(default=ReuseMode.NONE)] = ReuseMode.NONE
+
+
+class ImageOptionsSchema(BaseSchema):
+    # ImageClient.run arguments with settings defaults resolved
+    prompt: Annotated[str, Field(...)]
+    steps: Annotated[int, Field(...)]
+    width: Annotated[int, Field(...)]
+    height: Annotated[int, Field(...)]
+    safety_mode: Annotated[SafetyMode, Field(default=SafetyMode.INLINE)] = SafetyMode.INLINE
+    adaptive_threshold: Annotated[float | None, Field(default=None)] = None
+    deepcache_interval: Annotated[int, Field(default=0)] = 0
+    tome_ratio: Annotated[float, Field(default=0.0)] = 0.0
+    seed: Annotated[int | None, Field(default=None)] = None
+
+
+class ImageAdmissionSchema(BaseSchema):
+    # what actually runs, differs from the request when downgraded
+    steps: Annotated[int, Field(...)]
+    width: Annotated[int, Field(...)]
+    height: Annotated[int, Field(...)]
+    cost_units: Annotated[float, Field(...)]
+    downgraded: Annotated[bool, Field(default=False)] = False
+    # in-flight work admitted before this request, per replica
+    queued_units: Annotated[float, Field(default=0.0)] = 0.0
+    estimated_seconds: Annotated[float, Field(...)]
+    estimated_completion_at: Annotated[str, Field(...)]
+
+
+class ImageMatchSchema(BaseSchema):
+    id: Annotated[uuid.UUID, Field(...)]
+    prompt: Annotated[str, Field(...)]
+    output: Annotated[str, Field(...)]
+    steps: Annotated[int, Field(...)]
+    width: Annotated[int, Field(...)]
+    height: Annotated[int, Field(...)]
+    seed: Annotated[int | None, Field(default=None)] = None
+    # full-text score, higher is closer (MySQL only)
+    relevance: Annotated[float | None, Field(default=None)] = None
+    # generated with the same options as the request
+    exact: Annotated[bool, Field(default=False)] = False
+    created_at: Annotated[datetime, Field(...)]
+
 
 class ImageOutSchema(BaseSchema):
     output: str
+    timing: Annotated[ImageTimingSchema | None, Field(default=None)] = None
+    safety: Annotated[SafetyMode | None, Field(default=None)] = None
+    nsfw: Annotated[bool | None, Field(default=None)] = None
+    steps_executed: Annotated[int | None, Field(default=None)] = None
+    admission: Annotated[ImageAdmissionSchema | None, Field(default=None)] = None
+    # served by an identical in-flight / idempotent request's execution
+    coalesced: Annotated[bool, Field(default=False)] = False
+    # output of matches[0], nothing was generated (reuse=instead)
+    reused: Annotated[bool, Field(default=False)] = False
+    # similar past generations, best first (reuse=alongside|instead)
+    matches: Annotated[list[ImageMatchSchema] | None, Field(default=None)] = None
+
+
+class ImageJobSchema(BaseSchema):
+    id: Annotated[str, Field(...)]
+    status: Annotated[JobStatus, Field(default=JobStatus.QUEUED)] = JobStatus.QUEUED
+    tenant: Annotated[str | None, Field(default=None)] = None
+    options: Annotated[ImageOptionsSchema, Field(...)]
+    # estimate at submission
+    admission: Annotated[ImageAdmissionSchema | None, Field(default=None)] = None
+    result: Annotated[ImageOutSchema | None, Field(default=None)] = None
+    error: Annotated[str | None, Field(default=None)] = None
+    attempts: Annotated[int, Field(default=0)] = 0
+    worker: Annotated[str | None, Field(default=None)] = None
+    created_at: Annotated[str, Field(...)]
+    updated_at: Annotated[str, Field(...)]
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from contextlib import asynccontextmanager
 
 import uvloop
@@ -10,21 +11,40 @@ from src.client import init_hf_model
 from src.core.common import get_app_version
 from src.core.config import settings
 from src.core.error import init_global_errors
-from src.core.middleware import init_process_time_tracing
+from src.core.format import format_duration
+from src.core.middleware import init_process_time_tracing, init_request_context
 from src.data import init_db, run_migration
 from src.route.health import router as _health_router
 from src.route.image import router as _image_router
+from src.route.metric import router as _metric_router
+from src.worker import build_worker
 
 
 @asynccontextmanager
 async def lifespan(fa: FastAPI):
     logger.info("lifespan(): starting up...")
 
+    started_at = time.perf_counter()
     await run_migration()
-    await init_hf_model()
+    migrated_at = time.perf_counter()
+    # API replicas in front of redis workers only queue jobs, /image/generate loads the model on first use
+    if settings.runs_worker:
+        await init_hf_model()
+    ready_at = time.perf_counter()
+    logger.info(
+        f"lifespan(): ready in {format_duration(ready_at - started_at)} "
+        f"(migrations {format_duration(migrated_at - started_at)}, model {format_duration(ready_at - migrated_at)})"
+    )
+
+    worker_task: asyncio.Task | None = None
+    if settings.runs_worker:
+        worker_task = asyncio.create_task(build_worker().run())
+
     yield  # startup complete
     # any shutdown code here
     logger.info("lifespan(): shutting down...")
+    if worker_task is not None:
+        worker_task.cancel()
 
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 app = FastAPI(
@@ -45,10 +65,12 @@ app.add_middleware(
 init_global_errors(app)
 init_db(app)
 init_process_time_tracing(app)
+init_request_context(app)
 
 routers = [
     _health_router,
     _image_router,
+    _metric_router,
 ]
 for router in routers:
     app.include_router(router)
@@ -3,8 +3,10 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 
+from src.core.error import Error
 from src.core.success import Success
-from src.data.schema.health import HealthSchema
+from src.core.type import Status
+from src.data.schema.health import HealthSchema, LivenessSchema, ReadinessSchema
 from src.service.health import HealthService, get_health_service
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -16,3 +18,21 @@ async def check(
 ) -> JSONResponse:
     output: HealthSchema = await health_service.check_health()
     return Success.ok(data=output).to_resp()
+
+
+@router.get(path="/live")
+async def live(
+    health_service: Annotated[HealthService, Depends(get_health_service)]
+) -> JSONResponse:
+    output: LivenessSchema = health_service.live()
+    return Success.ok(data=output).to_resp()
+
+
+@router.get(path="/ready")
+async def ready(
+    health_service: Annotated[HealthService, Depends(get_health_service)]
+) -> JSONResponse:
+    output: ReadinessSchema = await health_service.ready()
+    if output.status != Status.SUCCESS:
+        raise Error.service_unavailable(message="Not ready.", details=output.reasons)
+    return Success.ok(data=output).to_resp()
@@ -1,11 +1,22 @@
+from collections.abc import AsyncIterator
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Depends, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from loguru import logger
 
-from src.core.success import Success
-from src.data.schema.image import ImageInSchema, ImageOutSchema
+from src.client import RateLimiter, get_rate_limiter
+from src.core.auth import get_tenant
+from src.core.constant import IDEMPOTENCY_HEADER, IMAGE_SEARCH_MAX_PAGE_SIZE
+from src.core.error import Error
+from src.core.success import Meta, Success
+from src.data.schema.image import (
+    ImageAdmissionSchema,
+    ImageInSchema,
+    ImageJobSchema,
+    ImageMatchSchema,
+    ImageOutSchema,
+)
 from src.service.image import ImageService, get_image_service
 
 router = APIRouter(prefix="/image", tags=["image"])
@@ -16,9 +27,119 @@ router = APIRouter(prefix="/image", tags=["image"])
     response_model=Success[ImageOutSchema]
 )
 async def generate(
+    request: Request,
+    service: Annotated[ImageService, Depends(get_image_service)],
+    limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
+    payload: Annotated[ImageInSchema, Body(...)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    idempotency_key: Annotated[str | None, Header(alias=IDEMPOTENCY_HEADER, max_length=255)] = None,
+) -> JSONResponse:
+    logger.debug(
+        f"route|image|generate|tenant: {tenant} idempotency_key: {idempotency_key} payload: {payload.model_dump()}"
+    )
+    limit = await limiter.acquire(
+        route="image.generate",
+        key=RateLimiter.key("image.generate", tenant=tenant, ip=request.client.host if request.client else None),
+        cost=service.cost_units(payload),
+    )
+    output: ImageOutSchema = await service.run(payload=payload, tenant=tenant, idempotency_key=idempotency_key)
+    response = Success.ok(data=output).to_resp()
+    response.headers.update(limit.headers)
+    return response
+
+
+@router.post(
+    path="/estimate",
+    response_model=Success[ImageAdmissionSchema]
+)
+async def estimate(
+    service: Annotated[ImageService, Depends(get_image_service)],
+    payload: Annotated[ImageInSchema, Body(...)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+) -> JSONResponse:
+    logger.debug(f"route|image|estimate|tenant: {tenant} payload: {payload.model_dump()}")
+    output: ImageAdmissionSchema = service.estimate(payload=payload, tenant=tenant)
+    return Success.ok(data=output).to_resp()
+
+
+@router.get(
+    path="/search",
+    response_model=Success[list[ImageMatchSchema]]
+)
+async def search(
+    service: Annotated[ImageService, Depends(get_image_service)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    q: Annotated[str, Query(min_length=1, max_length=1000, description="Words of the prompt to look for")],
+    page: Annotated[int, Query(ge=1)] = 1,
+    page_size: Annotated[int, Query(ge=1, le=IMAGE_SEARCH_MAX_PAGE_SIZE)] = 10,
+) -> JSONResponse:
+    logger.debug(f"route|image|search|tenant: {tenant} q: {q} page: {page} page_size: {page_size}")
+    if tenant is None:
+        raise Error.unauthorized(message="Searching past generations needs an API key.")
+    output, meta = await service.search(query=q, tenant=tenant, page=page, page_size=page_size)
+    return Success.ok(data=output, meta=Meta(**meta)).to_resp()
+
+
+@router.post(
+    path="/jobs",
+    response_model=Success[ImageJobSchema],
+    status_code=202,
+)
+async def submit(
+    request: Request,
     service: Annotated[ImageService, Depends(get_image_service)],
+    limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
     payload: Annotated[ImageInSchema, Body(...)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+) -> JSONResponse:
+    logger.debug(f"route|image|submit|tenant: {tenant} payload: {payload.model_dump()}")
+    limit = await limiter.acquire(
+        route="image.submit",
+        key=RateLimiter.key("image.submit", tenant=tenant, ip=request.client.host if request.client else None),
+        cost=service.cost_units(payload),
+    )
+    output: ImageJobSchema = await service.submit(payload=payload, tenant=tenant)
+    response = Success.accepted(data=output).to_resp()
+    response.headers.update(limit.headers)
+    return response
+
+
+@router.get(
+    path="/jobs/{job_id}",
+    response_model=Success[ImageJobSchema]
+)
+async def job(
+    service: Annotated[ImageService, Depends(get_image_service)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    job_id: str,
 ) -> JSONResponse:
-    logger.debug(f"route|image|generate|payload: {payload.model_dump()}")
-    output: ImageOutSchema = await service.run(payload=payload)
+    output: ImageJobSchema | None = await service.owned_job(job_id=job_id, tenant=tenant)
+    if output is None:
+        raise Error.not_found(message=f"Job {job_id} not found or expired.")
     return Success.ok(data=output).to_resp()
+
+
+async def _sse(service: ImageService, job_id: str) -> AsyncIterator[str]:
+    async for event in service.events(job_id=job_id):
+        if event is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"event: {event.status.value}\ndata: {event.model_dump_json(exclude_none=True)}\n\n"
+
+
+@router.get(
+    path="/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+)
+async def job_events(
+    service: Annotated[ImageService, Depends(get_image_service)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    job_id: str,
+) -> StreamingResponse:
+    if await service.owned_job(job_id=job_id, tenant=tenant) is None:
+        raise Error.not_found(message=f"Job {job_id} not found or expired.")
+    return StreamingResponse(
+        _sse(service, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
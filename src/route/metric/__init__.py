@@ -0,0 +1,13 @@
+
+from fastapi import APIRouter
+
+from .metric import router as _metric_router
+
+_subrouters = [
+    _metric_router,
+]
+
+router = APIRouter()
+
+for subrouter in _subrouters:
+    router.include_router(subrouter)
\ No newline at end of file
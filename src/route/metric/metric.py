@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.metric import METRICS_CONTENT_TYPE, registry
+
+router = APIRouter(tags=["metric"])
+
+
+@router.get(path="/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
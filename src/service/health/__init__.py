@@ -6,6 +6,7 @@ from fastapi import Depends
 from src.client import (
     CacheClient,
     get_cache_client,
+    job_queue,
 )
 from src.service.health.health import HealthService
 
@@ -13,4 +14,4 @@ from src.service.health.health import HealthService
 async def get_health_service(
     cache_client: Annotated[CacheClient, Depends(get_cache_client)]
 ) -> AsyncGenerator[HealthService]:
-    yield HealthService(cache_client)
+    yield HealthService(cache_client, queue=job_queue())
@@ -1,35 +1,149 @@
-from src.client import CacheClient
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import ClassVar, TypeVar
+
+from loguru import logger
+
+from src.client import CacheClient, ImageClient, JobQueue
 from src.core.base import BaseService
 from src.core.common import get_app_version
-from src.core.type import Status
+from src.core.config import settings
+from src.core.flight import SingleFlight
+from src.core.format import utc_iso_timestamp
+from src.core.type import QueueBackend, Status
 from src.data import get_db_health, get_db_version
-from src.data.schema.health import CacheSchema, DatabaseSchema, HealthSchema
+from src.data.schema.health import (
+    CacheSchema,
+    DatabaseSchema,
+    HealthSchema,
+    LivenessSchema,
+    ModelSchema,
+    QueueSchema,
+    ReadinessSchema,
+)
+
+_T = TypeVar("_T")
+
+_STARTED_AT = time.monotonic()
 
 
 class HealthService(BaseService):
+    """
+    Probes run concurrently, each bounded by `health_probe_timeout_seconds`.
+    Results are shared per process for `health_snapshot_ttl_seconds`, so probe
+    storms reach MySQL and Redis at most once per snapshot; versions are fetched
+    once per process.
+    """
+
+    _snapshots: ClassVar[SingleFlight] = SingleFlight()
+    _versions: ClassVar[dict[str, str]] = {}
     _cache_client: CacheClient
+    _queue: JobQueue
 
-    def __init__(self, cache_client: CacheClient) -> None:
+    def __init__(self, cache_client: CacheClient, queue: JobQueue) -> None:
         super().__init__()
         self._cache_client = cache_client
+        self._queue = queue
 
-    async def check_health(self) -> HealthSchema:
-        app_version = get_app_version()
-        db_status = Status.SUCCESS if await get_db_health() else Status.ERROR
-        db_version = await get_db_version()
-        db_schema = DatabaseSchema(
-            status=db_status,
-            version=db_version
-        )
+    async def _probe(self, name: str, check: Callable[[], Awaitable[_T]], default: _T) -> _T:
+        try:
+            return await asyncio.wait_for(check(), timeout=settings.health_probe_timeout_seconds)
+        except Exception as error:
+            logger.warning(f"{self._tag}|_probe(): {name} failed {error!r}")
+            return default
+
+    async def _version(self, name: str, healthy: bool, fetch: Callable[[], Awaitable[str | None]]) -> str | None:
+        version = self._versions.get(name)
+        if version is None and healthy:
+            version = await self._probe(f"{name} version", fetch, None)
+            if version is not None:
+                self._versions[name] = version
+        return version
 
-        cache_status = Status.SUCCESS if await self._cache_client.health() else Status.ERROR
-        cache_version = await self._cache_client.get_version()
-        cache_schema = CacheSchema(
-            status=cache_status,
-            version=cache_version
+    async def _dependencies(self) -> tuple[DatabaseSchema, CacheSchema]:
+        db_ok, cache_ok = await asyncio.gather(
+            self._probe("db", get_db_health, False),
+            self._probe("cache", self._cache_client.health, False),
+        )
+        db_version, cache_version = await asyncio.gather(
+            self._version("db", db_ok, get_db_version),
+            self._version("cache", cache_ok, self._cache_client.get_version),
+        )
+        return (
+            DatabaseSchema(status=Status.SUCCESS if db_ok else Status.ERROR, version=db_version),
+            CacheSchema(status=Status.SUCCESS if cache_ok else Status.ERROR, version=cache_version),
         )
-        health: HealthSchema = HealthSchema(
-            version=app_version, db=db_schema, cache=cache_schema
+
+    async def _snapshot(self, name: str, build: Callable[[], Awaitable[_T]]) -> _T:
+        result, _ = await self._snapshots.do(name, build, ttl=settings.health_snapshot_ttl_seconds)
+        return result
+
+    async def check_health(self) -> HealthSchema:
+        async def build() -> HealthSchema:
+            db_schema, cache_schema = await self._dependencies()
+            health = HealthSchema(version=get_app_version(), db=db_schema, cache=cache_schema)
+            health.log()
+            return health
+
+        return await self._snapshot("check", build)
+
+    def live(self) -> LivenessSchema:
+        """
+        The process serves requests; no dependency is touched.
+        """
+        return LivenessSchema(
+            status=Status.SUCCESS,
+            version=get_app_version(),
+            uptime_seconds=round(time.monotonic() - _STARTED_AT, 3),
         )
-        health.log()
-        return health
+
+    async def ready(self) -> ReadinessSchema:
+        """
+        Whether this replica should receive traffic: database up, model loaded when
+        this replica runs the worker (API replicas in front of redis workers do not need it),
+        queue depth within `health_ready_max_queue_depth`, and the cache up when
+        jobs go through it (otherwise rate limiting falls back and the cache is reported only).
+        """
+
+        async def build() -> ReadinessSchema:
+            (db_schema, cache_schema), depth = await asyncio.gather(
+                self._dependencies(),
+                self._probe("queue", self._queue.depth, None),
+            )
+            max_depth = settings.health_ready_max_queue_depth
+            queue_schema = QueueSchema(
+                status=Status.SUCCESS if depth is not None and (not max_depth or depth <= max_depth) else Status.ERROR,
+                backend=settings.queue_backend,
+                depth=depth,
+            )
+            model_loaded = ImageClient.loaded()
+            model_required = settings.runs_worker
+            model_schema = ModelSchema(
+                status=Status.SUCCESS if model_loaded or not model_required else Status.ERROR,
+                loaded=model_loaded,
+                required=model_required,
+            )
+
+            reasons = []
+            if db_schema.status != Status.SUCCESS:
+                reasons.append("db unavailable")
+            if cache_schema.status != Status.SUCCESS and settings.queue_backend == QueueBackend.REDIS:
+                reasons.append("cache unavailable")
+            if model_required and not model_loaded:
+                reasons.append("model not loaded")
+            if queue_schema.status != Status.SUCCESS:
+                reasons.append("queue unavailable" if depth is None else f"queue depth {depth} > {max_depth}")
+
+            return ReadinessSchema(
+                status=Status.ERROR if reasons else Status.SUCCESS,
+                version=get_app_version(),
+                db=db_schema,
+                cache=cache_schema,
+                model=model_schema,
+                queue=queue_schema,
+                reasons=reasons,
+                checked_at=utc_iso_timestamp(),
+            )
+
+        return await self._snapshot("ready", build)
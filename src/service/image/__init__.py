@@ -1,16 +1,21 @@
 from collections.abc import AsyncGenerator
-from typing import Annotated
 
-from fastapi import Depends
-
-from src.client import ImageClient, get_image_client
+from src.client import ImageClient, job_queue, progress_bus
+from src.data.repo import GenerationRepo
 
+from .admission import AdmissionController
+from .coalesce import ImageCoalescer
 from .image import ImageService
 
 
 async def get_image_service(
-    image_client: Annotated[ImageClient, Depends(get_image_client)]
 ) -> AsyncGenerator[ImageService]:
     yield ImageService(
-        image_client=image_client
+        # the singleton, loaded by the first generation run here
+        image_client=ImageClient,
+        admission=AdmissionController(),
+        coalescer=ImageCoalescer(),
+        queue=job_queue(),
+        progress=progress_bus(),
+        history=GenerationRepo(),
     )
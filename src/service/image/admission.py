@@ -0,0 +1,215 @@
+import math
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Annotated
+
+from loguru import logger
+from pydantic import Field
+
+from src.core.base import BaseSchema
+from src.core.config import settings
+from src.core.constant import IMAGE_COST_UNIT_PIXELS
+from src.core.error import Error
+from src.core.factory import SingletonMeta
+from src.core.metric import registry
+from src.core.type import AdmissionPolicy
+from src.data.schema.image import ImageAdmissionSchema, ImageResultSchema
+
+IMAGE_ADMISSION_DECISIONS = registry.counter(
+    "image_admission_decisions_total",
+    "Admission decisions for generation requests",
+    labelnames=("decision",),
+)
+IMAGE_ADMISSION_INFLIGHT_UNITS = registry.gauge(
+    "image_admission_inflight_units",
+    "Cost units admitted and not yet finished on this replica",
+)
+IMAGE_COST_SECONDS_PER_UNIT = registry.gauge(
+    "image_cost_seconds_per_unit",
+    "Learned compute seconds per cost unit (one step at 512x512)",
+)
+
+_ANONYMOUS = "anonymous"
+
+
+def cost_units(steps: int, width: int, height: int) -> float:
+    return steps * width * height / IMAGE_COST_UNIT_PIXELS
+
+
+class AdmissionTicket(BaseSchema):
+    tenant: Annotated[str, Field(...)]
+    admission: Annotated[ImageAdmissionSchema, Field(...)]
+
+
+class AdmissionController(metaclass=SingletonMeta):
+    """
+    Cost-model admission control for generation requests, per replica.
+    A request costs steps x pixels / 512^2 units; the seconds per unit are
+    learned from observed runs (exponential moving average). A request is
+    admitted while it fits the per-request cap and the remaining in-flight
+    budgets of its tenant and of the replica; otherwise it is rejected or,
+    with the downgrade policy, shrunk (fewer steps first, then a smaller
+    resolution) until it fits.
+    Queued jobs are only held to the per-request cap: the queue is their
+    buffer, and the worker running one reserves its units without a check.
+    """
+
+    _initialized: bool = False
+
+    def __init__(self) -> None:
+        if self._initialized:
+            return
+
+        self._seconds_per_unit: float = settings.image_cost_seconds_per_unit
+        self._inflight: float = 0.0
+        self._tenant_inflight: defaultdict[str, float] = defaultdict(float)
+
+        IMAGE_ADMISSION_INFLIGHT_UNITS.set_function(lambda: self._inflight)
+        IMAGE_COST_SECONDS_PER_UNIT.set_function(lambda: self._seconds_per_unit)
+        self._initialized = True
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    @property
+    def seconds_per_unit(self) -> float:
+        return self._seconds_per_unit
+
+    def _limit(self, tenant: str) -> float:
+        return min(
+            settings.image_admission_request_units,
+            settings.image_admission_tenant_units - self._tenant_inflight.get(tenant, 0.0),
+            settings.image_admission_global_units - self._inflight,
+        )
+
+    @staticmethod
+    def _downgrade(steps: int, width: int, height: int, limit: float) -> tuple[int, int, int]:
+        min_steps = min(steps, settings.image_admission_min_steps)
+        pixel_units = width * height / IMAGE_COST_UNIT_PIXELS
+        steps = max(min(steps, math.floor(limit / pixel_units)), min_steps)
+        if cost_units(steps, width, height) <= limit:
+            return steps, width, height
+
+        # keep the aspect ratio, sides stay multiples of 8
+        scale = math.sqrt(limit / cost_units(steps, width, height))
+        min_side = settings.image_admission_min_side
+        width = min(width, max(min_side, math.floor(width * scale / 8) * 8))
+        height = min(height, max(min_side, math.floor(height * scale / 8) * 8))
+        return steps, width, height
+
+    def estimate(
+        self,
+        steps: int,
+        width: int,
+        height: int,
+        tenant: str | None = None,
+        backlog_units: float = 0.0,
+        queued: bool = False,
+    ) -> ImageAdmissionSchema:
+        """
+        Decide how a request would run right now, without reserving budget.
+        `backlog_units` is queued work ahead of it elsewhere (job queue), for the estimate only.
+        `queued` requests wait their turn, only the per-request cap applies to them.
+        Raises:
+            Error: 400 if it can never fit the per-request cap, 429 if the in-flight budgets are spent
+        """
+        tenant = tenant or _ANONYMOUS
+        units = cost_units(steps, width, height)
+        limit = settings.image_admission_request_units if queued else self._limit(tenant)
+        downgraded = False
+
+        if units > limit and settings.image_admission_policy == AdmissionPolicy.DOWNGRADE and limit > 0:
+            steps, width, height = self._downgrade(steps, width, height, limit)
+            units = cost_units(steps, width, height)
+            downgraded = True
+
+        if units > limit:
+            if units > settings.image_admission_request_units:
+                raise Error.bad_request(
+                    message=(
+                        f"Request costs {units:.1f} units, the limit is {settings.image_admission_request_units:.1f}; "
+                        f"lower steps or resolution."
+                    )
+                )
+            retry_after = math.ceil(self._inflight * self._seconds_per_unit)
+            raise Error.too_many_requests(
+                message="Generation budget exhausted, retry later.",
+                details=[f"tenant={tenant}", f"retry_after_seconds={retry_after}"],
+            )
+
+        queued_units = self._inflight + backlog_units
+        estimated_seconds = (queued_units + units) * self._seconds_per_unit
+        return ImageAdmissionSchema(
+            steps=steps,
+            width=width,
+            height=height,
+            cost_units=round(units, 3),
+            downgraded=downgraded,
+            queued_units=round(queued_units, 3),
+            estimated_seconds=round(estimated_seconds, 3),
+            estimated_completion_at=(
+                (datetime.now(UTC) + timedelta(seconds=estimated_seconds)).isoformat().replace("+00:00", "Z")
+            ),
+        )
+
+    @contextmanager
+    def admit(self, steps: int, width: int, height: int, tenant: str | None = None) -> Iterator[AdmissionTicket]:
+        """
+        Reserve budget for one request for the duration of the block.
+        """
+        try:
+            admission = self.estimate(steps=steps, width=width, height=height, tenant=tenant)
+        except Error:
+            IMAGE_ADMISSION_DECISIONS.inc(decision="rejected")
+            raise
+        IMAGE_ADMISSION_DECISIONS.inc(decision="downgraded" if admission.downgraded else "admitted")
+        logger.debug(
+            f"{self._tag}|admit(): tenant={tenant or _ANONYMOUS} units={admission.cost_units} "
+            f"downgraded={admission.downgraded} eta={admission.estimated_seconds}s"
+        )
+        with self.hold(admission, tenant=tenant) as ticket:
+            yield ticket
+
+    @contextmanager
+    def hold(self, admission: ImageAdmissionSchema, tenant: str | None = None) -> Iterator[AdmissionTicket]:
+        """
+        Count an already admitted run (a queued job) against the in-flight budgets
+        for the duration of the block, without checking them.
+        """
+        ticket = AdmissionTicket(tenant=tenant or _ANONYMOUS, admission=admission)
+        self._inflight += admission.cost_units
+        self._tenant_inflight[ticket.tenant] += admission.cost_units
+        try:
+            yield ticket
+        finally:
+            self._inflight = max(self._inflight - admission.cost_units, 0.0)
+            remaining = self._tenant_inflight[ticket.tenant] - admission.cost_units
+            if remaining > 1e-9:
+                self._tenant_inflight[ticket.tenant] = remaining
+            else:
+                del self._tenant_inflight[ticket.tenant]
+
+    def observe(self, ticket: AdmissionTicket, result: ImageResultSchema) -> None:
+        """
+        Feed the compute time of a finished run back into the cost model.
+        Lock waits are excluded, only the pipeline stages count.
+        """
+        timing = result.timing
+        if timing is None:
+            return
+        compute_ms = sum(
+            value or 0.0
+            for value in (timing.text_encode_ms, timing.unet_total_ms, timing.vae_decode_ms, timing.safety_check_ms)
+        )
+        admission = ticket.admission
+        units = cost_units(result.steps_executed or admission.steps, admission.width, admission.height)
+        if compute_ms <= 0 or units <= 0:
+            return
+
+        sample = compute_ms / 1000 / units
+        alpha = settings.image_cost_alpha
+        self._seconds_per_unit = (1 - alpha) * self._seconds_per_unit + alpha * sample
+        logger.debug(f"{self._tag}|observe(): sample={sample:.4f}s/unit model={self._seconds_per_unit:.4f}s/unit")
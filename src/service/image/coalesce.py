@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from loguru import logger
+
+from src.core.config import settings
+from src.core.error import Error
+from src.core.factory import SingletonMeta
+from src.core.flight import SingleFlight
+from src.core.metric import registry
+from src.data.schema.image import ImageOutSchema
+
+IMAGE_COALESCED_REQUESTS = registry.counter(
+    "image_coalesced_requests_total",
+    "Generation requests served by another request's execution",
+    labelnames=("kind",),
+)
+
+_ANONYMOUS = "anonymous"
+
+
+class ImageCoalescer(metaclass=SingletonMeta):
+    """
+    Single-flight for generations, per replica.
+    Requests with the same canonical key (every option that changes the output,
+    seed included) share an execution only while it runs. An Idempotency-Key
+    binds a tenant's retries to the first request's key, and its result is kept
+    for `image_idempotency_ttl_seconds` apart from the flights: only a retry with
+    the same tenant and Idempotency-Key gets it after completion.
+    """
+
+    _initialized: bool = False
+
+    def __init__(self) -> None:
+        if self._initialized:
+            return
+
+        self._flight: SingleFlight[ImageOutSchema] = SingleFlight()
+        # tenant-scoped idempotency key -> (canonical key, output once finished, expires at), oldest first
+        self._idempotency: OrderedDict[str, tuple[str, ImageOutSchema | None, float]] = OrderedDict()
+        self._initialized = True
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    def _purge(self, now: float) -> None:
+        # every entry gets the same ttl, so they expire in order
+        while self._idempotency:
+            scoped, (_, _, expires_at) = next(iter(self._idempotency.items()))
+            if expires_at > now:
+                return
+            del self._idempotency[scoped]
+
+    def _keep(self, scoped: str, key: str, output: ImageOutSchema | None) -> None:
+        self._idempotency[scoped] = (key, output, time.monotonic() + settings.image_idempotency_ttl_seconds)
+        self._idempotency.move_to_end(scoped)
+
+    async def run(
+        self,
+        key: str,
+        work: Callable[[], Awaitable[ImageOutSchema]],
+        tenant: str | None = None,
+        idempotency_key: str | None = None,
+    ) -> ImageOutSchema:
+        scoped = None
+        if idempotency_key:
+            self._purge(time.monotonic())
+            scoped = f"{tenant or _ANONYMOUS}:{idempotency_key}"
+            bound = self._idempotency.get(scoped)
+            if bound is not None and bound[0] != key:
+                raise Error.conflict(
+                    message="Idempotency-Key was already used with a different request.",
+                    details=[f"idempotency_key={idempotency_key}"],
+                )
+            if bound is not None and bound[1] is not None:
+                IMAGE_COALESCED_REQUESTS.inc(kind="idempotent")
+                logger.debug(f"{self._tag}|run(): idempotent retry of {key}")
+                return bound[1].model_copy(update={"coalesced": True})
+            if bound is None:
+                self._keep(scoped, key, None)
+
+        output, shared = await self._flight.do(key, work)
+        if scoped is not None:
+            self._keep(scoped, key, output)
+        if not shared:
+            return output
+
+        IMAGE_COALESCED_REQUESTS.inc(kind="inflight")
+        logger.debug(f"{self._tag}|run(): request joined {key}")
+        return output.model_copy(update={"coalesced": True})
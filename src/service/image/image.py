@@ -1,21 +1,418 @@
-from src.client import ImageClient
+import asyncio
+import math
+import uuid
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+from loguru import logger
+
+from src.client import ImageClient, JobQueue, ProgressBus, ProgressEvent
 from src.core.base import BaseService
-from src.data.schema.image import ImageInSchema, ImageOutSchema
+from src.core.common import compute_checksum
+from src.core.config import settings
+from src.core.error import Error
+from src.core.format import serialize, utc_iso_timestamp
+from src.core.metric import registry
+from src.core.type import JobStatus, ReuseMode, SafetyMode
+from src.data.model import Generation
+from src.data.repo import GenerationRepo
+from src.data.schema.image import (
+    ImageAdmissionSchema,
+    ImageInSchema,
+    ImageJobSchema,
+    ImageMatchSchema,
+    ImageOptionsSchema,
+    ImageOutSchema,
+)
+
+from .admission import AdmissionController, cost_units
+from .coalesce import ImageCoalescer
+
+IMAGE_REUSE_REQUESTS = registry.counter(
+    "image_reuse_requests_total",
+    "Generation requests asking for past generations, by outcome",
+    labelnames=("mode", "result"),
+)
 
 
 class ImageService(BaseService):
-    _image_client: ImageClient
+    """
+    `image_client` is called for the pipeline only when a generation runs in
+    this process, so replicas that only queue jobs never load the model.
+    """
+
+    _image_client: Callable[[], ImageClient]
+    _admission: AdmissionController
+    _coalescer: ImageCoalescer
+    _queue: JobQueue
+    _progress: ProgressBus
+    _history: GenerationRepo
 
-    def __init__(self, image_client: ImageClient) -> None:
+    def __init__(
+        self,
+        image_client: Callable[[], ImageClient],
+        admission: AdmissionController,
+        coalescer: ImageCoalescer,
+        queue: JobQueue,
+        progress: ProgressBus,
+        history: GenerationRepo,
+    ) -> None:
         super().__init__()
         self._image_client = image_client
+        self._admission = admission
+        self._coalescer = coalescer
+        self._queue = queue
+        self._progress = progress
+        self._history = history
+
+    def _safety_mode(self, tenant: str | None) -> SafetyMode:
+        # `tenant` is the one authenticated by API key (src.core.auth), never a client-chosen value
+        if tenant and tenant in settings.image_trusted_tenants:
+            return SafetyMode.DISABLED
+        return settings.image_safety_mode
 
-    async def run(self, payload: ImageInSchema) -> ImageOutSchema:
+    def _adaptive_threshold(self, payload: ImageInSchema) -> float | None:
+        if not payload.adaptive:
+            return None
+        return payload.adaptive_threshold or settings.image_adaptive_threshold
 
-        result = await self._image_client.run(
+    def _options(self, payload: ImageInSchema, tenant: str | None) -> ImageOptionsSchema:
+        """
+        ImageClient.run options with settings defaults resolved; equal options, equal output.
+        """
+        return ImageOptionsSchema(
             prompt=payload.prompt,
             steps=payload.steps,
             width=payload.width,
-            height=payload.height
+            height=payload.height,
+            safety_mode=self._safety_mode(tenant),
+            adaptive_threshold=self._adaptive_threshold(payload),
+            deepcache_interval=(
+                payload.deepcache_interval
+                if payload.deepcache_interval is not None
+                else settings.image_deepcache_interval
+            ),
+            tome_ratio=payload.tome_ratio if payload.tome_ratio is not None else settings.image_tome_ratio,
+            seed=payload.seed,
+        )
+
+    def cost_units(self, payload: ImageInSchema) -> float:
+        return cost_units(steps=payload.steps, width=payload.width, height=payload.height)
+
+    def estimate(self, payload: ImageInSchema, tenant: str | None = None) -> ImageAdmissionSchema:
+        return self._admission.estimate(steps=payload.steps, width=payload.width, height=payload.height, tenant=tenant)
+
+    async def _generate(
+        self,
+        options: ImageOptionsSchema,
+        tenant: str | None,
+        on_step: Callable[[int, int], None] | None = None,
+        admission: ImageAdmissionSchema | None = None,
+    ) -> ImageOutSchema:
+        """
+        Run one generation. Without `admission` it is admitted against this
+        replica's in-flight budgets now; a queued job passes the admission it got
+        at submission and only holds its units while running.
+        """
+        # deferred safety: the output is only kept in history once the checker has seen it
+        loop = asyncio.get_running_loop()
+        verdict: asyncio.Future[bool | None] | None = (
+            loop.create_future() if options.safety_mode == SafetyMode.DEFERRED else None
+        )
+
+        def on_verdict(_: str, flagged: bool | None) -> None:
+            # called on a safety thread
+            loop.call_soon_threadsafe(verdict.set_result, flagged)
+
+        with (
+            self._admission.hold(admission, tenant=tenant)
+            if admission is not None
+            else self._admission.admit(steps=options.steps, width=options.width, height=options.height, tenant=tenant)
+        ) as ticket:
+            admission = ticket.admission
+            result = await self._image_client().run(
+                **options.model_copy(
+                    update={"steps": admission.steps, "width": admission.width, "height": admission.height}
+                ).model_dump(),
+                on_step=on_step,
+                on_verdict=on_verdict if verdict is not None else None,
+            )
+        self._admission.observe(ticket, result)
+
+        output = ImageOutSchema(
+            output=result.outputs[0],
+            timing=result.timing,
+            safety=result.safety,
+            nsfw=result.nsfw[0] if result.nsfw else None,
+            steps_executed=result.steps_executed,
+            admission=admission,
         )
-        return ImageOutSchema(output=result)
+        if verdict is None:
+            await self._record(options, tenant, output)
+        else:
+            loop.create_task(self._record_after(verdict, options, tenant, output))
+        return output
+
+    # generation history
+    @staticmethod
+    def _options_key(options: ImageOptionsSchema) -> str:
+        return compute_checksum(serialize(options))
+
+    async def _record(self, options: ImageOptionsSchema, tenant: str | None, output: ImageOutSchema) -> None:
+        """
+        Keep a finished generation searchable by its tenant. Anonymous and flagged
+        outputs are not kept, and a failed write only costs the history entry,
+        never the generation.
+        """
+        if not settings.image_history_enabled or tenant is None or output.nsfw:
+            return
+        try:
+            await self._history.create(
+                tenant=tenant,
+                prompt=options.prompt,
+                options_key=self._options_key(options),
+                output=output.output,
+                steps=output.admission.steps if output.admission else options.steps,
+                width=output.admission.width if output.admission else options.width,
+                height=output.admission.height if output.admission else options.height,
+                seed=options.seed,
+                nsfw=output.nsfw,
+            )
+        except Exception as error:
+            logger.error(f"Error|{self._tag}|_record(): {error}")
+
+    async def _record_after(
+        self,
+        verdict: asyncio.Future[bool | None],
+        options: ImageOptionsSchema,
+        tenant: str | None,
+        output: ImageOutSchema,
+    ) -> None:
+        # a flagged file is already in quarantine, it never becomes a match
+        await self._record(options, tenant, output.model_copy(update={"nsfw": await verdict}))
+
+    async def _present(self, generations: list[Generation], exact: bool = False) -> list[ImageMatchSchema]:
+        """
+        Generations whose output file still exists; rows of missing files
+        (quarantined before this check existed, cleaned up) are soft-deleted.
+        """
+        present = []
+        for generation in generations:
+            if Path(generation.output).exists():
+                present.append(ImageMatchSchema.model_validate(generation).model_copy(update={"exact": exact}))
+                continue
+            try:
+                await generation.soft_delete()
+            except Exception as error:
+                logger.error(f"Error|{self._tag}|_present(): {error}")
+        return present
+
+    async def matches(self, options: ImageOptionsSchema, tenant: str) -> list[ImageMatchSchema]:
+        """
+        The tenant's past generations for these options, best first: the latest
+        run with the same options, then the closest prompts by full-text relevance.
+        """
+        exact = await self._history.latest_by_options(self._options_key(options), tenant=tenant)
+        similar = await self._history.matches(options.prompt, tenant=tenant, limit=settings.image_reuse_matches)
+        found = await self._present([exact], exact=True) if exact else []
+        found += await self._present(
+            [generation for generation in similar if exact is None or generation.id != exact.id]
+        )
+        return found[: settings.image_reuse_matches]
+
+    @staticmethod
+    def _substitute(options: ImageOptionsSchema, matches: list[ImageMatchSchema]) -> ImageMatchSchema | None:
+        """
+        The match reuse=instead may serve in place of a generation: a run of the
+        same options that was not downgraded, or, when image_reuse_min_relevance
+        is set, a prompt at least that relevant at the same size and steps.
+        Anything else is only returned as a match.
+        """
+        for match in matches:
+            if (match.steps, match.width, match.height) != (options.steps, options.width, options.height):
+                continue
+            if match.exact:
+                return match
+            minimum = settings.image_reuse_min_relevance
+            if minimum > 0 and match.relevance is not None and match.relevance >= minimum:
+                return match
+        return None
+
+    async def search(
+        self,
+        query: str,
+        tenant: str,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> tuple[list[ImageMatchSchema], dict[str, int]]:
+        generations, meta = await self._history.search(query.strip(), tenant=tenant, page=page, page_size=page_size)
+        return await self._present(generations), meta
+
+    async def run(
+        self,
+        payload: ImageInSchema,
+        tenant: str | None = None,
+        idempotency_key: str | None = None,
+    ) -> ImageOutSchema:
+        options = self._options(payload, tenant)
+        matches: list[ImageMatchSchema] | None = None
+        if payload.reuse != ReuseMode.NONE:
+            # history is per authenticated tenant, anonymous callers have none
+            if tenant is None:
+                raise Error.unauthorized(message="Reusing past generations needs an API key.")
+            matches = await self.matches(options, tenant)
+        substitute = self._substitute(options, matches) if payload.reuse == ReuseMode.INSTEAD and matches else None
+        if substitute is not None:
+            IMAGE_REUSE_REQUESTS.inc(mode=payload.reuse.value, result="reused")
+            logger.debug(f"{self._tag}|run(): reused generation={substitute.id} exact={substitute.exact}")
+            matches = [substitute] + [match for match in matches if match.id != substitute.id]
+            return ImageOutSchema(output=substitute.output, steps_executed=0, reused=True, matches=matches)
+
+        output = await self._coalescer.run(
+            key=self._options_key(options),
+            work=lambda: self._generate(options, tenant),
+            tenant=tenant,
+            idempotency_key=idempotency_key,
+        )
+        if matches is None:
+            return output
+        IMAGE_REUSE_REQUESTS.inc(mode=payload.reuse.value, result="generated")
+        # the coalescer may hand the same object to other requests
+        return output.model_copy(update={"matches": matches})
+
+    # job queue
+    async def save_job(self, job: ImageJobSchema) -> ImageJobSchema:
+        job.updated_at = utc_iso_timestamp()
+        await self._queue.put(job.id, job.model_dump_json(), ttl=settings.queue_result_ttl_seconds)
+        return job
+
+    async def submit(self, payload: ImageInSchema, tenant: str | None = None) -> ImageJobSchema:
+        """
+        Queue a generation for the inference workers; the admission estimate
+        accounts for the queue backlog ahead of it. Only the per-request cap
+        applies, load beyond the in-flight budgets waits in the queue.
+        Raises:
+            Error: 400 over the per-request cap, 503 when `queue_max_len` jobs are queued or running
+        """
+        depth = await self._queue.depth()
+        backlog = await self._queue.backlog()
+        if depth >= settings.queue_max_len:
+            retry_after = max(math.ceil(backlog / depth * self._admission.seconds_per_unit), 1)
+            raise Error.service_unavailable(
+                message="Job queue is full, retry later.",
+                details=[f"depth={depth}", f"retry_after_seconds={retry_after}"],
+                headers={"Retry-After": str(retry_after)},
+            )
+        admission = self._admission.estimate(
+            steps=payload.steps,
+            width=payload.width,
+            height=payload.height,
+            tenant=tenant,
+            backlog_units=backlog,
+            queued=True,
+        )
+        now = utc_iso_timestamp()
+        job = ImageJobSchema(
+            id=uuid.uuid4().hex,
+            tenant=tenant,
+            options=self._options(payload, tenant),
+            admission=admission,
+            created_at=now,
+            updated_at=now,
+        )
+        await self.save_job(job)
+        await self._queue.enqueue(job.id, cost=admission.cost_units)
+        logger.debug(f"{self._tag}|submit(): job={job.id} eta={admission.estimated_completion_at}")
+        return job
+
+    async def job(self, job_id: str) -> ImageJobSchema | None:
+        data = await self._queue.get(job_id)
+        return ImageJobSchema.model_validate_json(data) if data else None
+
+    async def owned_job(self, job_id: str, tenant: str | None) -> ImageJobSchema | None:
+        """
+        The job if `tenant` (API key tenant, None for anonymous) submitted it;
+        anyone else gets None, as if it did not exist.
+        """
+        job = await self.job(job_id)
+        return job if job is not None and job.tenant == tenant else None
+
+    async def execute(self, job: ImageJobSchema, worker: str | None = None) -> ImageJobSchema:
+        """
+        Run a queued job (worker side) and store the outcome on its record.
+        """
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.worker = worker
+        await self.save_job(job)
+        self._progress.publish(ProgressEvent(job_id=job.id, status=job.status, step=0, total=job.options.steps))
+
+        # steps end on the pipeline thread, events are published from the loop
+        loop = asyncio.get_running_loop()
+
+        def on_step(step: int, total: int) -> None:
+            event = ProgressEvent(job_id=job.id, status=JobStatus.RUNNING, step=step, total=total)
+            loop.call_soon_threadsafe(self._progress.publish, event)
+
+        try:
+            # admitted at submission, a busy replica delays the job but never rejects it
+            admission = job.admission or self._admission.estimate(
+                steps=job.options.steps,
+                width=job.options.width,
+                height=job.options.height,
+                tenant=job.tenant,
+                queued=True,
+            )
+            job.result = await self._generate(job.options, job.tenant, on_step=on_step, admission=admission)
+            job.status = JobStatus.SUCCEEDED
+        except Exception as error:
+            logger.error(f"Error|{self._tag}|execute(): job={job.id} {error}")
+            job.status = JobStatus.FAILED
+            job.error = str(error)
+        job = await self.save_job(job)
+        self.publish_outcome(job)
+        return job
+
+    @staticmethod
+    def _status_event(job: ImageJobSchema) -> ProgressEvent:
+        return ProgressEvent(
+            job_id=job.id,
+            status=job.status,
+            step=job.result.steps_executed if job.result else None,
+            total=job.options.steps,
+            output=job.result.output if job.result else None,
+            error=job.error,
+        )
+
+    def publish_outcome(self, job: ImageJobSchema) -> None:
+        self._progress.publish(self._status_event(job))
+
+    async def events(self, job_id: str) -> AsyncIterator[ProgressEvent | None]:
+        """
+        Progress of a job until its final event; None marks an idle heartbeat.
+        Subscribes before reading the record, so a job finishing in between is not missed,
+        and re-reads the record on every heartbeat in case a published event was lost.
+        """
+        async with self._progress.subscribe(job_id) as subscription:
+            job = await self.job(job_id)
+            if job is None:
+                return
+            yield self._status_event(job)
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+                return
+
+            while True:
+                event = await subscription.get(timeout=settings.progress_heartbeat_seconds)
+                if event is None:
+                    job = await self.job(job_id)
+                    if job is None:
+                        return
+                    if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+                        yield self._status_event(job)
+                        return
+                    yield None
+                    continue
+
+                yield event
+                if event.final:
+                    return
@@ -0,0 +1,19 @@
+from src.client import ImageClient, job_queue, progress_bus
+from src.data.repo import GenerationRepo
+from src.service.image import AdmissionController, ImageCoalescer, ImageService
+
+from .worker import InferenceWorker, default_consumer
+
+
+def build_worker(image_client: ImageClient | None = None, consumer: str | None = None) -> InferenceWorker:
+    # workers load the pipeline up front, the first job does not pay for it
+    image_client = image_client or ImageClient()
+    service = ImageService(
+        image_client=lambda: image_client,
+        admission=AdmissionController(),
+        coalescer=ImageCoalescer(),
+        queue=job_queue(),
+        progress=progress_bus(),
+        history=GenerationRepo(),
+    )
+    return InferenceWorker(queue=job_queue(), service=service, consumer=consumer)
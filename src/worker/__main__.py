@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import signal
+
+import uvloop
+from loguru import logger
+from tortoise import Tortoise
+
+from src.client import ImageClient
+from src.core.config import settings
+from src.core.type import QueueBackend
+from src.data import DB_CONFIG
+
+from . import build_worker, default_consumer
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.worker", description="Inference worker for the job queue")
+    parser.add_argument("--consumer", default=default_consumer(), help="consumer name, unique per worker")
+    parser.add_argument("--model", choices=["pretrained", "tiny"], default="pretrained",
+                        help="tiny = random offline pipeline from the benchmark suite, for local testing")
+    return parser.parse_args()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    if settings.queue_backend != QueueBackend.REDIS:
+        logger.warning("worker: QUEUE_BACKEND is not redis, this worker only sees jobs queued in its own process")
+
+    image_client: ImageClient | None = None
+    if args.model == "tiny":
+        from src.bench import build_tiny_pipeline
+
+        image_client = ImageClient(pipeline=build_tiny_pipeline())
+
+    worker = build_worker(image_client=image_client, consumer=args.consumer)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # finish the current job, then exit; unacked jobs are reclaimed by other workers
+        loop.add_signal_handler(sig, worker.stop)
+    if not settings.image_history_enabled:
+        await worker.run()
+        return
+    # finished generations are written to the history table
+    await Tortoise.init(config=DB_CONFIG)
+    try:
+        await worker.run()
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    uvloop.run(_main(_parse_args()))
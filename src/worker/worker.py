@@ -0,0 +1,98 @@
+import asyncio
+import os
+import socket
+
+from loguru import logger
+
+from src.client import JobQueue
+from src.core.config import settings
+from src.core.metric import registry
+from src.core.type import JobStatus
+from src.service.image import ImageService
+
+WORKER_JOBS = registry.counter(
+    "worker_jobs_total",
+    "Queued generation jobs handled by inference workers",
+    labelnames=("status",),
+)
+
+
+def default_consumer() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class InferenceWorker:
+    """
+    Consumes the job queue: reclaims jobs left pending by crashed workers, reads
+    new ones, runs them through ImageService and acks them once their record is
+    final. A job delivered more than `queue_max_attempts` times is failed
+    without running again.
+    """
+
+    def __init__(self, queue: JobQueue, service: ImageService, consumer: str | None = None) -> None:
+        self._queue = queue
+        self._service = service
+        self._consumer = consumer or default_consumer()
+        self._stopping = asyncio.Event()
+
+    @property
+    def _tag(self) -> str:
+        return self.__class__.__name__
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _process(self, entry_id: str, job_id: str) -> None:
+        job = await self._service.job(job_id)
+        if job is None:
+            # record expired before the job ran
+            logger.warning(f"{self._tag}|_process(): job={job_id} has no record, dropping")
+            await self._queue.ack(entry_id)
+            return
+
+        cost = job.admission.cost_units if job.admission else 0.0
+        if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+            # finished, the previous owner died before acking
+            await self._queue.ack(entry_id, cost=cost)
+            return
+
+        if job.attempts >= settings.queue_max_attempts:
+            job.status = JobStatus.FAILED
+            job.error = f"gave up after {job.attempts} attempts"
+            await self._service.save_job(job)
+            self._service.publish_outcome(job)
+        else:
+            job = await self._service.execute(job, worker=self._consumer)
+
+        WORKER_JOBS.inc(status=job.status.value)
+        logger.info(f"{self._tag}|_process(): job={job_id} status={job.status.value} attempts={job.attempts}")
+        await self._queue.ack(entry_id, cost=cost)
+
+    async def run_once(self, block_ms: int | None = None) -> int:
+        """
+        Handle reclaimed entries, or else the next new entry.
+        Returns:
+            Number of entries handled
+        """
+        entries = await self._queue.reclaim(self._consumer, min_idle_ms=settings.queue_claim_idle_ms, count=1)
+        if entries:
+            logger.info(f"{self._tag}|run_once(): reclaimed {[job_id for _, job_id in entries]}")
+        else:
+            entries = await self._queue.read(self._consumer, count=1, block_ms=block_ms)
+
+        for entry_id, job_id in entries:
+            await self._process(entry_id, job_id)
+        return len(entries)
+
+    async def run(self) -> None:
+        await self._queue.setup()
+        logger.info(f"{self._tag}|run(): consumer={self._consumer} backend={settings.queue_backend.value}")
+        while not self._stopping.is_set():
+            try:
+                await self.run_once(block_ms=settings.queue_block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.error(f"Error|{self._tag}|run(): {error}")
+                await asyncio.sleep(1)
+        logger.info(f"{self._tag}|run(): consumer={self._consumer} stopped")